@@ -0,0 +1,58 @@
+"""
+Runs the benchmarks and compares them with the stored baseline:
+
+    python -m benchmarks [-k NAME] [--save] [--tolerance 0.25]
+
+Exits with status 1 if any benchmark is slower than its baseline by more than the
+tolerance. Baselines are only comparable on the machine that recorded them, so
+they aren't committed: record one with --save (e.g. on main) before comparing a
+change against it. Without one, the results are only reported.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from . import cases  # noqa: F401 Registers the benchmarks.
+from .harness import BENCHMARKS, compare, load_baseline, run, save_baseline
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "-k", dest="keyword", default="", help="only run benchmarks containing this"
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON file"
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="save the results as the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="fraction slower than the baseline that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.keyword in name]
+    results = run(names)
+    report, regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    print(report)
+    if not args.baseline.exists() and not args.save:
+        print(f"No baseline at {args.baseline}, record one with --save to compare")
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Benchmarks of the service's CPU hot paths. Models are built in memory, so no database
+or other service is needed.
+"""
+
+import copy
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict
+
+from dhos_users_api import roles
+from dhos_users_api.helpers import publish
+from dhos_users_api.models.api_spec import ClinicianCreateRequest
+from dhos_users_api.models.product import Product
+from dhos_users_api.models.terms_agreement import TermsAgreement
+from dhos_users_api.models.user import User
+
+from .harness import benchmark
+
+_NOW = datetime(2021, 7, 19, 12, tzinfo=timezone.utc)
+
+
+def _clinician(terms_agreements: int = 3) -> User:
+    products = ["SEND", "GDM", "DBM"]
+    return User(
+        uuid=str(uuid.uuid4()),
+        created=_NOW,
+        created_by_="benchmark",
+        modified=_NOW,
+        modified_by_="benchmark",
+        first_name="Jane",
+        last_name="Deer",
+        job_title="Nurse",
+        email_address="jane.deer@example.com",
+        nhs_smartcard_number="123456",
+        send_entry_identifier="654321",
+        can_edit_ews=False,
+        login_active=True,
+        groups=["SEND Clinician", "SEND Superclinician"],
+        locations=[str(uuid.uuid4()) for _ in range(5)],
+        bookmarks=[str(uuid.uuid4()) for _ in range(5)],
+        bookmarked_patients=[str(uuid.uuid4()) for _ in range(20)],
+        products=[
+            Product(
+                uuid=str(uuid.uuid4()),
+                created=_NOW,
+                modified=_NOW,
+                product_name=product,
+                opened_date=date(2021, 7, 19),
+            )
+            for product in products
+        ],
+        terms_agreement=[
+            TermsAgreement(
+                uuid=str(uuid.uuid4()),
+                created=_NOW,
+                modified=_NOW,
+                product_name=products[i % len(products)],
+                version=i,
+                accepted_timestamp=_NOW,
+                tou_version=i,
+                tou_accepted_timestamp=_NOW,
+            )
+            for i in range(terms_agreements)
+        ],
+    )
+
+
+@benchmark
+def user_to_dict() -> Callable[[], Any]:
+    return _clinician().to_dict
+
+
+@benchmark
+def user_to_compact_dict() -> Callable[[], Any]:
+    return _clinician().to_compact_dict
+
+
+@benchmark
+def user_to_login_dict() -> Callable[[], Any]:
+    return _clinician().to_login_dict
+
+
+@benchmark
+def latest_terms_agreement_by_product_300() -> Callable[[], Any]:
+    return _clinician(terms_agreements=300)._latest_terms_agreement_by_product
+
+
+@benchmark
+def get_permissions_for_roles_cached() -> Callable[[], Any]:
+    groups = ["SEND Clinician", "SEND Superclinician"]
+    return lambda: roles.get_permissions_for_roles(groups)
+
+
+@benchmark
+def get_permissions_for_roles_uncached() -> Callable[[], Any]:
+    # Every role, bypassing the cache, as after the role mapping is reloaded.
+    mapping = roles._state.mapping
+    all_roles = frozenset(mapping.roles)
+    uncached = roles._get_permissions_for_roles_with_lru_cache.__wrapped__  # type: ignore
+    return lambda: uncached(all_roles, mapping)
+
+
+@benchmark
+def fix_dates() -> Callable[[], Any]:
+    body = _clinician(terms_agreements=20).to_dict()
+    body["contract_expiry_eod_date"] = date(2022, 1, 1)
+    for product in body["products"]:
+        product["opened_date"] = date(2021, 7, 19)
+    return lambda: publish.fix_dates(copy.deepcopy(body))
+
+
+@benchmark
+def fix_dates_deepcopy_only() -> Callable[[], Any]:
+    # The copy included in fix_dates, to subtract from it.
+    body = _clinician(terms_agreements=20).to_dict()
+    return lambda: copy.deepcopy(body)
+
+
+@benchmark
+def generate_password_hash() -> Callable[[], Any]:
+    clinician = _clinician()
+    clinician.password_salt = clinician.generate_secure_random_string(32)
+    return lambda: clinician.generate_password_hash("Password123!")
+
+
+@benchmark
+def clinician_create_request_load() -> Callable[[], Any]:
+    schema = ClinicianCreateRequest()
+    request: Dict[str, Any] = {
+        "first_name": "Jane",
+        "last_name": "Deer",
+        "job_title": "Nurse",
+        "phone_number": "01234 567890",
+        "email_address": "jane.deer@example.com",
+        "nhs_smartcard_number": "123456",
+        "send_entry_identifier": "654321",
+        "can_edit_ews": False,
+        "login_active": True,
+        "contract_expiry_eod_date": str(date(2022, 1, 1)),
+        "groups": ["SEND Clinician"],
+        "locations": [str(uuid.uuid4()) for _ in range(5)],
+        "products": [
+            {"product_name": "SEND", "opened_date": str(date(2021, 7, 19))},
+        ],
+    }
+    return lambda: schema.load(request)
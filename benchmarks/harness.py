@@ -0,0 +1,94 @@
+"""
+A minimal benchmark harness, in the style of pytest-benchmark but without needing it.
+
+Benchmarks are functions decorated with @benchmark that set up whatever they need and
+return the function to time, so setup isn't included in the timings. Each benchmark is
+timed with timeit: it's run enough times to take at least MIN_TIME seconds, and that
+is repeated REPEAT times. The fastest repeat is compared with the stored baseline:
+as the timeit documentation explains, slower repeats are mostly caused by other
+activity on the machine rather than by the code being timed.
+"""
+
+import json
+import statistics
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MIN_TIME = 0.2
+REPEAT = 7
+
+Result = Dict[str, float]
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(
+    setup: Callable[[], Callable[[], Any]],
+) -> Callable[[], Callable[[], Any]]:
+    BENCHMARKS[setup.__name__] = setup
+    return setup
+
+
+def measure(
+    f: Callable[[], Any], min_time: float = MIN_TIME, repeat: int = REPEAT
+) -> Result:
+    """
+    Returns the median, fastest and slowest time per call in microseconds.
+    """
+    timer = timeit.Timer(f)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "median_us": statistics.median(times),
+        "min_us": min(times),
+        "max_us": max(times),
+    }
+
+
+def run(
+    names: List[str], min_time: float = MIN_TIME, repeat: int = REPEAT
+) -> Dict[str, Result]:
+    return {
+        name: measure(BENCHMARKS[name](), min_time=min_time, repeat=repeat)
+        for name in names
+    }
+
+
+def load_baseline(path: Path) -> Dict[str, Result]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(path: Path, results: Dict[str, Result]) -> None:
+    baseline = {**load_baseline(path), **results}
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+def compare(
+    results: Dict[str, Result], baseline: Dict[str, Result], tolerance: float
+) -> Tuple[str, List[str]]:
+    """
+    Returns a report comparing results with the baseline, and the names of benchmarks
+    whose fastest time is more than tolerance (a fraction) slower than the baseline's.
+    """
+    lines = [f"{'benchmark':<40} {'min (us)':>14} {'baseline (us)':>14} {'change':>9}"]
+    regressions: List[str] = []
+    for name, result in results.items():
+        base: Optional[Result] = baseline.get(name)
+        if base is None:
+            lines.append(f"{name:<40} {result['min_us']:>14.2f} {'-':>14} {'new':>9}")
+            continue
+        change = result["min_us"] / base["min_us"] - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        lines.append(
+            f"{name:<40} {result['min_us']:>14.2f} {base['min_us']:>14.2f}"
+            f" {change:>+9.1%}{flag}"
+        )
+    return "\n".join(lines), regressions
@@ -0,0 +1,4 @@
+import time
+
+# When the package was first imported, so startup profiling can include import time.
+IMPORT_STARTED_AT: float = time.perf_counter()
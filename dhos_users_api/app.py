@@ -1,5 +1,3 @@
-from pathlib import Path
-
 import connexion
 import kombu_batteries_included
 from connexion import FlaskApp
@@ -8,47 +6,91 @@ from flask_batteries_included import augment_app as fbi_augment_app
 from flask_batteries_included import sqldb
 from flask_batteries_included.config import is_not_production_environment
 
+from dhos_users_api import IMPORT_STARTED_AT, roles
 from dhos_users_api.blueprint_api import clinicians_blueprint
-from dhos_users_api.blueprint_development import development_blueprint
-from dhos_users_api.config import init_config
+from dhos_users_api.config import Configuration, init_config
+from dhos_users_api.helpers import (
+    change_feed,
+    clinician_cache,
+    database,
+    metrics,
+    profiling,
+    query_stats,
+    replicas,
+    spec_cache,
+    timing,
+)
 from dhos_users_api.helpers.cli import add_cli_command
+from dhos_users_api.helpers.startup import StartupProfiler
 
 
 def create_app(testing: bool = False) -> Flask:
-    openapi_dir: Path = Path(__file__).parent / "openapi"
-    connexion_app: FlaskApp = connexion.App(
-        __name__,
-        specification_dir=openapi_dir,
-        options={"swagger_ui": is_not_production_environment()},
-    )
-    connexion_app.add_api("openapi.yaml", strict_validation=True)
-
-    app: Flask = fbi_augment_app(
-        app=connexion_app.app,
-        use_pgsql=True,
-        use_sqlite=False,
-        testing=testing,
-        use_auth0=True,
-        use_customdb_auth0=True,
+    # Set PROFILE_STARTUP to log how long each phase of startup takes.
+    profiler = StartupProfiler(
+        enabled=Configuration.PROFILE_STARTUP, started_at=IMPORT_STARTED_AT
     )
 
-    # Apply config
-    init_config(app)
+    with profiler.phase("connexion"):
+        connexion_app: FlaskApp = connexion.App(
+            __name__,
+            specification_dir=spec_cache.OPENAPI_DIR,
+            options={"swagger_ui": is_not_production_environment()},
+        )
+        # Use the pre-parsed spec if there's an up-to-date cache of it.
+        connexion_app.add_api(spec_cache.load_spec(), strict_validation=True)
+
+    with profiler.phase("augment_app"):
+        app: Flask = fbi_augment_app(
+            app=connexion_app.app,
+            use_pgsql=True,
+            use_sqlite=False,
+            testing=testing,
+            use_auth0=True,
+            use_customdb_auth0=True,
+        )
+
+    with profiler.phase("config"):
+        # Apply config
+        init_config(app)
+
+        # Load role mappings, from ROLE_MAPPING_FILE if configured.
+        roles.init_roles(app)
+
+    with profiler.phase("kombu"):
+        # Initialise k-b-i library to allow publishing to RabbitMQ.
+        kombu_batteries_included.init()
+
+    with profiler.phase("database"):
+        # Configure the sqlalchemy connection.
+        database.init_database_config(app)
+        sqldb.init_db(app=app, testing=testing)
+        replicas.init_replicas(app)
+        clinician_cache.init_clinician_cache(app)
+        change_feed.init_change_feed(app)
 
-    # Initialise k-b-i library to allow publishing to RabbitMQ.
-    kombu_batteries_included.init()
+    with profiler.phase("blueprints"):
+        # API blueprint registration
+        app.register_blueprint(clinicians_blueprint)
+        app.logger.info("Registered API blueprint")
 
-    # Configure the sqlalchemy connection.
-    sqldb.init_db(app=app, testing=testing)
+        if is_not_production_environment():
+            # Only imported where it's used.
+            from dhos_users_api.blueprint_development import development_blueprint
 
-    # API blueprint registration
-    app.register_blueprint(clinicians_blueprint)
-    app.logger.info("Registered API blueprint")
+            app.register_blueprint(development_blueprint)
+            app.logger.info("Registered development blueprint")
 
-    if is_not_production_environment():
-        app.register_blueprint(development_blueprint)
-        app.logger.info("Registered development blueprint")
+    with profiler.phase("timing"):
+        # Log how long each phase of handling a request takes, and the SQL it runs.
+        query_stats.init_query_stats(app)
+        timing.init_request_timing(app)
+        # Profile requests on demand.
+        profiling.init_profiling(app)
+        # Report metrics from every server worker.
+        metrics.init_metrics(app)
 
-    add_cli_command(app)
+    with profiler.phase("cli"):
+        add_cli_command(app)
 
+    profiler.report()
     return app
@@ -0,0 +1,364 @@
+"""
+ASGI app serving the hottest clinician reads with asyncpg, so each worker can wait on
+many queries at once rather than one per thread:
+
+- GET /dhos/v1/clinician/<clinician_id>
+- POST /dhos/v1/clinician_list
+- GET /dhos/v2/clinicians
+- GET /dhos/v1/clinician/login
+
+Run it alongside the Flask app, and route only those paths to it, with e.g.
+`uvicorn --factory dhos_users_api.asgi:create_asgi_app`. Each request is handled in a
+request context of the Flask app, which authorises it and turns the result (or error)
+into a response, so the endpoints behave as they do there. They always read from the
+primary, without the clinician cache. Anything else is a 404.
+
+Requires the `asgi` extra.
+"""
+
+import asyncio
+import io
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import flask
+from flask import Flask, jsonify, make_response, request
+from flask_batteries_included.helpers.security import protected_route
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from werkzeug.http import is_resource_modified
+from werkzeug.routing import Map, Rule
+
+from dhos_users_api.blueprint_api import (
+    CLINICIAN_LOGIN,
+    READ_CLINICIAN,
+    READ_CLINICIAN_LIST,
+    SEARCH_CLINICIANS,
+    async_controller,
+)
+from dhos_users_api.helpers.database import async_engine_options
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+SORT_FIELDS = [
+    "last_name",
+    "first_name",
+    "uuid",
+    "nhs_smartcard_number",
+    "email_address",
+    "modified",
+    "created",
+    "phone_number",
+    "send_entry_identifier",
+    "job_title",
+]
+
+
+def _check_args(*names: str) -> None:
+    extra = sorted(set(request.args) - set(names))
+    if extra:
+        raise ValueError(f"Extra query parameter(s) {','.join(extra)} not in spec")
+
+
+def _bool_arg(name: str) -> Optional[bool]:
+    value = request.args.get(name)
+    if value is None:
+        return None
+    if value.lower() not in ("true", "false"):
+        raise ValueError(f"Wrong type, expected 'boolean' for query parameter '{name}'")
+    return value.lower() == "true"
+
+
+def _int_arg(name: str) -> Optional[int]:
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Wrong type, expected 'integer' for query parameter '{name}'")
+
+
+def _enum_arg(name: str, allowed: List[str], value: str) -> str:
+    if value not in allowed:
+        raise ValueError(f"'{value}' is not one of {allowed} for '{name}'")
+    return value
+
+
+async def _get_clinician_by_uuid(
+    session: AsyncSession, clinician_id: str
+) -> flask.Response:
+    _check_args("product_name", "temp_only")
+    temp_only = bool(_bool_arg("temp_only"))
+    version = await async_controller.get_clinician_version(
+        session, clinician_id=clinician_id, get_temp_only=temp_only
+    )
+    response: flask.Response
+    if is_resource_modified(request.environ, etag=version):
+        response = jsonify(
+            await async_controller.get_clinician_by_id(
+                session, clinician_id=clinician_id, get_temp_only=temp_only
+            )
+        )
+    else:
+        response = make_response("", 304)
+    response.set_etag(version)
+    return response
+
+
+async def _retrieve_clinicians_by_uuids(session: AsyncSession) -> flask.Response:
+    _check_args("compact")
+    clinician_uuids = request.get_json()
+    if not isinstance(clinician_uuids, list) or not all(
+        isinstance(uuid, str) for uuid in clinician_uuids
+    ):
+        raise ValueError("Request body must be a list of clinician UUIDs")
+    return jsonify(
+        await async_controller.get_clinicians_by_uuids(
+            session, uuids=clinician_uuids, compact=bool(_bool_arg("compact"))
+        )
+    )
+
+
+async def _get_clinicians(session: AsyncSession) -> flask.Response:
+    _check_args(
+        "product_name",
+        "login_active",
+        "compact",
+        "expanded",
+        "modified_since",
+        "temp_only",
+        "q",
+        "offset",
+        "limit",
+        "sort",
+        "order",
+    )
+    # Like connexion, accept both ?sort=a&sort=b and ?sort=a,b.
+    sort = [
+        _enum_arg("sort", SORT_FIELDS, field)
+        for value in request.args.getlist("sort")
+        for field in value.split(",")
+    ] or ["last_name", "first_name"]
+    clinician_list, total = await async_controller.get_clinicians(
+        session,
+        login_active=_bool_arg("login_active"),
+        product_name=request.args.get("product_name"),
+        temp_only=bool(_bool_arg("temp_only")),
+        compact=bool(_bool_arg("compact")),
+        expanded=bool(_bool_arg("expanded")),
+        modified_since=request.args.get("modified_since"),
+        q=request.args.get("q"),
+        offset=_int_arg("offset"),
+        limit=_int_arg("limit"),
+        sort=sort,
+        order=_enum_arg("order", ["asc", "desc"], request.args.get("order", "asc")),
+    )
+    return jsonify({"results": clinician_list, "total": total})
+
+
+async def _clinician_login(session: AsyncSession) -> flask.Response:
+    _check_args()
+    if "UserAuthorization" not in request.headers:
+        raise ValueError("Missing header parameter 'UserAuthorization'")
+
+    ua_header: str = request.headers["UserAuthorization"]
+    if not ua_header.startswith("Bearer "):
+        raise PermissionError("Login failed")
+
+    # Header is in the form "Bearer <b64str>", so trim it.
+    return jsonify(await async_controller.clinician_login(session, ua_header[7:]))
+
+
+def _authorised(**kwargs: Any) -> None:
+    pass
+
+
+class _Endpoint(NamedTuple):
+    authorise: Callable[..., None]
+    handle: Callable[..., Awaitable[flask.Response]]
+
+
+# Named after the Flask app's endpoints, so metrics and logs are labelled the same.
+ENDPOINTS: Dict[str, _Endpoint] = {
+    "clinicians_api.get_clinician_by_uuid": _Endpoint(
+        protected_route(READ_CLINICIAN)(_authorised), _get_clinician_by_uuid
+    ),
+    "clinicians_api.retrieve_clinicians_by_uuids": _Endpoint(
+        protected_route(READ_CLINICIAN_LIST)(_authorised),
+        _retrieve_clinicians_by_uuids,
+    ),
+    "clinicians_api.get_clinicians": _Endpoint(
+        protected_route(SEARCH_CLINICIANS)(_authorised), _get_clinicians
+    ),
+    "clinicians_api.clinician_login": _Endpoint(
+        protected_route(CLINICIAN_LOGIN)(_authorised), _clinician_login
+    ),
+}
+
+URL_MAP = Map(
+    [
+        Rule(
+            "/dhos/v1/clinician/<clinician_id>",
+            endpoint="clinicians_api.get_clinician_by_uuid",
+            methods=["GET"],
+        ),
+        Rule(
+            "/dhos/v1/clinician_list",
+            endpoint="clinicians_api.retrieve_clinicians_by_uuids",
+            methods=["POST"],
+        ),
+        Rule(
+            "/dhos/v2/clinicians",
+            endpoint="clinicians_api.get_clinicians",
+            methods=["GET"],
+        ),
+        # Static rules are matched before ones with variables.
+        Rule(
+            "/dhos/v1/clinician/login",
+            endpoint="clinicians_api.clinician_login",
+            methods=["GET"],
+        ),
+    ]
+)
+
+
+class AsyncReadApp:
+    def __init__(self, flask_app: Flask) -> None:
+        self.flask_app = flask_app
+        config = flask_app.config
+        self.engine: AsyncEngine = create_async_engine(
+            make_url(config["SQLALCHEMY_DATABASE_URI"]).set(
+                drivername="postgresql+asyncpg"
+            ),
+            **async_engine_options(config),
+        )
+        self.session_factory = sessionmaker(
+            self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}")
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body = await _read_body(receive)
+        with self.flask_app.request_context(_environ(scope, body)):
+            response = await self._full_dispatch_request()
+            headers = [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in response.headers.to_wsgi_list()
+            ]
+            data = b"" if scope["method"] == "HEAD" else response.get_data()
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": data})
+
+    async def _full_dispatch_request(self) -> flask.Response:
+        """
+        Flask.full_dispatch_request, with an async view.
+        """
+        app = self.flask_app
+        try:
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = await self._dispatch_request()
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            return app.finalize_request(rv)
+        except Exception as e:
+            return app.finalize_request(
+                app.handle_exception(e), from_error_handler=True
+            )
+
+    async def _dispatch_request(self) -> flask.Response:
+        # Raises NotFound or MethodNotAllowed, which the Flask app turns into errors.
+        rule, view_args = URL_MAP.bind_to_environ(request.environ).match(
+            return_rule=True
+        )
+        request.url_rule, request.view_args = rule, dict(view_args)
+        endpoint = ENDPOINTS[rule.endpoint]
+        # Validating a JWT may fetch the signing keys.
+        await asyncio.to_thread(endpoint.authorise, **view_args)
+        async with self.session_factory() as session:
+            return await endpoint.handle(session, **view_args)
+
+
+async def _read_body(receive: Receive) -> bytes:
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+def _environ(scope: Scope, body: bytes) -> Dict[str, Any]:
+    """
+    The WSGI environ of an ASGI HTTP request.
+    """
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        # The whole body has been read, so it can be used without a Content-Length.
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+
+    for name, value in scope["headers"]:
+        key = name.decode("latin1").upper().replace("-", "_")
+        if key not in ("CONTENT_LENGTH", "CONTENT_TYPE"):
+            key = f"HTTP_{key}"
+        if key in environ:
+            environ[key] += f",{value.decode('latin1')}"
+        else:
+            environ[key] = value.decode("latin1")
+    return environ
+
+
+def create_asgi_app(flask_app: Optional[Flask] = None) -> AsyncReadApp:
+    if flask_app is None:
+        from dhos_users_api.app import create_app
+
+        flask_app = create_app()
+    return AsyncReadApp(flask_app)
@@ -1,7 +1,17 @@
-from typing import Dict, List, Optional
+import functools
+import io
+import json
+from typing import Dict, Iterator, List, Optional
 
 import flask
-from flask import Blueprint, Response, jsonify, make_response, request
+from flask import (
+    Blueprint,
+    Response,
+    jsonify,
+    make_response,
+    request,
+    stream_with_context,
+)
 from flask_batteries_included.helpers.routes import deprecated_route
 from flask_batteries_included.helpers.security import protected_route
 from flask_batteries_included.helpers.security.endpoint_security import (
@@ -12,11 +22,43 @@ from flask_batteries_included.helpers.security.endpoint_security import (
     scopes_present,
 )
 from flask_batteries_included.helpers.security.jwt import current_jwt_user
+from werkzeug.http import is_resource_modified
 
 from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers import change_stream
+from dhos_users_api.helpers.database import statement_timeout
+from dhos_users_api.helpers.replicas import read_replica
 
 clinicians_blueprint = Blueprint("clinicians_api", __name__)
 
+# Access rules of the endpoints also served by the ASGI app (dhos_users_api.asgi).
+READ_CLINICIAN = or_(
+    scopes_present(required_scopes="read:gdm_clinician_all"),
+    scopes_present(required_scopes="read:send_clinician_all"),
+    and_(
+        scopes_present(required_scopes="read:gdm_clinician"),
+        match_keys(clinician_id="clinician_id"),
+    ),
+    and_(
+        scopes_present(required_scopes="read:send_clinician"),
+        match_keys(clinician_id="clinician_id"),
+    ),
+    scopes_present(required_scopes="read:send_clinician_temp"),
+)
+SEARCH_CLINICIANS = or_(
+    scopes_present(required_scopes="read:gdm_clinician_all"),
+    scopes_present(required_scopes="read:gdm_clinician"),
+    scopes_present(required_scopes="read:send_clinician_all"),
+    scopes_present(required_scopes="read:send_clinician_temp"),
+)
+READ_CLINICIAN_LIST = or_(
+    scopes_present(required_scopes="read:gdm_clinician_all"),
+    scopes_present(required_scopes="read:gdm_clinician"),
+    scopes_present(required_scopes="read:send_clinician_all"),
+    scopes_present(required_scopes="read:send_clinician"),
+)
+CLINICIAN_LOGIN = scopes_present(required_scopes="read:gdm_clinician_auth_all")
+
 
 @clinicians_blueprint.route("/dhos/v1/clinician", methods=["POST"])
 @protected_route(
@@ -127,21 +169,7 @@ def create_clinician_tos(clinician_id: str, clinician_tos: Dict) -> flask.Respon
 
 
 @clinicians_blueprint.route("/dhos/v1/clinician/<clinician_id>", methods=["GET"])
-@protected_route(
-    or_(
-        scopes_present(required_scopes="read:gdm_clinician_all"),
-        scopes_present(required_scopes="read:send_clinician_all"),
-        and_(
-            scopes_present(required_scopes="read:gdm_clinician"),
-            match_keys(clinician_id="clinician_id"),
-        ),
-        and_(
-            scopes_present(required_scopes="read:send_clinician"),
-            match_keys(clinician_id="clinician_id"),
-        ),
-        scopes_present(required_scopes="read:send_clinician_temp"),
-    )
-)
+@protected_route(READ_CLINICIAN)
 def get_clinician_by_uuid(
     clinician_id: str, product_name: str = None, temp_only: bool = False
 ) -> flask.Response:
@@ -150,7 +178,8 @@ def get_clinician_by_uuid(
     get:
       summary: Get clinician by UUID
       description: >-
-        Get the clinician with the provided UUID.
+        Get the clinician with the provided UUID. Supports conditional requests
+        using the `ETag` response header.
       tags: [clinician]
       parameters:
         - name: clinician_id
@@ -180,6 +209,8 @@ def get_clinician_by_uuid(
           content:
             application/json:
               schema: ClinicianResponse
+        '304':
+          description: Clinician not modified since the `If-None-Match` request header
         default:
           description: >-
             Error, e.g. 400 Bad Request, 503 Service Unavailable
@@ -187,11 +218,23 @@ def get_clinician_by_uuid(
             application/json:
               schema: Error
     """
-
-    response: Dict = controller.get_clinician_by_id(
+    # Check the version first, so polling clients don't need the clinician loaded.
+    # There's no Last-Modified, as removing a product doesn't leave a later modified
+    # time behind, and times only have a resolution of a second.
+    version = controller.get_clinician_version(
         clinician_id=clinician_id, get_temp_only=temp_only
     )
-    return jsonify(response)
+    response: flask.Response
+    if is_resource_modified(request.environ, etag=version):
+        response = jsonify(
+            controller.get_clinician_by_id(
+                clinician_id=clinician_id, get_temp_only=temp_only, version=version
+            )
+        )
+    else:
+        response = make_response("", 304)
+    response.set_etag(version)
+    return response
 
 
 @clinicians_blueprint.route("/dhos/v1/clinician/<clinician_id>", methods=["PATCH"])
@@ -419,7 +462,7 @@ def update_clinician_password_by_email(
 
 
 @clinicians_blueprint.route("/dhos/v1/clinician/login", methods=["GET"])
-@protected_route(scopes_present(required_scopes="read:gdm_clinician_auth_all"))
+@protected_route(CLINICIAN_LOGIN)
 def clinician_login() -> flask.Response:
     """
     ---
@@ -464,15 +507,10 @@ def clinician_login() -> flask.Response:
 
 
 @clinicians_blueprint.route("/dhos/v1/clinicians", methods=["GET"])
-@protected_route(
-    or_(
-        scopes_present(required_scopes="read:gdm_clinician_all"),
-        scopes_present(required_scopes="read:gdm_clinician"),
-        scopes_present(required_scopes="read:send_clinician_all"),
-        scopes_present(required_scopes="read:send_clinician_temp"),
-    )
-)
+@protected_route(SEARCH_CLINICIANS)
 @deprecated_route(superseded_by="GET /dhos/v2/clinicians")
+@read_replica
+@statement_timeout("CLINICIAN_SEARCH_STATEMENT_TIMEOUT_MS")
 def get_clinicians_v1(
     product_name: Optional[str] = None,
     login_active: Optional[bool] = None,
@@ -613,14 +651,9 @@ def get_clinicians_v1(
 
 
 @clinicians_blueprint.route("/dhos/v2/clinicians", methods=["GET"])
-@protected_route(
-    or_(
-        scopes_present(required_scopes="read:gdm_clinician_all"),
-        scopes_present(required_scopes="read:gdm_clinician"),
-        scopes_present(required_scopes="read:send_clinician_all"),
-        scopes_present(required_scopes="read:send_clinician_temp"),
-    )
-)
+@protected_route(SEARCH_CLINICIANS)
+@read_replica
+@statement_timeout("CLINICIAN_SEARCH_STATEMENT_TIMEOUT_MS")
 def get_clinicians(
     product_name: Optional[str] = None,
     login_active: Optional[bool] = None,
@@ -758,15 +791,155 @@ def get_clinicians(
     return jsonify({"results": clinician_list, "total": total})
 
 
-@clinicians_blueprint.route("/dhos/v1/clinician_list", methods=["POST"])
+@clinicians_blueprint.route("/dhos/v1/clinician_changes", methods=["GET"])
 @protected_route(
     or_(
         scopes_present(required_scopes="read:gdm_clinician_all"),
-        scopes_present(required_scopes="read:gdm_clinician"),
         scopes_present(required_scopes="read:send_clinician_all"),
-        scopes_present(required_scopes="read:send_clinician"),
     )
 )
+@read_replica
+def get_clinician_changes(since: int = 0, limit: int = 100) -> flask.Response:
+    """
+    ---
+    get:
+      summary: Get changes to clinicians
+      description: >-
+        Get changes to clinicians (including their products and terms agreements) in the
+        order they were made, for keeping a copy of the clinician directory in sync. Start
+        with `since` set to 0, which returns every clinician, then pass the `next_since`
+        from each response to the next request. Each change includes the clinician's
+        current details, or null if the clinician no longer exists, and the locations,
+        groups and products removed from the clinician by the change.
+      tags: [clinician]
+      parameters:
+        - name: since
+          in: query
+          required: false
+          description: Return changes after the change with this sequence number
+          schema:
+            type: integer
+            minimum: 0
+            default: 0
+            example: 1042
+        - name: limit
+          in: query
+          required: false
+          description: Maximum number of changes to return
+          schema:
+            type: integer
+            minimum: 1
+            maximum: 1000
+            default: 100
+            example: 100
+      responses:
+        '200':
+          description: Changes to clinicians
+          content:
+            application/json:
+              schema: ClinicianChangesResponse
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(controller.get_clinician_changes(since=since, limit=limit))
+
+
+@clinicians_blueprint.route("/dhos/v1/clinician_changes/stream", methods=["GET"])
+@protected_route(
+    or_(
+        scopes_present(required_scopes="read:gdm_clinician_all"),
+        scopes_present(required_scopes="read:send_clinician_all"),
+    )
+)
+def stream_clinician_changes(since: Optional[int] = None) -> flask.Response:
+    """
+    ---
+    get:
+      summary: Stream changes to clinicians
+      description: >-
+        Streams the UUIDs of changed clinicians as server-sent events, as the changes are
+        committed, to save polling for them. Each event's ID is the change's sequence number in
+        the change feed (`GET /dhos/v1/clinician_changes`). A client reconnecting with the
+        `Last-Event-ID` header, or with `since`, first receives the changes it missed. Streams
+        end after a few minutes, or if the client falls too far behind, and should be
+        reconnected. Returns 503 if the server has too many subscribers.
+      tags: [clinician]
+      parameters:
+        - name: since
+          in: query
+          required: false
+          description: Start with the changes after the change with this sequence number, rather than only new changes
+          schema:
+            type: integer
+            minimum: 0
+            example: 1042
+        - name: Last-Event-ID
+          in: header
+          required: false
+          description: Sequence number of the last change received, to resume a stream (overrides since)
+          schema:
+            type: integer
+            minimum: 0
+            example: 1042
+      responses:
+        '200':
+          description: Stream of changes
+          content:
+            text/event-stream:
+              schema:
+                type: string
+                example: |-
+                  id: 1043
+                  event: clinician_change
+                  data: {"sequence": 1043, "clinician_id": "bba65af9-88d3-459b-8c09-c359873828f7"}
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    last_event_id: Optional[str] = request.headers.get("Last-Event-ID")
+    if last_event_id:
+        since = int(last_event_id)
+    # Subscribed before the response starts, so too many subscribers is a 503.
+    since, subscription = controller.subscribe_to_clinician_changes(since=since)
+    changes = controller.stream_clinician_changes(
+        since=since, subscription=subscription
+    )
+    response = Response(
+        stream_with_context(_server_sent_events(changes)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Also unsubscribes if the stream is never started.
+    response.call_on_close(
+        functools.partial(change_stream.get_notifier().unsubscribe, subscription)
+    )
+    # Don't let the ETag handler buffer the stream to hash it.
+    response.direct_passthrough = True
+    return response
+
+
+def _server_sent_events(changes: Iterator[Optional[Dict]]) -> Iterator[str]:
+    for change in changes:
+        if change is None:
+            yield ": keepalive\n\n"
+        else:
+            yield (
+                f"id: {change['sequence']}\n"
+                f"event: clinician_change\n"
+                f"data: {json.dumps(change)}\n\n"
+            )
+
+
+@clinicians_blueprint.route("/dhos/v1/clinician_list", methods=["POST"])
+@protected_route(READ_CLINICIAN_LIST)
+@read_replica
 def retrieve_clinicians_by_uuids(
     clinician_uuids: List[str], compact: bool = False
 ) -> flask.Response:
@@ -822,6 +995,8 @@ def retrieve_clinicians_by_uuids(
     "/dhos/v1/location/<location_id>/clinician", methods=["GET"]
 )
 @protected_route(scopes_present(required_scopes="read:gdm_clinician_all"))
+@read_replica
+@statement_timeout("CLINICIAN_SEARCH_STATEMENT_TIMEOUT_MS")
 def get_clinicians_by_location(location_id: str) -> flask.Response:
     """
     ---
@@ -1071,7 +1246,8 @@ def create_clinician_bulk(clinician_details: List[Dict]) -> flask.Response:
       summary: Create clinician in bulk (migration only)
       description: >-
         Creates clinicians using the details provided in the request body. Intended for migration from
-        Services API only.
+        Services API only. Clinicians are inserted and committed in batches; a failed batch is rolled
+        back and reported without preventing later batches from being created.
       tags: [migration]
       requestBody:
         description: Clinician details
@@ -1095,6 +1271,23 @@ def create_clinician_bulk(clinician_details: List[Dict]) -> flask.Response:
                     type: integer
                     description: Number of clinicians created
                     example: 50
+                  batches:
+                    type: array
+                    description: Result of each committed batch
+                    items:
+                      type: object
+                      properties:
+                        batch:
+                          type: integer
+                          description: Index of the batch
+                          example: 0
+                        created:
+                          type: integer
+                          description: Number of clinicians created in the batch
+                          example: 50
+                        error:
+                          type: string
+                          description: Present if the batch failed; details are logged by the service
         default:
           description: >-
             Error, e.g. 400 Bad Request, 503 Service Unavailable
@@ -1108,6 +1301,117 @@ def create_clinician_bulk(clinician_details: List[Dict]) -> flask.Response:
     return jsonify(response)
 
 
+@clinicians_blueprint.route("/dhos/v1/clinician/bulk", methods=["PATCH"])
+@protected_route(
+    or_(
+        scopes_present(required_scopes="write:gdm_clinician_all"),
+        scopes_present(required_scopes="write:send_clinician_all"),
+        scopes_present(required_scopes="write:send_clinician_temp"),
+    )
+)
+def update_clinician_bulk(
+    clinician_updates: List[Dict], temp_only: bool = False
+) -> flask.Response:
+    """
+    ---
+    patch:
+      summary: Update clinicians in bulk
+      description: >-
+        Applies a list of clinician updates in a single transaction, e.g. to deactivate leavers or
+        reassign locations. Each update is applied as it would be by the single clinician update
+        endpoint, and an update that fails (e.g. for lack of permission) doesn't prevent the others
+        from being applied. The response gives the outcome of each update in request order.
+      tags: [clinician]
+      parameters:
+        - name: temp_only
+          in: query
+          required: false
+          description: Can edit temporary clinicians only
+          schema:
+            type: boolean
+            default: false
+      requestBody:
+        description: Clinician updates
+        required: true
+        content:
+          application/json:
+            schema:
+              type: array
+              items:
+                $ref: '#/components/schemas/ClinicianBulkUpdateItem'
+              x-body-name: clinician_updates
+      responses:
+        '200':
+          description: Outcome of each update
+          content:
+            application/json:
+              schema: ClinicianBulkUpdateResponse
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    response: Dict = controller.update_clinicians_bulk(
+        updates=clinician_updates, edit_temp_only=temp_only
+    )
+    return jsonify(response)
+
+
+# Endpoint to help with migration of data from Services API.
+@clinicians_blueprint.route("/dhos/v1/clinician/import", methods=["POST"])
+@protected_route(scopes_present(required_scopes="write:clinician_migration"))
+def import_clinicians(clinician_records: bytes) -> flask.Response:
+    """
+    ---
+    post:
+      summary: Import clinicians from NDJSON (migration only)
+      description: >-
+        Imports clinicians from a newline-delimited JSON body, one clinician per line. Each record
+        is validated individually and valid records are committed in batches, so one bad record
+        does not prevent the rest from being imported. The response is streamed back as
+        newline-delimited JSON with one result per record (created, duplicate or invalid) followed
+        by a summary line. Records matching an existing clinician's UUID or email address are
+        reported as duplicates, so an interrupted import can safely be rerun. Intended for
+        migration from Services API only.
+      tags: [migration]
+      requestBody:
+        description: Clinician details, one ClinicianCreateRequest JSON object per line
+        required: true
+        content:
+          application/x-ndjson:
+            schema:
+              type: string
+              x-body-name: clinician_records
+      responses:
+        '200':
+          description: Per-record import results, one JSON object per line
+          content:
+            application/x-ndjson:
+              schema:
+                type: string
+                example: |-
+                  {"line": 1, "uuid": "2c4f1d4a-cf5b-4c5f-9f3f-c4a4d9b4ec36", "result": "created"}
+                  {"line": 2, "result": "invalid", "error": {"first_name": ["Missing data for required field."]}}
+                  {"summary": {"created": 1, "duplicate": 0, "invalid": 1}}
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    results = controller.import_clinicians(lines=io.BytesIO(clinician_records))
+    response = Response(
+        stream_with_context(json.dumps(result) + "\n" for result in results),
+        mimetype="application/x-ndjson",
+    )
+    # Don't let the ETag handler buffer the stream to hash it.
+    response.direct_passthrough = True
+    return response
+
+
 @clinicians_blueprint.route("/dhos/v1/roles", methods=["GET"])
 @protected_route()
 def get_roles() -> flask.Response:
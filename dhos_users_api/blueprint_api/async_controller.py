@@ -0,0 +1,170 @@
+"""
+Async versions of the hot clinician reads, for the ASGI app (dhos_users_api.asgi).
+They build their queries and results with the same helpers as controller, but run
+them with an asyncpg session. They read straight from the database: the clinician
+cache's shared tier is synchronous, so isn't used here.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+
+from flask import current_app
+from flask_batteries_included.helpers.error_handler import EntityNotFoundException
+from she_logging import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers.database import statement_timeout_query
+from dhos_users_api.models.user import User
+
+
+async def get_clinician_version(
+    session: AsyncSession, clinician_id: str, get_temp_only: bool
+) -> str:
+    row = (
+        await session.execute(
+            controller.CLINICIAN_VERSION_QUERY, {"clinician_id": clinician_id}
+        )
+    ).one_or_none()
+    return controller.clinician_version_from_row(
+        clinician_id, row, get_temp_only=get_temp_only
+    )
+
+
+async def get_clinician_by_id(
+    session: AsyncSession, clinician_id: str, get_temp_only: bool
+) -> Dict:
+    clinician: Optional[User] = (
+        await session.execute(
+            select(User)
+            .where(User.uuid == clinician_id)
+            .options(*controller.WITH_RELATIONSHIPS)
+        )
+    ).scalar_one_or_none()
+    if clinician is None:
+        raise EntityNotFoundException(f"No user found with UUID {clinician_id}")
+    if get_temp_only and clinician.contract_expiry_eod_date is None:
+        raise PermissionError("Insufficient privileges to access clinician")
+    return clinician.to_dict()
+
+
+async def get_clinicians_by_uuids(
+    session: AsyncSession, uuids: List[str], compact: bool
+) -> Dict[str, Optional[Dict]]:
+    unique_uuids: Set[str] = set(uuids)
+    results: List[User] = (
+        (
+            await session.execute(
+                select(User)
+                .where(User.uuid.in_(unique_uuids))
+                .options(
+                    *(
+                        controller.WITHOUT_RELATIONSHIPS
+                        if compact
+                        else controller.WITH_RELATIONSHIPS
+                    )
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+    logger.info("Retrieved %d clinicians from database", len(results))
+    clinician_map: Dict[str, Optional[Dict]] = {uuid: None for uuid in unique_uuids}
+    clinician_map.update(
+        {c.uuid: c.to_compact_dict() if compact else c.to_dict() for c in results}
+    )
+    return clinician_map
+
+
+async def get_clinicians(
+    session: AsyncSession,
+    login_active: Optional[bool] = None,
+    product_name: Optional[str] = None,
+    temp_only: bool = False,
+    compact: bool = False,
+    expanded: bool = False,
+    modified_since: Optional[str] = None,
+    q: Optional[str] = None,
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    sort: Optional[List[str]] = None,
+    order: Optional[str] = None,
+) -> Tuple[List[Dict], int]:
+    await session.execute(
+        statement_timeout_query(
+            current_app.config["CLINICIAN_SEARCH_STATEMENT_TIMEOUT_MS"]
+        )
+    )
+    filters = controller.clinician_search_filters(
+        login_active=login_active,
+        product_name=product_name,
+        temp_only=temp_only,
+        modified_since=modified_since,
+        q=q,
+    )
+    total: int = (
+        await session.execute(select(func.count()).select_from(User).where(*filters))
+    ).scalar_one()
+
+    query = select(User).where(*filters)
+    if sort:
+        query = query.order_by(*controller.clinician_search_order(sort, order))
+
+    if offset:
+        query = query.offset(offset)
+
+    if limit:
+        query = query.limit(limit)
+
+    results: List[User] = (
+        (
+            await session.execute(
+                query.options(
+                    *(
+                        controller.WITH_RELATIONSHIPS
+                        if expanded
+                        else controller.WITHOUT_RELATIONSHIPS
+                    )
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+    return [
+        controller.clinician_search_result(c, compact=compact, expanded=expanded)
+        for c in results
+    ], total
+
+
+async def clinician_login(session: AsyncSession, user_auth_string_b64: str) -> Dict:
+    username, password = controller.get_clinician_credentials(
+        user_authorization=user_auth_string_b64
+    )
+    if not username or not password:
+        raise PermissionError("Login failed")
+
+    clinicians: List[User] = (
+        (await session.execute(controller.clinician_by_username_query(username)))
+        .unique()
+        .scalars()
+        .all()
+    )
+    clinician: Optional[User] = controller.only_clinician(clinicians, username)
+
+    # Hashing the password takes tens of milliseconds of CPU, and recording the
+    # attempt publishes an audit message, so neither can block the event loop.
+    if (
+        not await asyncio.to_thread(
+            controller.validate_clinician_login,
+            clinician=clinician,
+            username=username,
+            password=password,
+        )
+        or not clinician
+    ):
+        raise PermissionError("Login failed")
+
+    return controller.clinician_login_details(clinician)
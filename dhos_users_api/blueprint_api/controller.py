@@ -1,24 +1,58 @@
 import base64
-import random
+import hashlib
+import itertools
+import json
 import re
-from datetime import date
-from typing import Any, Dict, List, Optional, Set, Tuple
+import time
+from datetime import date, datetime
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
-from flask import g
-from flask_batteries_included.helpers import schema
+from flask import current_app, g
+from flask_batteries_included.config import is_not_production_environment
+from flask_batteries_included.helpers import generate_uuid
 from flask_batteries_included.helpers.error_handler import (
     DuplicateResourceException,
     EntityNotFoundException,
+    ServiceUnavailableException,
 )
+from flask_batteries_included.helpers.schema import NON_PROD_WHITE_LIST
 from flask_batteries_included.helpers.security.jwt import current_jwt_user
 from flask_batteries_included.sqldb import db
+from marshmallow import ValidationError
 from she_logging import logger
-from sqlalchemy import func, or_
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import lazyload, selectinload
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
 
 from dhos_users_api import roles
-from dhos_users_api.helpers import audit, auth0_authz, publish
+from dhos_users_api.helpers import (
+    audit,
+    auth0_authz,
+    badges,
+    change_feed,
+    change_stream,
+    clinician_cache,
+    publish,
+    replicas,
+    timing,
+)
 from dhos_users_api.models.api_spec import ClinicianCreateRequest
+from dhos_users_api.models.clinician_change import ClinicianChange
+from dhos_users_api.models.product import Product
 from dhos_users_api.models.terms_agreement import TermsAgreement
 from dhos_users_api.models.user import User
 
@@ -28,15 +62,66 @@ FIELDS_NOT_UPDATABLE_BY_SUPER_CLINICIAN = [
     "password_hash",
 ]
 
+# Validation schemas are built once, as building them is far more expensive than
+# using them.
+_clinician_create_request: ClinicianCreateRequest = ClinicianCreateRequest()
+_CLINICIAN_CREATE_FIELDS: FrozenSet[str] = frozenset(
+    {**User.schema()["required"], **User.schema()["optional"]}
+)
+_CLINICIAN_CREATE_LIST_FIELDS: FrozenSet[str] = frozenset(
+    key
+    for key, value_type in User.schema()["optional"].items()
+    if isinstance(value_type, list)
+)
+
+# Loader options for queries returning many clinicians. The relationships are
+# joined eagerly by default, which multiplies each clinician row by its products
+# and terms agreements (and forces a subquery under LIMIT), so list queries
+# either load them with one extra query each or skip them when they aren't used.
+# These, and the statements and helpers below them, are shared with async_controller.
+WITH_RELATIONSHIPS = (
+    selectinload(User.products),
+    selectinload(User.terms_agreement),
+)
+WITHOUT_RELATIONSHIPS = (
+    lazyload(User.products),
+    lazyload(User.terms_agreement),
+)
+
+# Everything a clinician's version is derived from, using only indexed lookups. Built
+# once, as building it takes longer than running it.
+CLINICIAN_VERSION_QUERY = select(
+    User.modified,
+    User.contract_expiry_eod_date,
+    select(func.max(Product.modified))
+    .where(Product.user_id == User.uuid)
+    .scalar_subquery(),
+    select(func.count()).where(Product.user_id == User.uuid).scalar_subquery(),
+    select(func.max(TermsAgreement.modified))
+    .where(TermsAgreement.user_id == User.uuid)
+    .scalar_subquery(),
+    select(func.count()).where(TermsAgreement.user_id == User.uuid).scalar_subquery(),
+).where(User.uuid == bindparam("clinician_id"))
+
+_COMPACT_CLINICIAN_FIELDS: Tuple[str, ...] = (
+    "job_title",
+    "email_address",
+    "first_name",
+    "last_name",
+    "uuid",
+    "created",
+    "created_by",
+    "modified",
+    "modified_by",
+)
+
 
 def create_clinician(
     clinician_details: Dict,
     send_welcome_email: bool = True,
 ) -> Dict:
-    ClinicianCreateRequest().load(clinician_details)
-    # this will validate incoming details and add any missing keys, setting
-    # the values of these to `None`.
-    schema.post(json_in=clinician_details, **User.schema())
+    with timing.phase("validate"):
+        _validate_clinician_create(clinician_details)
     # if trying to set "can_edit_ews" on a clinician then the key
     # will have a value, else will be `None`, as explained above
     can_edit_ews = clinician_details.get("can_edit_ews", False)
@@ -81,7 +166,7 @@ def create_clinician(
                     send_entry_identifier,
                 )
             else:
-                send_entry_identifier = _generate_send_entry_identifier()
+                send_entry_identifier = badges.reserve_send_entry_identifier()
                 clinician_details["send_entry_identifier"] = send_entry_identifier
                 logger.info(
                     "Generated badge number '%s' for new temp SEND clinician",
@@ -100,7 +185,34 @@ def create_clinician(
     clinician: User = _create_and_publish_clinician(
         clinician_details, send_welcome_email=send_welcome_email
     )
-    return clinician.to_dict()
+    with timing.phase("serialise"):
+        return clinician.to_dict()
+
+
+def _validate_clinician_create(clinician_details: Dict) -> None:
+    """
+    Validates a clinician create request in a single pass, then normalises it in place
+    ready for User.new: optional fields that are missing or null are set to None, or
+    to an empty list for list fields.
+    """
+    _clinician_create_request.load(clinician_details)
+
+    for key in clinician_details:
+        if key not in _CLINICIAN_CREATE_FIELDS and not (
+            key in NON_PROD_WHITE_LIST and is_not_production_environment()
+        ):
+            raise KeyError(f"Request body contains unexpected key: {key}")
+
+    # Not part of the request schema, but accepted for compatibility.
+    can_edit_encounter = clinician_details.get("can_edit_encounter")
+    if can_edit_encounter is not None and not isinstance(can_edit_encounter, bool):
+        raise TypeError("value for can_edit_encounter is not of the expected type")
+
+    for key in _CLINICIAN_CREATE_FIELDS:
+        if clinician_details.get(key) is None:
+            clinician_details[key] = (
+                [] if key in _CLINICIAN_CREATE_LIST_FIELDS else None
+            )
 
 
 def ensure_current_user_can_allow_ews_change_permissions(
@@ -127,14 +239,6 @@ def ensure_current_user_can_allow_ews_change_permissions(
         )
 
 
-def _generate_send_entry_identifier() -> str:
-    """Generate a 9-digit badge number prefixed with a '@', and ensure it is not already taken"""
-    while True:
-        identifier: str = "@%0.9d" % random.randint(0, 999_999_999)
-        if User.query.filter_by(send_entry_identifier=identifier).first() is None:
-            return identifier
-
-
 def _create_and_publish_clinician(
     clinician_details: Dict, send_welcome_email: bool = True
 ) -> User:
@@ -143,7 +247,8 @@ def _create_and_publish_clinician(
     clinician_details["last_name"] = clinician_details["last_name"].strip()
 
     # Create and save the clinician object.
-    clinician: User = User.new(**clinician_details)
+    with timing.phase("apply"):
+        clinician: User = User.new(**clinician_details)
     try:
         db.session.commit()
     except IntegrityError:
@@ -163,14 +268,108 @@ def _create_and_publish_clinician(
     return clinician
 
 
-def get_clinician_by_id(clinician_id: str, get_temp_only: bool) -> Dict:
+def get_clinician_by_id(
+    clinician_id: str, get_temp_only: bool, version: Optional[str] = None
+) -> Dict:
+    """
+    If version (from get_clinician_version) is given, a cached clinician of a different
+    version is reloaded, so the clinician returned is at least as new as version.
+    """
+    cache = clinician_cache.get_cache()
+    cached: Dict = cache.get(clinician_id, lambda: _load_clinician(clinician_id))
+    if version is not None and cached["version"] != version:
+        # Changed by another process since it was cached.
+        cache.invalidate([clinician_id])
+        cached = cache.get(clinician_id, lambda: _load_clinician(clinician_id))
+
+    clinician: Dict = cached["clinician"]
+    if get_temp_only and clinician["contract_expiry_eod_date"] is None:
+        raise PermissionError("Insufficient privileges to access clinician")
+
+    return clinician
+
+
+def _load_clinician(clinician_id: str) -> Dict:
     clinician: User = User.query.get(clinician_id)
     if not clinician:
         raise EntityNotFoundException(f"No user found with UUID {clinician_id}")
-    if get_temp_only and clinician.contract_expiry_eod_date is None:
+    return _versioned(clinician)
+
+
+def _versioned(clinician: User) -> Dict:
+    """
+    The form in which clinicians are cached: the full clinician with its version.
+    """
+    return {
+        "version": _clinician_version(
+            modified=clinician.modified,
+            products_modified=max(
+                (p.modified for p in clinician.products), default=None
+            ),
+            product_count=len(clinician.products),
+            terms_modified=max(
+                (t.modified for t in clinician.terms_agreement), default=None
+            ),
+            terms_count=len(clinician.terms_agreement),
+        ),
+        "clinician": clinician.to_dict(),
+    }
+
+
+def _clinician_version(
+    modified: datetime,
+    products_modified: Optional[datetime],
+    product_count: int,
+    terms_modified: Optional[datetime],
+    terms_count: int,
+) -> str:
+    """
+    A tag which changes whenever the clinician, or any of their products or terms
+    agreements, is changed, added or removed.
+    """
+    parts = (modified, products_modified, product_count, terms_modified, terms_count)
+    return hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode(), digest_size=16
+    ).hexdigest()
+
+
+def get_clinician_version(clinician_id: str, get_temp_only: bool) -> str:
+    """
+    Returns the version of a clinician using a single indexed lookup, without loading
+    the clinician. Raises the same errors as get_clinician_by_id.
+    """
+    row = db.session.execute(
+        CLINICIAN_VERSION_QUERY, {"clinician_id": clinician_id}
+    ).one_or_none()
+    return clinician_version_from_row(clinician_id, row, get_temp_only=get_temp_only)
+
+
+def clinician_version_from_row(
+    clinician_id: str, row: Optional[Row], get_temp_only: bool
+) -> str:
+    """
+    The version of a clinician from the result of CLINICIAN_VERSION_QUERY.
+    """
+    if row is None:
+        raise EntityNotFoundException(f"No user found with UUID {clinician_id}")
+    (
+        modified,
+        contract_expiry_eod_date,
+        products_modified,
+        product_count,
+        terms_modified,
+        terms_count,
+    ) = row
+    if get_temp_only and contract_expiry_eod_date is None:
         raise PermissionError("Insufficient privileges to access clinician")
 
-    return clinician.to_dict()
+    return _clinician_version(
+        modified=modified,
+        products_modified=products_modified,
+        product_count=product_count,
+        terms_modified=terms_modified,
+        terms_count=terms_count,
+    )
 
 
 def get_clinician_by_email(email: str) -> Dict:
@@ -194,7 +393,8 @@ def clinician_login(user_auth_string_b64: str) -> Dict:
     if not username or not password:
         raise PermissionError("Login failed")
 
-    clinician: Optional[User] = get_clinician_by_username(username=username)
+    with timing.phase("load"):
+        clinician: Optional[User] = get_clinician_by_username(username=username)
 
     if (
         not validate_clinician_login(
@@ -204,6 +404,10 @@ def clinician_login(user_auth_string_b64: str) -> Dict:
     ):
         raise PermissionError("Login failed")
 
+    return clinician_login_details(clinician)
+
+
+def clinician_login_details(clinician: User) -> Dict:
     clinician_login_details = clinician.to_login_dict()
 
     # Add permissions
@@ -251,30 +455,81 @@ def get_clinician_by_username(username: str) -> Optional[User]:
     :rtype: Clinician
     """
 
-    clinician: User = User.query.filter(
-        or_(
-            User.email_address == username.strip().lower(),
-            User.send_entry_identifier == username,
+    clinicians: List[User] = (
+        db.session.execute(clinician_by_username_query(username))
+        .unique()
+        .scalars()
+        .all()
+    )
+    return only_clinician(clinicians, username)
+
+
+def clinician_by_username_query(username: str) -> Select:
+    # Only need to know whether there is more than one match.
+    return (
+        select(User)
+        .where(
+            or_(
+                User.email_address == username.strip().lower(),
+                User.send_entry_identifier == username,
+            )
         )
-    ).all()
+        .limit(2)
+    )
 
-    if not clinician:
+
+def only_clinician(clinicians: List[User], username: str) -> Optional[User]:
+    if not clinicians:
         logger.error("Clinician not found for username '%s'", username)
         return None
 
-    if len(clinician) > 1:
+    if len(clinicians) > 1:
         logger.error("Multiple clinician's found for username '%s'", username)
         return None
 
-    return clinician[0]
+    return clinicians[0]
 
 
-def deactivate_clinician(clinician_id: str) -> None:
-    clinician = User.query.get(clinician_id)
-    logger.debug("Deactivating clinician %s", clinician_id)
-    clinician.login_active = False
+def expire_temporary_clinicians() -> int:
+    """
+    Deactivates every active clinician whose contract expired before today using a
+    single UPDATE, then publishes update events for them in batches of
+    BULK_CREATE_BATCH_SIZE. Returns the number of clinicians deactivated.
+    """
+    expired_uuids: List[str] = (
+        db.session.execute(
+            update(User)
+            .where(
+                User.login_active.is_(True),
+                User.contract_expiry_eod_date < date.today(),
+            )
+            .values(
+                login_active=False,
+                modified=datetime.utcnow(),
+                modified_by_=current_jwt_user(),
+            )
+            .returning(User.uuid)
+            .execution_options(synchronize_session=False)
+        )
+        .scalars()
+        .all()
+    )
+    change_feed.record_changes(expired_uuids)
     db.session.commit()
-    publish.clinician_update_event(clinician)
+    clinician_cache.get_cache().invalidate(expired_uuids)
+    logger.info("Deactivated %d expired clinicians", len(expired_uuids))
+
+    batch_size: int = current_app.config["BULK_CREATE_BATCH_SIZE"]
+    for start in range(0, len(expired_uuids), batch_size):
+        batch = expired_uuids[start : start + batch_size]
+        publish.clinician_update_events(
+            [
+                publish.fix_dates(c.to_auth_dict())
+                for c in User.query.filter(User.uuid.in_(batch))
+            ]
+        )
+        db.session.expunge_all()
+    return len(expired_uuids)
 
 
 def validate_clinician_login(
@@ -294,7 +549,7 @@ def validate_clinician_login(
     if (clinician.contract_expiry_eod_date is not None) and (
         date.today() > clinician.contract_expiry_eod_date
     ):
-        deactivate_clinician(clinician_id=clinician.uuid)
+        # Expired clinicians are deactivated in bulk by expire_temporary_clinicians.
         audit.record_authentication_failure(
             reason="Login expired",
             event_data={
@@ -337,7 +592,8 @@ def update_clinician_password_by_email(email: str, password: str) -> Dict:
 
 
 def remove_from_clinician(clinician_id: str, clinician_details: Dict) -> Dict:
-    clinician: User = User.query.get(clinician_id)
+    with timing.phase("load"):
+        clinician: User = User.query.get(clinician_id)
     if "groups" in clinician_details and current_jwt_user() == clinician.uuid:
         raise PermissionError("clinician is not allowed to change their own groups")
 
@@ -365,7 +621,8 @@ def remove_from_clinician(clinician_id: str, clinician_details: Dict) -> Dict:
         )
 
     publish.clinician_update_event(clinician)
-    return clinician.to_dict()
+    with timing.phase("serialise"):
+        return clinician.to_dict()
 
 
 def _remove(clinician: User, clinician_details: Dict) -> None:
@@ -380,7 +637,149 @@ def _remove(clinician: User, clinician_details: Dict) -> None:
 def update_clinician(
     clinician_id: str, update_fields: Dict, edit_temp_only: bool
 ) -> Dict:
-    clinician: User = User.query.get(clinician_id)
+    # Commits, Auth0 requests and publishing are timed where they happen.
+    with timing.phase("load"):
+        clinician: User = User.query.get(clinician_id)
+    with timing.phase("validate"):
+        _validate_clinician_update(clinician, update_fields, edit_temp_only)
+    with timing.phase("apply"):
+        login_active = _login_active_change(clinician, update_fields)
+        groups = _apply_clinician_update(clinician, update_fields)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        raise DuplicateResourceException
+
+    if login_active is not None:
+        _publish_login_active_change(
+            clinician_id=clinician.uuid,
+            modified_by=clinician.modified_by_,
+            login_active=login_active,
+        )
+
+    # Update clinician's groups in Auth0.
+    if groups:
+        auth0_authz.add_user_to_authz_groups(
+            user_id=clinician.uuid, groups_to_add_to=groups
+        )
+
+    publish.clinician_update_event(clinician)
+
+    with timing.phase("serialise"):
+        return clinician.to_dict()
+
+
+def update_clinicians_bulk(updates: List[Dict], edit_temp_only: bool) -> Dict:
+    """
+    Applies a list of clinician updates in a single transaction, reporting an outcome
+    for each one. Updates that only set login_active are applied with one UPDATE
+    statement per value (or reported as unchanged if it already has that value); other updates are applied in their own savepoint so that a
+    failing update doesn't affect the rest. Events are published once the transaction
+    has been committed.
+    """
+    clinicians: Dict[str, User] = {
+        c.uuid: c
+        for c in User.query.filter(User.uuid.in_({u["clinician_id"] for u in updates}))
+    }
+    results: List[Dict] = []
+    # (clinician, result, login_active change, groups added) for each update applied.
+    applied: List[Tuple[User, Dict, Optional[bool], List[str]]] = []
+    seen: Set[str] = set()
+    login_active_only: Dict[bool, List[str]] = {True: [], False: []}
+    for item in updates:
+        clinician_id: str = item["clinician_id"]
+        update_fields = dict(item["update"])
+        result: Dict[str, Any] = {"clinician_id": clinician_id, "result": "updated"}
+        results.append(result)
+        clinician = clinicians.get(clinician_id)
+        if clinician is None:
+            result["result"] = "not_found"
+            result["error"] = "Clinician not found"
+            continue
+        if clinician_id in seen:
+            result["result"] = "invalid"
+            result["error"] = "Clinician included more than once"
+            continue
+        seen.add(clinician_id)
+        groups: List[str] = []
+        try:
+            _validate_clinician_update(clinician, update_fields, edit_temp_only)
+            login_active = _login_active_change(clinician, update_fields)
+            if update_fields.keys() == {"login_active"}:
+                if login_active is None:
+                    # Already has that value, so there's nothing to apply or publish.
+                    result["result"] = "unchanged"
+                    continue
+                login_active_only[login_active].append(clinician_id)
+            else:
+                with db.session.begin_nested():
+                    groups = _apply_clinician_update(clinician, update_fields)
+        except PermissionError as e:
+            result["result"] = "forbidden"
+            result["error"] = str(e)
+        except ValueError as e:
+            result["result"] = "invalid"
+            result["error"] = str(e)
+        except IntegrityError:
+            # The database's message includes the clinician's details, so it is
+            # only logged.
+            logger.exception("Failed to update clinician %s", clinician_id)
+            result["result"] = "duplicate"
+            result["error"] = "Email address already in use"
+        else:
+            applied.append((clinician, result, login_active, groups))
+
+    modified_by = current_jwt_user()
+    for login_active, clinician_ids in login_active_only.items():
+        if clinician_ids:
+            User.query.filter(User.uuid.in_(clinician_ids)).update(
+                {
+                    User.login_active: login_active,
+                    User.modified: datetime.utcnow(),
+                    User.modified_by_: modified_by,
+                },
+                synchronize_session="evaluate",
+            )
+            change_feed.record_changes(clinician_ids)
+
+    # Build the event bodies before committing, as committing expires every clinician.
+    message_bodies: List[Dict] = [
+        publish.fix_dates(clinician.to_auth_dict()) for clinician, *_ in applied
+    ]
+    db.session.commit()
+    # The login_active updates above aren't tracked by the session.
+    clinician_cache.get_cache().invalidate(
+        itertools.chain.from_iterable(login_active_only.values())
+    )
+
+    for _, result, login_active, groups in applied:
+        clinician_id = result["clinician_id"]
+        if login_active is not None:
+            _publish_login_active_change(
+                clinician_id=clinician_id,
+                modified_by=modified_by,
+                login_active=login_active,
+            )
+        if groups:
+            try:
+                auth0_authz.add_user_to_authz_groups(
+                    user_id=clinician_id, groups_to_add_to=groups
+                )
+            except ServiceUnavailableException:
+                result["error"] = "Clinician updated, but groups not updated in Auth0"
+    publish.clinician_update_events(message_bodies)
+
+    logger.info("Updated %d of %d clinicians in bulk", len(applied), len(updates))
+    return {"updated": len(applied), "results": results}
+
+
+def _validate_clinician_update(
+    clinician: User, update_fields: Dict, edit_temp_only: bool
+) -> None:
+    """
+    Checks the current user is allowed to make the update to the clinician, and
+    normalises the fields to be updated in place.
+    """
     # These variables could be populated later by passing through request context info
     # prevent those with "_temp" access updating permanent users
     is_permanent_clinician = clinician.contract_expiry_eod_date is None or (
@@ -426,10 +825,6 @@ def update_clinician(
         update_fields=update_fields,
     )
 
-    # If login_active altered log change
-    login_active = update_fields.get("login_active", None)
-    if login_active == clinician.login_active:
-        login_active = None
     # user has been changed from temporary to permanent
     if (
         "contract_expiry_eod_date" in update_fields
@@ -445,6 +840,21 @@ def update_clinician(
     if update_fields.get("last_name"):
         update_fields["last_name"] = update_fields["last_name"].strip()
 
+
+def _login_active_change(clinician: User, update_fields: Dict) -> Optional[bool]:
+    """
+    Returns the new value of login_active if the update changes it, otherwise None.
+    """
+    login_active = update_fields.get("login_active", None)
+    if login_active == clinician.login_active:
+        return None
+    return login_active
+
+
+def _apply_clinician_update(clinician: User, update_fields: Dict) -> List[str]:
+    """
+    Applies the update to the clinician, returning any groups it was added to.
+    """
     groups = update_fields.pop("groups", [])
     clinician.groups = sorted(set(clinician.groups + groups))
     locations = update_fields.pop("locations", [])
@@ -457,28 +867,15 @@ def update_clinician(
     )
 
     clinician.update(**update_fields)
-    try:
-        db.session.commit()
-    except IntegrityError:
-        raise DuplicateResourceException
-
-    if login_active is not None:
-        event_type = "login activated" if login_active else "login deactivated"
-        event_data = {
-            "clinician_id": clinician.uuid,
-            "modified_by": clinician.modified_by_,
-        }
-        publish.audit_message(event_type=event_type, event_data=event_data)
-
-    # Update clinician's groups in Auth0.
-    if groups:
-        auth0_authz.add_user_to_authz_groups(
-            user_id=clinician.uuid, groups_to_add_to=groups
-        )
+    return groups
 
-    publish.clinician_update_event(clinician)
 
-    return clinician.to_dict()
+def _publish_login_active_change(
+    clinician_id: str, modified_by: str, login_active: bool
+) -> None:
+    event_type = "login activated" if login_active else "login deactivated"
+    event_data = {"clinician_id": clinician_id, "modified_by": modified_by}
+    publish.audit_message(event_type=event_type, event_data=event_data)
 
 
 def _check_temp_edit_permissions(
@@ -505,60 +902,87 @@ def get_clinicians(
     sort: Optional[List[str]] = None,
     order: Optional[str] = None,
 ) -> Tuple[List[Dict], int]:
-    query = User.query
+    query = User.query.filter(
+        *clinician_search_filters(
+            login_active=login_active,
+            product_name=product_name,
+            temp_only=temp_only,
+            modified_since=modified_since,
+            q=q,
+        )
+    )
+
+    total = query.count()
+
+    if sort:
+        query = query.order_by(*clinician_search_order(sort, order))
+
+    if offset:
+        query = query.offset(offset)
+
+    if limit:
+        query = query.limit(limit)
+
+    results = query.options(
+        *(WITH_RELATIONSHIPS if expanded else WITHOUT_RELATIONSHIPS)
+    ).all()
+
+    return [
+        clinician_search_result(c, compact=compact, expanded=expanded) for c in results
+    ], total
+
+
+def clinician_search_filters(
+    login_active: Optional[bool],
+    product_name: Optional[str],
+    temp_only: bool,
+    modified_since: Optional[str],
+    q: Optional[str],
+) -> List[ColumnElement]:
+    filters: List[ColumnElement] = []
     if product_name is not None:
-        query = query.filter(User.products.any(product_name=product_name))
+        filters.append(User.products.any(product_name=product_name))
 
     if login_active is not None:
-        query = query.filter(User.login_active == login_active)
+        filters.append(User.login_active == login_active)
 
     if temp_only:
-        query = query.filter(User.contract_expiry_eod_date.is_not(None))
+        filters.append(User.contract_expiry_eod_date.is_not(None))
 
     if modified_since:
-        query = query.filter(User.modified > modified_since)
+        filters.append(User.modified > modified_since)
 
     if q:
-        query = query.filter(
+        filters.append(
             or_(
                 (User.last_name + " " + User.first_name).ilike(f"%{q}%"),
                 func.array_to_string(User.groups, " ").ilike(f"%{q}%"),
                 User.send_entry_identifier == q,
             )
         )
+    return filters
 
-    total = query.count()
 
-    if sort:
-        if order == "desc":
-            query = query.order_by(*[getattr(User, s).desc() for s in sort])
-        else:
-            query = query.order_by(*[getattr(User, s).asc() for s in sort])
+def clinician_search_order(sort: List[str], order: Optional[str]) -> List[Any]:
+    if order == "desc":
+        return [getattr(User, s).desc() for s in sort]
+    return [getattr(User, s).asc() for s in sort]
 
-    if offset:
-        query = query.offset(offset)
-
-    if limit:
-        query = query.limit(limit)
 
-    results = query.all()
-
-    clinicians: List[Dict] = []
-    for c in results:
-        data = {
-            "send_entry_identifier": c.send_entry_identifier,
-            "contract_expiry_eod_date": c.contract_expiry_eod_date,
-            "groups": c.groups,
-            "login_active": c.login_active,
-        }
-        if expanded:
-            data.update(c.to_dict())
-        else:
-            data.update(c.to_compact_dict())
-            if not compact:
-                data["locations"] = c.locations
-        clinicians.append(data)
-    return clinicians, total
+def clinician_search_result(clinician: User, compact: bool, expanded: bool) -> Dict:
+    data = {
+        "send_entry_identifier": clinician.send_entry_identifier,
+        "contract_expiry_eod_date": clinician.contract_expiry_eod_date,
+        "groups": clinician.groups,
+        "login_active": clinician.login_active,
+    }
+    if expanded:
+        data.update(clinician.to_dict())
+    else:
+        data.update(clinician.to_compact_dict())
+        if not compact:
+            data["locations"] = clinician.locations
+    return data
 
 
 def get_clinicians_by_uuids(
@@ -569,19 +993,32 @@ def get_clinicians_by_uuids(
     logger.debug("Retrieving clinicians: %s", uuids)
     unique_uuids: Set[str] = set(uuids)
 
-    results: List[User] = User.query.filter(User.uuid.in_(uuids)).all()
+    # Compact clinicians are loaded without their products and terms agreements, so
+    # can be cut down from cached clinicians but aren't cached themselves.
+    clinicians: Dict[str, Dict] = {
+        uuid: cached["clinician"]
+        for uuid, cached in clinician_cache.get_cache()
+        .get_many(
+            unique_uuids,
+            _load_compact_clinicians if compact else _load_clinicians,
+            backfill=not compact,
+        )
+        .items()
+    }
 
-    logger.info("Retrieved %d clinicians from database", len(results))
+    logger.info("Retrieved %d clinicians", len(clinicians))
 
     # Create map of clinicians
     clinician_map: Dict[str, Optional[Dict]] = {}
     if compact:
-        clinician_map.update({c.uuid: c.to_compact_dict() for c in results})
+        clinician_map.update(
+            {uuid: _compact_clinician(c) for uuid, c in clinicians.items()}
+        )
     else:
-        clinician_map.update({c.uuid: c.to_dict() for c in results})
+        clinician_map.update(clinicians)
 
     # If any UUIDs weren't found in the database, add empty values to the map for each.
-    missing_uuids: Set[str] = unique_uuids - set([c.uuid for c in results])
+    missing_uuids: Set[str] = unique_uuids - clinicians.keys()
     if missing_uuids:
         logger.info(
             "Could not retrieve %d clinicians from database", len(missing_uuids)
@@ -592,10 +1029,142 @@ def get_clinicians_by_uuids(
     return clinician_map
 
 
+def _load_clinicians(uuids: Set[str]) -> Dict[str, Dict]:
+    # These are cached, so are read from the primary even if the request is being
+    # served by a replica, which may be out of date.
+    with replicas.primary_session() as session:
+        results: List[User] = (
+            session.query(User)
+            .filter(User.uuid.in_(uuids))
+            .options(*WITH_RELATIONSHIPS)
+            .all()
+        )
+        logger.info("Retrieved %d clinicians from database", len(results))
+        return {c.uuid: _versioned(c) for c in results}
+
+
+def _load_compact_clinicians(uuids: Set[str]) -> Dict[str, Dict]:
+    results: List[User] = (
+        User.query.filter(User.uuid.in_(uuids)).options(*WITHOUT_RELATIONSHIPS).all()
+    )
+    logger.info("Retrieved %d compact clinicians from database", len(results))
+    return {c.uuid: {"clinician": c.to_compact_dict()} for c in results}
+
+
+def _compact_clinician(clinician: Dict) -> Dict:
+    """
+    Cut a clinician from User.to_dict() down to the fields of User.to_compact_dict().
+    """
+    return {k: clinician[k] for k in _COMPACT_CLINICIAN_FIELDS}
+
+
+def get_clinician_changes(since: int, limit: int) -> Dict[str, Any]:
+    """
+    Gets up to limit changes to clinicians made after the change numbered since, in
+    order, each with the clinician's current details (None if it no longer exists).
+    """
+    changes: List[ClinicianChange] = (
+        ClinicianChange.query.filter(ClinicianChange.sequence > since)
+        .order_by(ClinicianChange.sequence)
+        .limit(limit + 1)
+        .all()
+    )
+    more = len(changes) > limit
+    changes = changes[:limit]
+    # Loaded from the database, not the cache, using the same session as the changes,
+    # so a clinician is never older than the changes it's returned with.
+    results: List[User] = (
+        User.query.filter(User.uuid.in_({c.clinician_id for c in changes}))
+        .options(*WITH_RELATIONSHIPS)
+        .all()
+        if changes
+        else []
+    )
+    clinicians: Dict[str, Dict] = {c.uuid: c.to_dict() for c in results}
+    logger.debug("Retrieved %d clinician changes after %d", len(changes), since)
+    return {
+        "changes": [
+            {
+                **change.to_dict(),
+                "clinician": clinicians.get(change.clinician_id),
+            }
+            for change in changes
+        ],
+        "next_since": changes[-1].sequence if changes else since,
+        "more": more,
+    }
+
+
+def subscribe_to_clinician_changes(
+    since: Optional[int],
+) -> Tuple[int, change_stream.Subscription]:
+    """
+    Subscribes to changes to clinicians for stream_clinician_changes, returning the
+    number of the change to stream from (the latest change if since is None) and the
+    subscription. Raises ServiceUnavailableException if there are too many
+    subscribers, so must be called before the response is started.
+    """
+    if since is None:
+        since = db.session.execute(
+            select(func.coalesce(func.max(ClinicianChange.sequence), 0))
+        ).scalar_one()
+    # Subscribe before catching up, so no change is missed in between.
+    return since, change_stream.get_notifier().subscribe()
+
+
+def stream_clinician_changes(
+    since: int, subscription: change_stream.Subscription
+) -> Generator[Optional[Dict], None, None]:
+    """
+    Yields the UUIDs of changed clinicians: first any changes made after the change
+    numbered since, then new changes as they're committed. Yields None if there's
+    been no change for CLINICIAN_CHANGE_STREAM_HEARTBEAT_SECONDS. Ends after
+    CLINICIAN_CHANGE_STREAM_MAX_SECONDS, or if the caller falls too far behind.
+    Unsubscribes subscription (from subscribe_to_clinician_changes) once it ends.
+    """
+    deadline = (
+        time.monotonic() + current_app.config["CLINICIAN_CHANGE_STREAM_MAX_SECONDS"]
+    )
+    notifier = change_stream.get_notifier()
+    try:
+        while True:
+            changes = db.session.execute(
+                select(ClinicianChange.sequence, ClinicianChange.clinician_id)
+                .where(ClinicianChange.sequence > since)
+                .order_by(ClinicianChange.sequence)
+                .limit(notifier.buffer_size)
+            ).all()
+            for sequence, clinician_id in changes:
+                yield {"sequence": sequence, "clinician_id": clinician_id}
+                since = sequence
+            if len(changes) < notifier.buffer_size:
+                break
+        # Don't hold a database connection for the rest of the stream.
+        db.session.close()
+
+        for change in subscription.changes(
+            after=since,
+            deadline=deadline,
+            heartbeat=current_app.config["CLINICIAN_CHANGE_STREAM_HEARTBEAT_SECONDS"],
+        ):
+            yield (
+                None
+                if change is None
+                else {
+                    "sequence": change[0],
+                    "clinician_id": change[1],
+                }
+            )
+    finally:
+        notifier.unsubscribe(subscription)
+
+
 def get_clinicians_at_location(location_uuid: str) -> List[Dict[str, Any]]:
-    results: List[User] = User.query.filter(
-        User.locations.contains([location_uuid])
-    ).all()
+    results: List[User] = (
+        User.query.filter(User.locations.contains([location_uuid]))
+        .options(*WITH_RELATIONSHIPS)
+        .all()
+    )
 
     return [clinician.to_dict() for clinician in results]
 
@@ -629,17 +1198,188 @@ def remove_clinician_patient_bookmark(clinician_id: str, patient_id: str) -> Non
 
 
 def create_clinicians_bulk(clinician_details: List[Dict]) -> Dict:
-    logger.info("Adding %d clinicians in bulk", len(clinician_details))
+    """
+    Inserts clinicians (with their products and terms agreements) using bulk inserts,
+    committing every BULK_CREATE_BATCH_SIZE clinicians. A batch that fails is rolled
+    back and reported (without the database's error, which is logged), and the
+    remaining batches are still attempted.
+    """
+    batch_size: int = current_app.config["BULK_CREATE_BATCH_SIZE"]
+    logger.info(
+        "Adding %d clinicians in bulk (batch size %d)",
+        len(clinician_details),
+        batch_size,
+    )
+    created = 0
+    batches: List[Dict] = []
+    for start in range(0, len(clinician_details), batch_size):
+        batch = clinician_details[start : start + batch_size]
+        batch_report: Dict[str, Any] = {"batch": len(batches), "created": 0}
+        try:
+            _bulk_insert_clinicians(batch)
+            db.session.commit()
+        except SQLAlchemyError:
+            # The database's message can include other clinicians' details, so it
+            # is only logged.
+            db.session.rollback()
+            logger.exception("Failed to add clinician batch %d", batch_report["batch"])
+            batch_report["error"] = f"Failed to add clinician batch {len(batches)}"
+        else:
+            batch_report["created"] = len(batch)
+            created += len(batch)
+        batches.append(batch_report)
+    return {"created": created, "batches": batches}
+
+
+def _bulk_insert_clinicians(clinician_details: List[Dict]) -> None:
+    """
+    Adds clinicians, products and terms agreements to the session as three bulk
+    inserts, bypassing the ORM unit of work.
+    """
+    users: List[Dict] = []
+    products: List[Dict] = []
+    terms_agreements: List[Dict] = []
+    # Reserve badge numbers for all the temporary SEND clinicians without one at once.
+    generated_badges: Iterator[str] = iter(
+        badges.reserve_send_entry_identifiers(
+            sum(_needs_generated_badge(d) for d in clinician_details)
+        )
+    )
     for details in clinician_details:
-        logger.info("Adding clinician %s", details["uuid"])
-        terms_agreements = details.pop("terms_agreements", [])
-        user_uuid = details.pop("uuid")
-        products = details.pop("products")
-        User.new(uuid=user_uuid, products=products, **details)
-        for terms_agreement in terms_agreements:
-            TermsAgreement.new(user_id=user_uuid, **terms_agreement)
-    db.session.commit()
-    return {"created": len(clinician_details)}
+        user = {
+            k: v
+            for k, v in details.items()
+            if k not in ("products", "terms_agreements")
+        }
+        if _needs_generated_badge(details):
+            user["send_entry_identifier"] = next(generated_badges)
+        for identifier_field in ("created_by", "modified_by"):
+            if identifier_field in user:
+                user[f"{identifier_field}_"] = user.pop(identifier_field)
+        users.append(user)
+        products.extend(
+            {"uuid": generate_uuid(), **p, "user_id": user["uuid"]}
+            for p in details["products"]
+        )
+        terms_agreements.extend(
+            {
+                "uuid": generate_uuid(),
+                **TermsAgreement.with_default_timestamps(ta),
+                "user_id": user["uuid"],
+            }
+            for ta in details.get("terms_agreements", [])
+        )
+    db.session.bulk_insert_mappings(User, users)
+    db.session.bulk_insert_mappings(Product, products)
+    db.session.bulk_insert_mappings(TermsAgreement, terms_agreements)
+    change_feed.record_changes(u["uuid"] for u in users)
+
+
+def _needs_generated_badge(clinician_details: Dict) -> bool:
+    return (
+        clinician_details.get("contract_expiry_eod_date") is not None
+        and not clinician_details.get("send_entry_identifier")
+        and any(p["product_name"] == "SEND" for p in clinician_details["products"])
+    )
+
+
+def import_clinicians(lines: Iterable[bytes]) -> Iterator[Dict]:
+    """
+    Imports clinicians from NDJSON lines, one clinician per line. Each record is
+    validated individually, and valid records are inserted and committed in chunks
+    of BULK_CREATE_BATCH_SIZE. Yields a result for every record (created, duplicate
+    or invalid), followed by a summary. Records already present (matched by uuid or
+    email address) are reported as duplicates, so an interrupted import can be rerun.
+    """
+    batch_size: int = current_app.config["BULK_CREATE_BATCH_SIZE"]
+    summary: Dict[str, int] = {"created": 0, "duplicate": 0, "invalid": 0}
+    chunk: List[Tuple[int, Dict]] = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            details = json.loads(line)
+            _clinician_create_request.load(details)
+        except (ValueError, ValidationError) as e:
+            result: Dict[str, Any] = {
+                "line": line_number,
+                "result": "invalid",
+                "error": e.messages if isinstance(e, ValidationError) else str(e),
+            }
+            summary["invalid"] += 1
+            yield result
+            continue
+        details.setdefault("uuid", generate_uuid())
+        chunk.append((line_number, details))
+        if len(chunk) >= batch_size:
+            yield from _import_clinician_chunk(chunk, summary)
+            chunk = []
+    if chunk:
+        yield from _import_clinician_chunk(chunk, summary)
+    logger.info("Imported clinicians: %s", summary)
+    yield {"summary": summary}
+
+
+def _import_clinician_chunk(
+    chunk: List[Tuple[int, Dict]], summary: Dict[str, int]
+) -> Iterator[Dict]:
+    uuids = {details["uuid"] for _, details in chunk}
+    emails = {
+        details["email_address"].lower()
+        for _, details in chunk
+        if details.get("email_address")
+    }
+    existing = db.session.query(User.uuid, User.email_address).filter(
+        or_(User.uuid.in_(uuids), func.lower(User.email_address).in_(emails))
+    )
+    seen_uuids: Set[str] = set()
+    seen_emails: Set[str] = set()
+    for user_uuid, email_address in existing:
+        seen_uuids.add(user_uuid)
+        if email_address:
+            seen_emails.add(email_address.lower())
+
+    results: List[Dict] = []
+    to_insert: List[Tuple[Dict, Dict]] = []
+    for line_number, details in chunk:
+        result: Dict[str, Any] = {"line": line_number, "uuid": details["uuid"]}
+        email_address = (details.get("email_address") or "").lower()
+        if details["uuid"] in seen_uuids or email_address in seen_emails:
+            result["result"] = "duplicate"
+        else:
+            seen_uuids.add(details["uuid"])
+            if email_address:
+                seen_emails.add(email_address)
+            to_insert.append((result, details))
+        results.append(result)
+
+    try:
+        _bulk_insert_clinicians([details for _, details in to_insert])
+        db.session.commit()
+    except IntegrityError:
+        # Something we couldn't see up front (e.g. a concurrent write) conflicted.
+        # Retry the chunk one record at a time so only the offending records fail.
+        db.session.rollback()
+        logger.warning("Clinician import chunk failed, retrying record by record")
+        for result, details in to_insert:
+            try:
+                with db.session.begin_nested():
+                    _bulk_insert_clinicians([details])
+            except IntegrityError:
+                # The database's message includes the clinician's details, so it is
+                # only logged.
+                logger.exception(
+                    "Failed to import clinician on line %d", result["line"]
+                )
+                result["result"] = "duplicate"
+                result["error"] = "Clinician UUID or email address already in use"
+        db.session.commit()
+    for result, _ in to_insert:
+        result.setdefault("result", "created")
+
+    for result in results:
+        summary[result["result"]] += 1
+        yield result
 
 
 def get_roles() -> Dict[str, list[str]]:
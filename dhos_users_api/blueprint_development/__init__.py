@@ -1,10 +1,12 @@
 import time
 
 from flask import Blueprint, Response, current_app, jsonify
+from flask_batteries_included.helpers.error_handler import EntityNotFoundException
 from flask_batteries_included.helpers.security import protected_route
 from flask_batteries_included.helpers.security.endpoint_security import key_present
 
 from dhos_users_api.blueprint_development.controller import reset_database
+from dhos_users_api.helpers import profiling
 
 development_blueprint = Blueprint("dhos/dev", __name__)
 
@@ -20,3 +22,16 @@ def drop_data_route() -> Response:
     total_time = time.time() - start
 
     return jsonify({"complete": True, "time_taken": str(total_time) + "s"})
+
+
+@development_blueprint.route("/profiles/<profile_id>", methods=["GET"])
+@protected_route(key_present("system_id"))
+def get_profile_route(profile_id: str) -> Response:
+    """
+    Returns a request profile (see helpers/profiling) as collapsed stacks. Profiles
+    are kept by the worker that served the request, so this may need retrying.
+    """
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise EntityNotFoundException(f"Profile {profile_id} not found")
+    return Response(profile, mimetype="text/plain")
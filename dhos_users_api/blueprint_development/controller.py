@@ -3,6 +3,8 @@
 from flask_batteries_included.sqldb import db
 from she_logging.logging import logger
 
+from dhos_users_api.helpers import clinician_cache
+from dhos_users_api.models.clinician_change import ClinicianChange
 from dhos_users_api.models.product import Product
 from dhos_users_api.models.terms_agreement import TermsAgreement
 from dhos_users_api.models.user import User
@@ -11,9 +13,10 @@ from dhos_users_api.models.user import User
 def reset_database() -> None:
     """Drops SQL data"""
     try:
-        for model in (Product, TermsAgreement, User):
+        for model in (Product, TermsAgreement, User, ClinicianChange):
             db.session.query(model).delete()
         db.session.commit()
+        clinician_cache.get_cache().clear()
     except Exception:
         logger.exception("Drop SQL data failed")
         db.session.rollback()
@@ -0,0 +1,210 @@
+"""
+Generates a large, realistic directory of clinicians, so that queries can be
+benchmarked and EXPLAINed against production-like cardinalities.
+
+Real directories are skewed rather than uniform: a few large hospitals hold most of
+the clinicians, most clinicians are SEND clinicians, and a handful of surnames are
+very common. The distributions below approximate that. The same seed always
+generates the same clinicians.
+"""
+
+import itertools
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import text
+
+from dhos_users_api.blueprint_api import controller
+
+CREATED_BY = "synthetic-data"
+
+# Relative frequencies of each set of groups.
+GROUPS: Dict[Tuple[str, ...], int] = {
+    ("SEND Clinician",): 600,
+    ("SEND Superclinician",): 80,
+    ("SEND Clinician", "SEND Administrator"): 20,
+    ("SEND Entry Clinician",): 60,
+    ("GDM Clinician",): 120,
+    ("GDM Superclinician",): 40,
+    ("GDM Clinician", "GDM Administrator"): 10,
+    ("DBM Clinician",): 50,
+    ("DBM Superclinician",): 10,
+    ("SEND Clinician", "GDM Clinician"): 10,
+}
+
+# How many locations a clinician works at: nearly always one or two.
+LOCATION_COUNTS = {1: 70, 2: 20, 3: 7, 5: 2, 20: 1}
+
+JOB_TITLES = {"Nurse": 50, "Doctor": 20, "Midwife": 15, "Healthcare Assistant": 10}
+
+# fmt: off
+FIRST_NAMES = [
+    "Oliver", "Amelia", "George", "Olivia", "Harry", "Isla", "Jack", "Ava", "Jacob",
+    "Emily", "Noah", "Sophia", "Charlie", "Grace", "Muhammad", "Mia", "Thomas",
+    "Poppy", "Oscar", "Ella", "William", "Lily", "James", "Evie", "Henry", "Isabella",
+    "Leo", "Charlotte", "Alfie", "Jessica", "Joshua", "Daisy", "Freddie", "Sophie",
+    "Archie", "Alice", "Ethan", "Chloe", "Isaac", "Ruby",
+]
+_SURNAME_STARTS = [
+    "Ash", "Bar", "Black", "Brad", "Brook", "Chap", "Clark", "Cook", "Craw", "Dal",
+    "Ed", "Fair", "Fox", "Gold", "Green", "Hal", "Hard", "Hart", "Hol", "King",
+    "Lang", "Lock", "Mar", "Mil", "Mor", "New", "North", "Park", "Red", "Rich",
+    "Shel", "Stan", "Ston", "Thorn", "Wake", "Whit", "Wil", "Wood",
+]
+_SURNAME_ENDS = [
+    "ley", "ton", "man", "field", "wood", "by", "ford", "well", "son", "er", "ham",
+    "more", "ridge", "worth", "combe", "stead",
+]
+# fmt: on
+SURNAMES = [start + end for start in _SURNAME_STARTS for end in _SURNAME_ENDS]
+
+PRODUCT_VERSIONS = {"SEND": 4, "GDM": 6, "DBM": 3}
+
+_NOW = datetime(2021, 7, 19, tzinfo=timezone.utc)
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return list(itertools.accumulate(1 / (rank**s) for rank in range(1, n + 1)))
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class SyntheticClinicians:
+    """
+    Generates clinicians as details accepted by controller.create_clinicians_bulk.
+    """
+
+    def __init__(self, locations: int, seed: int) -> None:
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self.locations = [_uuid(self._rng) for _ in range(locations)]
+        # Shuffled, so the most common surnames don't all start the same way.
+        self._surnames = self._rng.sample(SURNAMES, len(SURNAMES))
+        # Cumulative weights, so random.choices doesn't recompute them every time.
+        self._location_weights = _zipf_weights(locations)
+        self._surname_weights = _zipf_weights(len(SURNAMES), s=0.8)
+        self._first_name_weights = _zipf_weights(len(FIRST_NAMES), s=0.8)
+
+    def _choice(self, weights: Dict[Any, int]) -> Any:
+        return self._rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _locations(self) -> List[str]:
+        count = min(self._choice(LOCATION_COUNTS), len(self.locations))
+        chosen: Dict[str, None] = {}
+        while len(chosen) < count:
+            (location,) = self._rng.choices(
+                self.locations, cum_weights=self._location_weights
+            )
+            chosen[location] = None
+        return list(chosen)
+
+    def _terms_agreements(
+        self, product_name: str, joined: datetime
+    ) -> List[Dict[str, Any]]:
+        # One agreement for each version accepted since the clinician joined.
+        rng = self._rng
+        latest = PRODUCT_VERSIONS[product_name]
+        first = rng.randint(max(1, latest - (_NOW - joined).days // 365), latest)
+        if rng.random() < 0.1:
+            # Some clinicians haven't logged in since the latest version.
+            latest = max(first, latest - 1)
+        return [
+            {
+                "uuid": _uuid(rng),
+                "created": joined,
+                "created_by_": CREATED_BY,
+                "modified": joined,
+                "modified_by_": CREATED_BY,
+                "product_name": product_name,
+                "version": version,
+                "accepted_timestamp": joined,
+                "tou_version": version,
+                "tou_accepted_timestamp": joined,
+            }
+            for version in range(first, latest + 1)
+        ]
+
+    def clinician(self, i: int) -> Dict[str, Any]:
+        rng = self._rng
+        groups = list(self._choice(GROUPS))
+        product_names = sorted({group.split(" ")[0] for group in groups})
+        joined = _NOW - timedelta(days=rng.randint(0, 5 * 365))
+        modified = joined + timedelta(days=rng.randint(0, (_NOW - joined).days))
+        first_name = rng.choices(FIRST_NAMES, cum_weights=self._first_name_weights)[0]
+        last_name = rng.choices(self._surnames, cum_weights=self._surname_weights)[0]
+        email_address = f"{first_name}.{last_name}.{self._seed}.{i}@example.com"
+        temporary = "SEND" in product_names and rng.random() < 0.05
+        return {
+            "uuid": _uuid(rng),
+            "created": joined,
+            "created_by": CREATED_BY,
+            "modified": modified,
+            "modified_by": CREATED_BY,
+            "first_name": first_name,
+            "last_name": last_name,
+            "job_title": self._choice(JOB_TITLES),
+            "phone_number": f"0{rng.randint(1_000_000_000, 9_999_999_999)}",
+            "email_address": email_address.lower(),
+            "nhs_smartcard_number": str(rng.randint(100_000_000_000, 999_999_999_999)),
+            # Temporary clinicians without one are given a generated badge number.
+            "send_entry_identifier": (
+                None if temporary else str(rng.randint(10_000_000, 99_999_999))
+            ),
+            "contract_expiry_eod_date": (
+                (_NOW + timedelta(days=rng.randint(-90, 180))).date()
+                if temporary
+                else None
+            ),
+            "can_edit_ews": "SEND Superclinician" in groups,
+            "login_active": rng.random() < 0.93,
+            "groups": groups,
+            "locations": self._locations(),
+            "bookmarks": [],
+            "bookmarked_patients": [],
+            "products": [
+                {
+                    "created": joined,
+                    "created_by_": CREATED_BY,
+                    "modified": joined,
+                    "modified_by_": CREATED_BY,
+                    "product_name": product_name,
+                    "opened_date": joined.date(),
+                }
+                for product_name in product_names
+            ],
+            "terms_agreements": [
+                agreement
+                for product_name in product_names
+                for agreement in self._terms_agreements(product_name, joined)
+            ],
+        }
+
+    def generate(self, count: int) -> Iterator[Dict[str, Any]]:
+        return (self.clinician(i) for i in range(count))
+
+
+def _chunks(items: Iterator[Dict], size: int) -> Iterator[Sequence[Dict]]:
+    while chunk := list(itertools.islice(items, size)):
+        yield chunk
+
+
+def create_synthetic_clinicians(
+    count: int, locations: int, seed: int, chunk_size: int = 10_000
+) -> Iterator[Dict[str, Any]]:
+    """
+    Inserts count synthetic clinicians with the bulk create path, chunk_size at a
+    time so the whole directory is never held in memory. Yields the result of
+    controller.create_clinicians_bulk for each chunk, including any failed batches.
+    The tables are analyzed afterwards, so query plans reflect the new data straight
+    away.
+    """
+    generator = SyntheticClinicians(locations=locations, seed=seed)
+    for chunk in _chunks(generator.generate(count), chunk_size):
+        yield controller.create_clinicians_bulk(list(chunk))
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from environs import Env
 from flask import Flask
 
@@ -5,6 +7,57 @@ from flask import Flask
 class Configuration:
     env = Env()
     DISABLE_CREATE_USER_IN_AUTH0: bool = env.bool("DISABLE_CREATE_USER_IN_AUTH0", False)
+    BULK_CREATE_BATCH_SIZE: int = env.int("BULK_CREATE_BATCH_SIZE", 1000)
+    ROLE_MAPPING_FILE: Optional[str] = env.str("ROLE_MAPPING_FILE", None)
+    ROLE_MAPPING_RELOAD_INTERVAL: int = env.int("ROLE_MAPPING_RELOAD_INTERVAL", 5)
+    PROFILE_STARTUP: bool = env.bool("PROFILE_STARTUP", False)
+    SQLALCHEMY_POOL_SIZE: int = env.int("SQLALCHEMY_POOL_SIZE", 2)
+    SQLALCHEMY_MAX_OVERFLOW: int = env.int("SQLALCHEMY_MAX_OVERFLOW", 0)
+    SQLALCHEMY_POOL_TIMEOUT: float = env.float("SQLALCHEMY_POOL_TIMEOUT", 5)
+    SQLALCHEMY_POOL_RECYCLE: int = env.int("SQLALCHEMY_POOL_RECYCLE", 600)
+    SQLALCHEMY_POOL_PRE_PING: bool = env.bool("SQLALCHEMY_POOL_PRE_PING", True)
+    ASYNC_SQLALCHEMY_POOL_SIZE: int = env.int("ASYNC_SQLALCHEMY_POOL_SIZE", 20)
+    DATABASE_STATEMENT_TIMEOUT_MS: int = env.int("DATABASE_STATEMENT_TIMEOUT_MS", 30000)
+    CLINICIAN_SEARCH_STATEMENT_TIMEOUT_MS: int = env.int(
+        "CLINICIAN_SEARCH_STATEMENT_TIMEOUT_MS", 5000
+    )
+    DATABASE_REPLICA_HOSTS: List[str] = env.list("DATABASE_REPLICA_HOSTS", [])
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = env.float(
+        "DATABASE_REPLICA_MAX_LAG_SECONDS", 5
+    )
+    DATABASE_REPLICA_LAG_CHECK_INTERVAL: float = env.float(
+        "DATABASE_REPLICA_LAG_CHECK_INTERVAL", 5
+    )
+    DATABASE_REPLICA_STICKY_SECONDS: float = env.float(
+        "DATABASE_REPLICA_STICKY_SECONDS", 10
+    )
+    CLINICIAN_CACHE_SIZE: int = env.int("CLINICIAN_CACHE_SIZE", 10000)
+    CLINICIAN_CACHE_TTL_SECONDS: float = env.float("CLINICIAN_CACHE_TTL_SECONDS", 10)
+    CLINICIAN_CACHE_REDIS_URL: Optional[str] = env.str(
+        "CLINICIAN_CACHE_REDIS_URL", None
+    )
+    CLINICIAN_CACHE_SHARED_TTL_SECONDS: int = env.int(
+        "CLINICIAN_CACHE_SHARED_TTL_SECONDS", 300
+    )
+    CLINICIAN_CHANGE_STREAM_MAX_SUBSCRIBERS: int = env.int(
+        "CLINICIAN_CHANGE_STREAM_MAX_SUBSCRIBERS", 2
+    )
+    CLINICIAN_CHANGE_STREAM_BUFFER_SIZE: int = env.int(
+        "CLINICIAN_CHANGE_STREAM_BUFFER_SIZE", 1000
+    )
+    CLINICIAN_CHANGE_STREAM_HEARTBEAT_SECONDS: float = env.float(
+        "CLINICIAN_CHANGE_STREAM_HEARTBEAT_SECONDS", 15
+    )
+    CLINICIAN_CHANGE_STREAM_MAX_SECONDS: float = env.float(
+        "CLINICIAN_CHANGE_STREAM_MAX_SECONDS", 300
+    )
+    REQUEST_TIMING_LOG_THRESHOLD_MS: float = env.float(
+        "REQUEST_TIMING_LOG_THRESHOLD_MS", 500
+    )
+    SERVER_TIMING_HEADER: bool = env.bool("SERVER_TIMING_HEADER", False)
+    SQL_SLOW_QUERY_THRESHOLD_MS: float = env.float("SQL_SLOW_QUERY_THRESHOLD_MS", 200)
+    PROFILE_SAMPLE_INTERVAL_MS: float = env.float("PROFILE_SAMPLE_INTERVAL_MS", 5)
+    PROFILE_SIGNING_KEY: Optional[str] = env.str("PROFILE_SIGNING_KEY", None)
 
 
 def init_config(app: Flask) -> None:
@@ -7,6 +7,8 @@ from flask_batteries_included.config import is_production_environment
 from flask_batteries_included.helpers.error_handler import ServiceUnavailableException
 from she_logging import logger
 
+from dhos_users_api.helpers import metrics, timing
+
 
 def add_user_to_authz_groups(user_id: str, groups_to_add_to: List[str]) -> None:
     """
@@ -24,8 +26,13 @@ def add_user_to_authz_groups(user_id: str, groups_to_add_to: List[str]) -> None:
 
     try:
         logger.debug("Adding user to group(s)", extra={"group_ids": groups_to_add_to})
-        auth0_authz.add_user_to_authz_groups(user_id, groups_to_add_to)
+        with (
+            timing.phase("auth0"),
+            metrics.AUTH0_REQUEST_SECONDS.labels("add_user_to_authz_groups").time(),
+        ):
+            auth0_authz.add_user_to_authz_groups(user_id, groups_to_add_to)
     except (Auth0ConnectionError, Auth0OperationError) as e:
+        metrics.AUTH0_REQUEST_FAILURES.labels("add_user_to_authz_groups").inc()
         logger.exception("Could not communicate with Auth0")
         raise ServiceUnavailableException(e)
 
@@ -50,7 +57,14 @@ def remove_user_from_authz_groups(
         logger.debug(
             "Removing user from group(s)", extra={"group_ids": groups_to_remove_from}
         )
-        auth0_authz.remove_user_from_authz_groups(user_id, groups_to_remove_from)
+        with (
+            timing.phase("auth0"),
+            metrics.AUTH0_REQUEST_SECONDS.labels(
+                "remove_user_from_authz_groups"
+            ).time(),
+        ):
+            auth0_authz.remove_user_from_authz_groups(user_id, groups_to_remove_from)
     except (Auth0ConnectionError, Auth0OperationError) as e:
+        metrics.AUTH0_REQUEST_FAILURES.labels("remove_user_from_authz_groups").inc()
         logger.exception("Could not communicate with Auth0")
         raise ServiceUnavailableException(e)
@@ -0,0 +1,51 @@
+from typing import List, Set
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import func, select
+
+from dhos_users_api.models.user import User, send_entry_identifier_seq
+
+# Sequence values are mapped onto badge numbers by n -> (n * A + B) mod 10^9. As A
+# shares no factors with 10^9 this is a bijection, so distinct sequence values always
+# give distinct badge numbers, without handing out consecutive numbers.
+_BADGE_SPACE = 1_000_000_000
+_MULTIPLIER = 387_420_489  # 3^18
+_OFFSET = 138_074_173
+
+
+def reserve_send_entry_identifiers(count: int) -> List[str]:
+    """
+    Reserves `count` unused 9-digit badge numbers prefixed with a '@'. Numbers are
+    drawn from a Postgres sequence, so concurrent callers never receive the same one.
+    """
+    identifiers: List[str] = []
+    while len(identifiers) < count:
+        candidates = _next_identifiers(count - len(identifiers))
+        # Badge numbers generated before the sequence existed were random, so may
+        # clash with the sequence's; check for any such clashes in one query.
+        taken: Set[str] = {
+            identifier
+            for (identifier,) in db.session.query(User.send_entry_identifier).filter(
+                User.send_entry_identifier.in_(candidates)
+            )
+        }
+        identifiers.extend(c for c in candidates if c not in taken)
+    return identifiers
+
+
+def reserve_send_entry_identifier() -> str:
+    """Reserves a single unused badge number, see reserve_send_entry_identifiers."""
+    return reserve_send_entry_identifiers(1)[0]
+
+
+def _next_identifiers(count: int) -> List[str]:
+    values: List[int] = (
+        db.session.execute(
+            select(send_entry_identifier_seq.next_value()).select_from(
+                func.generate_series(1, count)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    return ["@%0.9d" % ((v * _MULTIPLIER + _OFFSET) % _BADGE_SPACE) for v in values]
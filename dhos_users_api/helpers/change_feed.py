@@ -0,0 +1,168 @@
+"""
+Change feed of the clinician directory (GET /dhos/v1/clinician_changes), so services
+mirroring the directory can sync what changed instead of rescanning every clinician.
+
+Every committed change to a clinician, or to their products or terms agreements,
+adds a ClinicianChange row recording what was removed from the clinician. Sequence
+numbers are allocated while holding a transaction-level advisory lock, so changes
+become visible in sequence order: once a consumer has seen a change it will never
+later find one with a lower sequence number.
+
+Changes made through the ORM are collected when they're flushed. Bulk statements
+bypass the ORM, so must call record_changes themselves. The collected changes are
+inserted just before the transaction commits, so the lock is only held for the
+commit itself rather than for the rest of the request. Changes made in a savepoint
+that is rolled back are discarded.
+"""
+
+import itertools
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Set, Tuple
+
+import sqlalchemy
+from flask import Flask
+from flask_batteries_included.sqldb import db
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, SessionTransaction
+
+from dhos_users_api.models.clinician_change import ClinicianChange
+from dhos_users_api.models.product import Product
+from dhos_users_api.models.terms_agreement import TermsAgreement
+from dhos_users_api.models.user import User
+
+# Arbitrary key identifying the change feed's advisory lock.
+_CHANGE_FEED_LOCK_KEY = 0x63686E67
+
+# Postgres notification channel notified when changes are committed.
+NOTIFICATION_CHANNEL = "clinician_changes"
+
+# Clinician ID -> removed field ("locations", "groups" or "products") -> values.
+_Changes = Dict[str, DefaultDict[str, Set[str]]]
+
+# Session info key of the changes not yet inserted, with the transaction (or
+# savepoint) each was made in.
+_PENDING_CHANGES_KEY = "pending_clinician_changes"
+
+
+def _insert_changes(connection: Connection, changes: _Changes) -> None:
+    if not changes:
+        return
+    # Held until the transaction ends, so no other transaction can allocate a later
+    # sequence number and commit before this one.
+    connection.execute(select(func.pg_advisory_xact_lock(_CHANGE_FEED_LOCK_KEY)))
+    connection.execute(
+        insert(ClinicianChange),
+        [
+            {
+                "clinician_id": clinician_id,
+                "removed_locations": sorted(removed["locations"]) or None,
+                "removed_groups": sorted(removed["groups"]) or None,
+                "removed_products": sorted(removed["products"]) or None,
+            }
+            for clinician_id, removed in sorted(changes.items())
+        ],
+    )
+    # Only delivered if and when the transaction commits.
+    connection.execute(select(func.pg_notify(NOTIFICATION_CHANNEL, "")))
+
+
+def _add_pending_changes(session: Session, changes: _Changes) -> None:
+    if not changes:
+        return
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    pending: List[Tuple[SessionTransaction, _Changes]] = session.info.setdefault(
+        _PENDING_CHANGES_KEY, []
+    )
+    pending.append((transaction, changes))
+
+
+def record_changes(clinician_ids: Iterable[str]) -> None:
+    """
+    Records changes to clinicians made outside the ORM, e.g. by bulk inserts or
+    UPDATE statements, as part of the current transaction.
+    """
+    _add_pending_changes(db.session(), {c: defaultdict(set) for c in clinician_ids})
+
+
+def _removed_values(user: User, field: str) -> Set[str]:
+    history = sqlalchemy.inspect(user).attrs[field].history
+    old = set(itertools.chain.from_iterable(v for v in history.deleted if v))
+    new = set(itertools.chain.from_iterable(v for v in history.added if v))
+    return old - new
+
+
+def _record_flushed_changes(session: Session, flush_context: Any) -> None:
+    # Attribute history still describes the flushed changes at this point.
+    changes: _Changes = {}
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User):
+            if obj in session.dirty and not session.is_modified(
+                obj, include_collections=False
+            ):
+                # Only its products or terms agreements changed, which are
+                # recorded below.
+                continue
+            removed = changes.setdefault(obj.uuid, defaultdict(set))
+            if obj in session.dirty:
+                removed["locations"] |= _removed_values(obj, "locations")
+                removed["groups"] |= _removed_values(obj, "groups")
+        elif isinstance(obj, (Product, TermsAgreement)) and obj.user_id:
+            removed = changes.setdefault(obj.user_id, defaultdict(set))
+            if isinstance(obj, Product) and obj in session.deleted:
+                removed["products"].add(obj.uuid)
+    _add_pending_changes(session, changes)
+
+
+def _insert_pending_changes(session: Session) -> None:
+    if session.get_nested_transaction() is not None:
+        # Releasing a savepoint, not committing.
+        return
+    # Flush first, as the commit would otherwise flush after this.
+    session.flush()
+    pending: List[Tuple[SessionTransaction, _Changes]] = session.info.pop(
+        _PENDING_CHANGES_KEY, []
+    )
+    merged: _Changes = {}
+    for _, changes in pending:
+        for clinician_id, removed in changes.items():
+            merged_removed = merged.setdefault(clinician_id, defaultdict(set))
+            for field, values in removed.items():
+                merged_removed[field] |= values
+    _insert_changes(session.connection(), merged)
+
+
+def _discard_rolled_back_changes(
+    session: Session, previous_transaction: SessionTransaction
+) -> None:
+    def _rolled_back(transaction: Optional[SessionTransaction]) -> bool:
+        while transaction is not None:
+            if transaction is previous_transaction:
+                return True
+            transaction = transaction.parent
+        return False
+
+    pending: List[Tuple[SessionTransaction, _Changes]] = session.info.get(
+        _PENDING_CHANGES_KEY, []
+    )
+    session.info[_PENDING_CHANGES_KEY] = [
+        (transaction, changes)
+        for transaction, changes in pending
+        if not _rolled_back(transaction)
+    ]
+
+
+def _discard_ended_changes(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_PENDING_CHANGES_KEY, None)
+
+
+def init_change_feed(app: Flask) -> None:
+    for name, listener in (
+        ("after_flush", _record_flushed_changes),
+        ("before_commit", _insert_pending_changes),
+        ("after_soft_rollback", _discard_rolled_back_changes),
+        ("after_transaction_end", _discard_ended_changes),
+    ):
+        if not sqlalchemy.event.contains(db.session, name, listener):
+            sqlalchemy.event.listen(db.session, name, listener)
@@ -0,0 +1,211 @@
+"""
+Pushes changes to clinicians to subscribers of GET /dhos/v1/clinician_changes/stream,
+so services don't need to poll for them.
+
+Committing a change to the change feed (see change_feed) sends a Postgres
+notification. While a worker process has subscribers, a thread holds a connection
+LISTENing for the notification, reads the new changes from the feed and passes them
+to each subscriber. Each subscriber buffers up to CLINICIAN_CHANGE_STREAM_BUFFER_SIZE
+changes; one that falls further behind than that is disconnected, and can reconnect
+to resume from the last change it received.
+"""
+
+import queue
+import selectors
+import threading
+import time
+from typing import Iterator, List, Optional, Set, Tuple
+
+import sqlalchemy
+from flask import current_app
+from flask_batteries_included.helpers.error_handler import ServiceUnavailableException
+from she_logging import logger
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import NullPool
+
+from dhos_users_api.helpers.change_feed import NOTIFICATION_CHANNEL
+from dhos_users_api.models.clinician_change import ClinicianChange
+
+# (sequence, clinician ID)
+Change = Tuple[int, str]
+
+
+class Subscription:
+    def __init__(self, buffer_size: int) -> None:
+        self._queue: "queue.Queue[Change]" = queue.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+    def put(self, change: Change) -> None:
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(change)
+        except queue.Full:
+            self.overflowed = True
+
+    def changes(
+        self, after: int, deadline: float, heartbeat: float
+    ) -> Iterator[Optional[Change]]:
+        """
+        Yields changes numbered after after as they're received, or None if there's
+        been none for heartbeat seconds. Stops at deadline (a time.monotonic() time),
+        or once the buffered changes have been yielded if the buffer overflowed.
+        """
+        while not self.overflowed or not self._queue.empty():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                change = self._queue.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                yield None
+                continue
+            if change[0] > after:
+                after = change[0]
+                yield change
+
+
+class ChangeNotifier:
+    def __init__(
+        self,
+        database_uri: str,
+        max_subscribers: int,
+        buffer_size: int,
+        poll_interval: float = 5,
+        start_timeout: float = 10,
+    ) -> None:
+        self.database_uri = database_uri
+        self.max_subscribers = max_subscribers
+        self.buffer_size = buffer_size
+        # How often to check for changes if no notification arrives, and to check
+        # whether there are still any subscribers.
+        self.poll_interval = poll_interval
+        # How long a subscriber waits for a new listener to start.
+        self.start_timeout = start_timeout
+        self._lock = threading.Lock()
+        self._subscriptions: Set[Subscription] = set()
+        self._thread: Optional[threading.Thread] = None
+        # Set once the listener is passing on every change committed from then on.
+        self._started = threading.Event()
+        # Sequence number of the last change passed to subscribers.
+        self._last_sequence = 0
+
+    def subscribe(self) -> Subscription:
+        """
+        Subscribes to changes committed from now on. The subscriber must read any
+        earlier changes it needs from the change feed itself, after subscribing.
+        """
+        subscription = Subscription(buffer_size=self.buffer_size)
+        with self._lock:
+            # Each subscriber occupies a server thread.
+            if len(self._subscriptions) >= self.max_subscribers:
+                raise ServiceUnavailableException(
+                    "Too many subscribers to clinician changes"
+                )
+            self._subscriptions.add(subscription)
+            if self._thread is None:
+                self._started = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    args=(self._started,),
+                    name="clinician-change-listener",
+                    daemon=True,
+                )
+                self._thread.start()
+            started = self._started
+        if not started.wait(timeout=self.start_timeout):
+            self.unsubscribe(subscription)
+            raise ServiceUnavailableException("Not listening for clinician changes")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _has_subscribers(self) -> bool:
+        with self._lock:
+            if self._subscriptions:
+                return True
+            # Let the next subscriber start a new listener.
+            self._thread = None
+            return False
+
+    def _run(self, started: threading.Event) -> None:
+        engine = sqlalchemy.create_engine(self.database_uri, poolclass=NullPool)
+        try:
+            while True:
+                try:
+                    # Returns once there are no subscribers left.
+                    self._listen(engine, started)
+                    return
+                except sqlalchemy.exc.SQLAlchemyError:
+                    logger.warning(
+                        "Failed to listen for clinician changes", exc_info=True
+                    )
+                time.sleep(self.poll_interval)
+                if not self._has_subscribers():
+                    return
+        finally:
+            engine.dispose()
+
+    def _listen(
+        self, engine: sqlalchemy.engine.Engine, started: threading.Event
+    ) -> None:
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            connection.execute(sqlalchemy.text(f"LISTEN {NOTIFICATION_CHANNEL}"))
+            if not started.is_set():
+                # Subscribers catch up on earlier changes themselves, so start from
+                # the latest rather than rereading the feed from where one resumes.
+                self._last_sequence = connection.execute(
+                    select(func.coalesce(func.max(ClinicianChange.sequence), 0))
+                ).scalar_one()
+                started.set()
+            dbapi_connection = connection.connection.dbapi_connection
+            with selectors.DefaultSelector() as selector:
+                selector.register(dbapi_connection, selectors.EVENT_READ)
+                while self._has_subscribers():
+                    # Also catches up after (re)connecting, and on the rare occasion
+                    # a notification is missed.
+                    self._publish_new_changes(connection)
+                    if selector.select(timeout=self.poll_interval):
+                        dbapi_connection.poll()
+                        dbapi_connection.notifies.clear()
+
+    def _publish_new_changes(self, connection: Connection) -> None:
+        while True:
+            changes: List[Change] = [
+                (sequence, clinician_id)
+                for sequence, clinician_id in connection.execute(
+                    select(ClinicianChange.sequence, ClinicianChange.clinician_id)
+                    .where(ClinicianChange.sequence > self._last_sequence)
+                    .order_by(ClinicianChange.sequence)
+                    .limit(self.buffer_size)
+                )
+            ]
+            if not changes:
+                return
+            self._last_sequence = changes[-1][0]
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+            for subscription in subscriptions:
+                for change in changes:
+                    subscription.put(change)
+
+
+def get_notifier() -> ChangeNotifier:
+    """
+    The notifier is created the first time it's needed, so it picks up any database
+    config applied after the app was created.
+    """
+    if "clinician_change_notifier" not in current_app.extensions:
+        current_app.extensions["clinician_change_notifier"] = ChangeNotifier(
+            database_uri=current_app.config["SQLALCHEMY_DATABASE_URI"],
+            max_subscribers=current_app.config[
+                "CLINICIAN_CHANGE_STREAM_MAX_SUBSCRIBERS"
+            ],
+            buffer_size=current_app.config["CLINICIAN_CHANGE_STREAM_BUFFER_SIZE"],
+        )
+    return current_app.extensions["clinician_change_notifier"]
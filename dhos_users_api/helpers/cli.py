@@ -1,15 +1,69 @@
+import json
+from pathlib import Path
+
 import click
 from flask import Flask
-from flask_batteries_included.helpers.apispec import generate_openapi_spec
+from flask_batteries_included.config import is_production_environment
 
-from dhos_users_api import blueprint_api
-from dhos_users_api.models.api_spec import dhos_users_api_spec
+from dhos_users_api import blueprint_api, roles
+from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers import spec_cache
 
 
 def add_cli_command(app: Flask) -> None:
     @app.cli.command("create-openapi")
     @click.argument("output", type=click.Path())
     def create_api(output: str) -> None:
+        # Only needed when generating the spec, so not imported at startup.
+        from flask_batteries_included.helpers.apispec import generate_openapi_spec
+
+        from dhos_users_api.models.api_spec import dhos_users_api_spec
+
         generate_openapi_spec(
             dhos_users_api_spec, output, blueprint_api.clinicians_blueprint
         )
+
+    @app.cli.command("create-openapi-cache")
+    def create_openapi_cache() -> None:
+        """Cache the parsed OpenAPI spec, to speed up startup."""
+        spec_cache.write_spec_cache()
+
+    @app.cli.command("export-role-mapping")
+    @click.argument("output", type=click.Path())
+    def export_role_mapping(output: str) -> None:
+        """Write the current role mapping to a file usable as ROLE_MAPPING_FILE."""
+        Path(output).write_text(
+            json.dumps(roles.get_role_map(), indent=2, sort_keys=True)
+        )
+
+    @app.cli.command("expire-temporary-clinicians")
+    def expire_temporary_clinicians() -> None:
+        """Deactivate temporary clinicians whose contract has expired."""
+        expired = controller.expire_temporary_clinicians()
+        click.echo(f"Deactivated {expired} expired clinicians")
+
+    @app.cli.command("generate-synthetic-clinicians")
+    @click.argument("count", type=click.IntRange(min=1))
+    @click.option("--locations", type=click.IntRange(min=1), default=500)
+    @click.option("--seed", type=int, default=0)
+    def generate_synthetic_clinicians(count: int, locations: int, seed: int) -> None:
+        """Add COUNT synthetic clinicians, for scale testing. Not for production."""
+        if is_production_environment():
+            raise click.ClickException("Refusing to add synthetic data in production")
+
+        # Only needed for scale testing, so not imported at startup.
+        from dhos_users_api.blueprint_development import synthetic_data
+
+        created = 0
+        for result in synthetic_data.create_synthetic_clinicians(
+            count, locations=locations, seed=seed
+        ):
+            created += result["created"]
+            click.echo(f"Added {created} of {count} clinicians")
+            failed = [batch for batch in result["batches"] if "error" in batch]
+            if failed:
+                # Usually because clinicians with this seed have already been added.
+                raise click.ClickException(
+                    f"Failed to add {len(failed)} batches of clinicians (see the log);"
+                    f" has --seed {seed} already been used?"
+                )
@@ -0,0 +1,324 @@
+"""
+Read-through cache of serialised clinicians, as returned by GET /dhos/v1/clinician/<id>.
+
+There are two tiers:
+- an in-process LRU cache (CLINICIAN_CACHE_SIZE entries, kept for
+  CLINICIAN_CACHE_TTL_SECONDS)
+- optionally, Redis (CLINICIAN_CACHE_REDIS_URL) shared by all processes, kept for
+  CLINICIAN_CACHE_SHARED_TTL_SECONDS
+
+Writes invalidate both tiers in the process making the write, so the in-process
+caches of other processes can be out of date for up to CLINICIAN_CACHE_TTL_SECONDS.
+Invalidating a clinician in the shared tier also increments its generation there, and
+a clinician loaded from the database is only written to the shared tier if its
+generation hasn't changed since before it was loaded. So a process can't overwrite
+another's invalidation with a clinician it loaded before the other's write.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import Flask, current_app, json
+from flask_batteries_included.sqldb import db
+from she_logging import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from dhos_users_api.helpers import metrics
+from dhos_users_api.models.product import Product
+from dhos_users_api.models.terms_agreement import TermsAgreement
+from dhos_users_api.models.user import User
+
+# Change this whenever the cached representation changes, so that entries written to
+# the shared tier by an older version of the service are ignored.
+REPRESENTATION_VERSION = 2
+
+_CHANGED_CLINICIANS_KEY = "changed_clinician_ids"
+
+
+class SharedTier:
+    """
+    Redis tier. Errors are logged and treated as misses, so Redis being unavailable
+    only costs performance.
+
+    Each clinician has a value key and a generation key. Reads return the generation
+    alongside the value, and writes only succeed if the generation is unchanged.
+    """
+
+    # Sets KEYS[1] to ARGV[1] for ARGV[3] seconds if the generation in KEYS[2] is still
+    # ARGV[2] (a missing generation is "0").
+    _SET_IF_GENERATION_UNCHANGED = """
+        if (redis.call("get", KEYS[2]) or "0") == ARGV[2] then
+            redis.call("set", KEYS[1], ARGV[1], "ex", ARGV[3])
+        end
+    """
+
+    def __init__(self, url: str, ttl: int) -> None:
+        # Only needed when a shared tier is configured.
+        import redis
+
+        self.redis = redis.Redis.from_url(url, socket_timeout=1)
+        self.ttl = ttl
+        self.errors = (redis.exceptions.RedisError,)
+        self._set_if_generation_unchanged = self.redis.register_script(
+            self._SET_IF_GENERATION_UNCHANGED
+        )
+
+    @staticmethod
+    def _value_key(clinician_id: str) -> str:
+        return f"dhos-users:clinician:v{REPRESENTATION_VERSION}:{clinician_id}"
+
+    @staticmethod
+    def _generation_key(clinician_id: str) -> str:
+        return f"dhos-users:clinician-generation:{clinician_id}"
+
+    def get(self, clinician_id: str) -> Tuple[Optional[str], Optional[str]]:
+        return self.get_many([clinician_id])[0]
+
+    def get_many(
+        self, clinician_ids: List[str]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Returns the value (None if not cached) and generation of each clinician. The
+        generation is None if it couldn't be read, in which case nothing may be
+        written.
+        """
+        keys = [self._value_key(c) for c in clinician_ids]
+        keys += [self._generation_key(c) for c in clinician_ids]
+        try:
+            results: List[Optional[bytes]] = self.redis.mget(keys)
+        except self.errors:
+            logger.warning("Failed to read clinician cache", exc_info=True)
+            return [(None, None)] * len(clinician_ids)
+        values, generations = (
+            results[: len(clinician_ids)],
+            results[len(clinician_ids) :],
+        )
+        return [
+            (
+                value.decode() if value is not None else None,
+                generation.decode() if generation is not None else "0",
+            )
+            for value, generation in zip(values, generations)
+        ]
+
+    def set(self, clinician_id: str, value: str, generation: Optional[str]) -> None:
+        self.set_many({clinician_id: (value, generation)})
+
+    def set_many(self, values: Dict[str, Tuple[str, Optional[str]]]) -> None:
+        """
+        Caches each clinician's value unless its generation has changed since it was
+        read by get or get_many.
+        """
+        try:
+            pipeline = self.redis.pipeline(transaction=False)
+            for clinician_id, (value, generation) in values.items():
+                if generation is None:
+                    continue
+                self._set_if_generation_unchanged(
+                    keys=[
+                        self._value_key(clinician_id),
+                        self._generation_key(clinician_id),
+                    ],
+                    args=[value, generation, self.ttl],
+                    client=pipeline,
+                )
+            pipeline.execute()
+        except self.errors:
+            logger.warning("Failed to write clinician cache", exc_info=True)
+
+    def delete(self, clinician_ids: Iterable[str]) -> None:
+        try:
+            pipeline = self.redis.pipeline(transaction=True)
+            for clinician_id in clinician_ids:
+                generation_key = self._generation_key(clinician_id)
+                pipeline.incr(generation_key)
+                # Outlives any value written before the increment.
+                pipeline.expire(generation_key, self.ttl)
+                pipeline.delete(self._value_key(clinician_id))
+            pipeline.execute()
+        except self.errors:
+            # The entries will expire eventually.
+            logger.exception("Failed to invalidate clinician cache")
+
+
+class ClinicianCache:
+    def __init__(
+        self, max_size: int, ttl: float, shared: Optional[SharedTier] = None
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # Incremented on every invalidation, so a value loaded while a write was being
+        # committed isn't cached.
+        self._generation = 0
+
+    def _get_local(self, clinician_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(clinician_id)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[clinician_id]
+                return None
+            self._entries.move_to_end(clinician_id)
+            return value
+
+    def _set_local(self, clinician_id: str, value: str) -> None:
+        with self._lock:
+            self._entries[clinician_id] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(clinician_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, clinician_id: str, load: Callable[[], Dict]) -> Dict:
+        """
+        Returns the cached clinician, or loads and caches it. load may raise, e.g. if
+        the clinician doesn't exist, in which case nothing is cached.
+        """
+        value = self._get_local(clinician_id)
+        if value is not None:
+            metrics.CLINICIAN_CACHE_LOOKUPS.labels("local_hit").inc()
+            return json.loads(value)
+
+        generation = self._generation
+        shared_generation: Optional[str] = None
+        if self.shared is not None:
+            value, shared_generation = self.shared.get(clinician_id)
+            if value is not None:
+                metrics.CLINICIAN_CACHE_LOOKUPS.labels("shared_hit").inc()
+                if generation == self._generation:
+                    self._set_local(clinician_id, value)
+                return json.loads(value)
+
+        metrics.CLINICIAN_CACHE_LOOKUPS.labels("miss").inc()
+        value = json.dumps(load())
+        if generation == self._generation:
+            if self.shared is not None:
+                self.shared.set(clinician_id, value, shared_generation)
+            self._set_local(clinician_id, value)
+        return json.loads(value)
+
+    def get_many(
+        self,
+        clinician_ids: Collection[str],
+        load_many: Callable[[Set[str]], Dict[str, Dict]],
+        backfill: bool = True,
+    ) -> Dict[str, Dict]:
+        """
+        Returns a map of clinician ID to clinician for those of clinician_ids that are
+        cached, plus those returned by load_many, which is called once with the IDs
+        that aren't cached. Clinicians that don't exist are left out. The loaded
+        clinicians are cached unless backfill is False.
+        """
+        found: Dict[str, str] = {}
+        with self._lock:
+            now = time.monotonic()
+            for clinician_id in clinician_ids:
+                entry = self._entries.get(clinician_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(clinician_id)
+                    found[clinician_id] = entry[1]
+        metrics.CLINICIAN_CACHE_LOOKUPS.labels("local_hit").inc(len(found))
+
+        generation = self._generation
+        shared_generations: Dict[str, Optional[str]] = {}
+        missing: Set[str] = set(clinician_ids) - found.keys()
+        if missing and self.shared is not None:
+            missing_ids = list(missing)
+            shared_hits: Dict[str, str] = {}
+            for clinician_id, (value, shared_generation) in zip(
+                missing_ids, self.shared.get_many(missing_ids)
+            ):
+                if value is not None:
+                    shared_hits[clinician_id] = value
+                shared_generations[clinician_id] = shared_generation
+            metrics.CLINICIAN_CACHE_LOOKUPS.labels("shared_hit").inc(len(shared_hits))
+            if generation == self._generation:
+                for clinician_id, value in shared_hits.items():
+                    self._set_local(clinician_id, value)
+            found.update(shared_hits)
+            missing -= shared_hits.keys()
+
+        if missing:
+            metrics.CLINICIAN_CACHE_LOOKUPS.labels("miss").inc(len(missing))
+            loaded = {c: json.dumps(v) for c, v in load_many(missing).items()}
+            if backfill and generation == self._generation:
+                if self.shared is not None:
+                    self.shared.set_many(
+                        {
+                            c: (value, shared_generations.get(c))
+                            for c, value in loaded.items()
+                        }
+                    )
+                for clinician_id, value in loaded.items():
+                    self._set_local(clinician_id, value)
+            found.update(loaded)
+
+        return {c: json.loads(value) for c, value in found.items()}
+
+    def invalidate(self, clinician_ids: Iterable[str]) -> None:
+        clinician_ids = set(clinician_ids)
+        if not clinician_ids:
+            return
+        with self._lock:
+            self._generation += 1
+            for clinician_id in clinician_ids:
+                self._entries.pop(clinician_id, None)
+        if self.shared is not None:
+            self.shared.delete(clinician_ids)
+
+    def clear(self) -> None:
+        """
+        Empties the in-process tier. Entries in the shared tier expire by themselves.
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+def _record_changes(session: Session, flush_context: Any) -> None:
+    changed: Set[str] = session.info.setdefault(_CHANGED_CLINICIANS_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            changed.add(obj.uuid)
+        elif isinstance(obj, (Product, TermsAgreement)):
+            changed.add(obj.user_id)
+
+
+def _invalidate_changes(session: Session) -> None:
+    changed: Set[str] = session.info.pop(_CHANGED_CLINICIANS_KEY, set())
+    if changed:
+        get_cache().invalidate(changed)
+
+
+def init_clinician_cache(app: Flask) -> None:
+    shared: Optional[SharedTier] = None
+    if app.config["CLINICIAN_CACHE_REDIS_URL"]:
+        shared = SharedTier(
+            url=app.config["CLINICIAN_CACHE_REDIS_URL"],
+            ttl=app.config["CLINICIAN_CACHE_SHARED_TTL_SECONDS"],
+        )
+    app.extensions["clinician_cache"] = ClinicianCache(
+        max_size=app.config["CLINICIAN_CACHE_SIZE"],
+        ttl=app.config["CLINICIAN_CACHE_TTL_SECONDS"],
+        shared=shared,
+    )
+
+    # Clinicians changed through the ORM are invalidated when the change is
+    # committed. Bulk UPDATE statements bypass this, so must invalidate explicitly.
+    for name, listener in (
+        ("after_flush", _record_changes),
+        ("after_commit", _invalidate_changes),
+    ):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+
+
+def get_cache() -> ClinicianCache:
+    return current_app.extensions["clinician_cache"]
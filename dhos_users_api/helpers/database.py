@@ -0,0 +1,139 @@
+import functools
+import time
+from typing import Any, Callable, Dict, Iterator
+
+import sqlalchemy.exc
+from flask import Flask, current_app
+from flask_batteries_included.helpers.error_handler import catch_service_unavailable
+from flask_batteries_included.sqldb import db
+from sqlalchemy import func, select
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Select
+
+from dhos_users_api.helpers import metrics
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long requests wait for a connection, how many give up
+    waiting, and how many connections are open, idle and in use. Metrics are labelled
+    with the pool's logging name.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Engines replace their pool when disposed, so this resets the pool's gauges.
+        self._record_connections()
+
+    @property
+    def _pool_name(self) -> str:
+        return self._orig_logging_name or "primary"
+
+    def _record_connections(self) -> None:
+        metrics.DB_POOL_SIZE.labels(self._pool_name).set(self.size())
+        metrics.DB_POOL_CONNECTIONS_OPEN.labels(self._pool_name).set(
+            self.size() + self.overflow()
+        )
+        metrics.DB_POOL_CONNECTIONS_IDLE.labels(self._pool_name).set(self.checkedin())
+        metrics.DB_POOL_CONNECTIONS_IN_USE.labels(self._pool_name).set(
+            self.checkedout()
+        )
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            metrics.DB_POOL_CHECKOUT_TIMEOUTS.labels(self._pool_name).inc()
+            raise
+        finally:
+            metrics.DB_POOL_CHECKOUT_SECONDS.labels(self._pool_name).observe(
+                time.perf_counter() - started
+            )
+        self._record_connections()
+        return connection
+
+    def _do_return_conn(self, conn: Any) -> None:
+        super()._do_return_conn(conn)
+        self._record_connections()
+
+
+def engine_options(config: Dict, pool_name: str = "primary") -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_logging_name": pool_name,
+        "pool_size": config["SQLALCHEMY_POOL_SIZE"],
+        "max_overflow": config["SQLALCHEMY_MAX_OVERFLOW"],
+        "pool_timeout": config["SQLALCHEMY_POOL_TIMEOUT"],
+        "pool_recycle": config["SQLALCHEMY_POOL_RECYCLE"],
+        "pool_pre_ping": config["SQLALCHEMY_POOL_PRE_PING"],
+    }
+    if config["DATABASE_STATEMENT_TIMEOUT_MS"]:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={config['DATABASE_STATEMENT_TIMEOUT_MS']}"
+        }
+    return options
+
+
+def init_database_config(app: Flask) -> None:
+    """
+    Applies the pool and timeout config to the engine flask-batteries-included
+    creates. Must be called before the engine is first used.
+    """
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        **engine_options(app.config),
+    }
+    # Waiting longer for a connection would only queue more requests behind this one.
+    app.register_error_handler(sqlalchemy.exc.TimeoutError, catch_service_unavailable)
+
+
+def async_engine_options(config: Dict) -> Dict[str, Any]:
+    """
+    Options for the asyncpg engine of the ASGI app (see dhos_users_api.asgi).
+    """
+    options: Dict[str, Any] = {
+        "pool_size": config["ASYNC_SQLALCHEMY_POOL_SIZE"],
+        "max_overflow": config["SQLALCHEMY_MAX_OVERFLOW"],
+        "pool_timeout": config["SQLALCHEMY_POOL_TIMEOUT"],
+        "pool_recycle": config["SQLALCHEMY_POOL_RECYCLE"],
+        "pool_pre_ping": config["SQLALCHEMY_POOL_PRE_PING"],
+    }
+    if config["DATABASE_STATEMENT_TIMEOUT_MS"]:
+        options["connect_args"] = {
+            "server_settings": {
+                "statement_timeout": str(config["DATABASE_STATEMENT_TIMEOUT_MS"])
+            }
+        }
+    return options
+
+
+def statement_timeout_query(timeout_ms: int) -> Select:
+    """
+    Overrides the statement timeout for the rest of the transaction it's run in.
+    """
+    return select(func.set_config("statement_timeout", str(timeout_ms), True))
+
+
+def set_statement_timeout(timeout_ms: int) -> None:
+    """
+    Overrides the statement timeout for the rest of the current transaction.
+    """
+    db.session.execute(statement_timeout_query(timeout_ms))
+
+
+def statement_timeout(config_key: str) -> Callable:
+    """
+    Decorator for endpoints whose queries should give up sooner (or later) than the
+    default statement timeout. The timeout in milliseconds is read from config_key.
+    """
+
+    def decorator(f: Callable) -> Callable:
+        @functools.wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            set_statement_timeout(current_app.config[config_key])
+            return f(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,164 @@
+"""
+Prometheus metrics for this service, served alongside flask-batteries-included's
+request metrics on /metrics. flask-batteries-included already records the count
+(by status) and latency of requests to each endpoint, as flask_request_count and
+flask_request_latency_seconds.
+
+Under the pre-forking server (see dhos_users_api.server), workers share a socket,
+so a scrape reaches whichever worker accepts it. The server sets
+PROMETHEUS_MULTIPROC_DIR, in which each worker writes its values, and /metrics
+reports them added up across workers. Gauges are added up over live workers.
+"""
+
+import os
+
+from flask import Flask
+from flask import Response as FlaskResponse
+from flask_batteries_included.helpers.metrics import (
+    CONTENT_TYPE_LATEST,
+    set_no_metrics,
+)
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts",
+    "Requests that gave up waiting for a database connection from the pool",
+    ["pool"],
+)
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Connections the pool keeps open",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CONNECTIONS_OPEN = Gauge(
+    "db_pool_connections_open",
+    "Database connections currently open, including overflow",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CONNECTIONS_IDLE = Gauge(
+    "db_pool_connections_idle",
+    "Open database connections waiting in the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CONNECTIONS_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Database connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+DB_READS_ROUTED = Counter(
+    "db_reads_routed",
+    "Read-only requests by the database they were sent to",
+    ["target"],
+)
+
+CLINICIAN_CACHE_LOOKUPS = Counter(
+    "clinician_cache_lookups",
+    "Clinician cache lookups by result: local_hit, shared_hit or miss",
+    ["result"],
+)
+
+RABBITMQ_PUBLISHES_IN_PROGRESS = Gauge(
+    "rabbitmq_publishes_in_progress",
+    "Messages currently being published to RabbitMQ",
+    multiprocess_mode="livesum",
+)
+
+RABBITMQ_PUBLISH_SECONDS = Histogram(
+    "rabbitmq_publish_seconds",
+    "Time taken to publish a message to RabbitMQ, by routing key",
+    ["routing_key"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+RABBITMQ_PUBLISH_FAILURES = Counter(
+    "rabbitmq_publish_failures",
+    "Messages that couldn't be published to RabbitMQ, by routing key",
+    ["routing_key"],
+)
+
+AUTH0_REQUEST_SECONDS = Histogram(
+    "auth0_request_seconds",
+    "Time taken by calls to the Auth0 authorization extension, by operation",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+AUTH0_REQUEST_FAILURES = Counter(
+    "auth0_request_failures",
+    "Calls to the Auth0 authorization extension that failed, by operation",
+    ["operation"],
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time taken to hash a password with scrypt",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request",
+    "SQL statements run by each request, by endpoint",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+
+DB_SECONDS_PER_REQUEST = Histogram(
+    "db_seconds_per_request",
+    "Time each request spent running SQL statements, by endpoint",
+    ["endpoint"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+DB_ROWS_PER_REQUEST = Histogram(
+    "db_rows_per_request",
+    "Rows returned by the SQL statements run by each request, by endpoint",
+    ["endpoint"],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000),
+)
+
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries",
+    "SQL statements that took longer than SQL_SLOW_QUERY_THRESHOLD_MS",
+)
+
+
+def init_metrics(app: Flask) -> None:
+    """
+    Replaces flask-batteries-included's /metrics view with one that reports every
+    worker's values, if PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+
+    def get_metrics() -> FlaskResponse:
+        return set_no_metrics(
+            FlaskResponse(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+        )
+
+    app.view_functions["get_metrics"] = get_metrics
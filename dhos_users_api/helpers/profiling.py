@@ -0,0 +1,157 @@
+"""
+Profiles a single request on demand, to find where the CPU time goes without having
+to reproduce the request locally.
+
+A request with an X-Profile-Request header is sampled by a statistical profiler: a
+thread records the request thread's stack every PROFILE_SAMPLE_INTERVAL_MS. Outside
+production any header value will do. In production the header must be signed with
+PROFILE_SIGNING_KEY (see sign_profile_request), and profiling is disabled if there's
+no key.
+
+The profile is kept in memory as collapsed stacks, one "frame;frame;frame count" line
+per distinct stack, ready for flamegraph.pl or speedscope. Its ID is returned in an
+X-Profile-Id header, and it can be fetched from GET /profiles/<profile_id> (in the
+development blueprint) from the same worker. In production, where that endpoint
+doesn't exist, the profile is logged instead.
+"""
+
+import collections
+import hashlib
+import hmac
+import sys
+import threading
+import time
+import uuid
+from types import FrameType
+from typing import Counter, Dict, List, Optional
+
+from flask import Flask, Response, current_app, g, request
+from flask_batteries_included.config import (
+    is_not_production_environment,
+    is_production_environment,
+)
+from she_logging import logger
+
+PROFILE_REQUEST_HEADER = "X-Profile-Request"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Profiles kept for retrieval, per worker process.
+_MAX_STORED_PROFILES = 20
+_profiles_lock = threading.Lock()
+
+
+class Sampler:
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = collections.Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+
+def _collapse(frame: Optional[FrameType]) -> str:
+    frames: List[str] = []
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        frames.append(f"{module}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+def collapsed_stacks(stacks: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def sign_profile_request(key: str, path: str, expires: int) -> str:
+    """
+    Returns an X-Profile-Request header value allowing a request to path to be
+    profiled in production until expires (a Unix timestamp).
+    """
+    signature = hmac.new(
+        key.encode(), f"{expires}:{path}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def _profile_requested() -> bool:
+    header: Optional[str] = request.headers.get(PROFILE_REQUEST_HEADER)
+    if not header:
+        return False
+    if is_not_production_environment():
+        return True
+    key: Optional[str] = current_app.config["PROFILE_SIGNING_KEY"]
+    expires = header.partition(".")[0]
+    if not key or not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(
+        header, sign_profile_request(key, request.path, int(expires))
+    )
+
+
+def get_profile(profile_id: str) -> Optional[str]:
+    profiles: Dict[str, str] = current_app.extensions["request_profiles"]
+    with _profiles_lock:
+        return profiles.get(profile_id)
+
+
+def _start_request() -> None:
+    if _profile_requested():
+        g.profiler = Sampler(
+            thread_id=threading.get_ident(),
+            interval=current_app.config["PROFILE_SAMPLE_INTERVAL_MS"] / 1000,
+        )
+        g.profiler.start()
+
+
+def _finish_request(response: Response) -> Response:
+    profiler: Optional[Sampler] = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profile = collapsed_stacks(profiler.stop())
+    profile_id = str(uuid.uuid4())
+    profiles: "collections.OrderedDict[str, str]" = current_app.extensions[
+        "request_profiles"
+    ]
+    with _profiles_lock:
+        profiles[profile_id] = profile
+        while len(profiles) > _MAX_STORED_PROFILES:
+            profiles.popitem(last=False)
+    if is_production_environment():
+        logger.info(
+            "Profiled %s %s",
+            request.method,
+            request.path,
+            extra={"requestProfile": {"profile_id": profile_id, "stacks": profile}},
+        )
+    response.headers[PROFILE_ID_HEADER] = profile_id
+    return response
+
+
+def _stop_profiler(exc: Optional[BaseException]) -> None:
+    # In case the request failed before _finish_request ran.
+    profiler: Optional[Sampler] = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+
+
+def init_profiling(app: Flask) -> None:
+    app.extensions["request_profiles"] = collections.OrderedDict()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_stop_profiler)
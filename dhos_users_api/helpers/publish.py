@@ -1,9 +1,10 @@
 from datetime import date
-from typing import Any, Dict
+from typing import Any, Dict, List, Union
 
 import kombu_batteries_included
 from she_logging import logger
 
+from dhos_users_api.helpers import metrics, timing
 from dhos_users_api.models.user import User
 
 
@@ -16,20 +17,39 @@ def fix_dates(data: Dict) -> Dict:
     return data
 
 
+def _publish_message(routing_key: str, body: Union[Dict, List]) -> None:
+    with (
+        metrics.RABBITMQ_PUBLISHES_IN_PROGRESS.track_inprogress(),
+        timing.phase("publish"),
+    ):
+        with metrics.RABBITMQ_PUBLISH_SECONDS.labels(routing_key).time():
+            try:
+                kombu_batteries_included.publish_message(
+                    routing_key=routing_key, body=body
+                )
+            except Exception:
+                metrics.RABBITMQ_PUBLISH_FAILURES.labels(routing_key).inc()
+                raise
+
+
 def clinician_creation_event(clinician: User) -> None:
     message_body: Dict = fix_dates(clinician.to_auth_dict())
     logger.info("Publishing dhos.D9000001 clinician creation event")
-    kombu_batteries_included.publish_message(
-        routing_key="dhos.D9000001", body=message_body
-    )
+    _publish_message(routing_key="dhos.D9000001", body=message_body)
 
 
 def clinician_update_event(clinician: User) -> None:
     message_body: Dict = clinician.to_auth_dict()
     logger.info("Publishing dhos.D9000002 clinician update event")
-    kombu_batteries_included.publish_message(
-        routing_key="dhos.D9000002", body=fix_dates(message_body)
+    _publish_message(routing_key="dhos.D9000002", body=fix_dates(message_body))
+
+
+def clinician_update_events(message_bodies: List[Dict]) -> None:
+    logger.info(
+        "Publishing %d dhos.D9000002 clinician update events", len(message_bodies)
     )
+    for message_body in message_bodies:
+        _publish_message(routing_key="dhos.D9000002", body=message_body)
 
 
 def welcome_email_notification(clinician: User) -> None:
@@ -39,12 +59,10 @@ def welcome_email_notification(clinician: User) -> None:
     }
 
     logger.info("Publishing dhos.DM000017 email notification")
-    kombu_batteries_included.publish_message(
-        routing_key="dhos.DM000017", body=email_details
-    )
+    _publish_message(routing_key="dhos.DM000017", body=email_details)
 
 
 def audit_message(event_type: str, event_data: Dict[str, Any]) -> None:
     logger.info(f"Publishing dhos.34837004 audit message of type {event_type}")
     audit = {"event_type": event_type, "event_data": event_data}
-    kombu_batteries_included.publish_message(routing_key="dhos.34837004", body=audit)
+    _publish_message(routing_key="dhos.34837004", body=audit)
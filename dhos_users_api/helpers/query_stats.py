@@ -0,0 +1,138 @@
+"""
+Counts the SQL statements each request runs, and the time they take and rows they
+return, so that eager loading or helpers that query in a loop show up.
+
+Each request's totals are included in its timing log record (see timing) and in the
+db_statements_per_request, db_seconds_per_request and db_rows_per_request metrics.
+Statements taking longer than SQL_SLOW_QUERY_THRESHOLD_MS are logged at WARNING with
+the types of their parameters, but not their values.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from flask import (
+    Flask,
+    Response,
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+    request,
+)
+from she_logging import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.engine.interfaces import ExecutionContext
+
+from dhos_users_api.helpers import metrics
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.statements = 0
+        self.seconds = 0.0
+        self.rows = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "statements": self.statements,
+            "duration_ms": round(self.seconds * 1000, 2),
+            "rows": self.rows,
+        }
+
+
+def current_stats() -> Optional[QueryStats]:
+    """
+    Statements run so far by the current request, or None outside a request.
+    """
+    if has_request_context():
+        return g.get("query_stats")
+    return None
+
+
+def parameter_shape(parameters: Any) -> Union[str, List, Dict]:
+    """
+    Describes statement parameters by their types, so they can be logged without
+    logging patient or clinician data.
+    """
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany
+            return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    context._query_started = time.perf_counter()  # type: ignore
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    seconds = time.perf_counter() - context._query_started  # type: ignore
+    # Only count rows returned, not rows affected by INSERT, UPDATE or DELETE.
+    rows = max(cursor.rowcount, 0) if cursor.description is not None else 0
+
+    stats = current_stats()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += seconds
+        stats.rows += rows
+
+    if not has_app_context():
+        return
+    threshold_ms = current_app.config["SQL_SLOW_QUERY_THRESHOLD_MS"]
+    if threshold_ms and seconds * 1000 >= threshold_ms:
+        metrics.DB_SLOW_QUERIES.inc()
+        logger.warning(
+            "Slow query took %.1f ms",
+            seconds * 1000,
+            extra={
+                "slowQuery": {
+                    "statement": statement,
+                    "parameters": parameter_shape(parameters),
+                    "duration_ms": round(seconds * 1000, 2),
+                    "rows": rows,
+                    "endpoint": request.endpoint if has_request_context() else None,
+                }
+            },
+        )
+
+
+def _start_request() -> None:
+    g.query_stats = QueryStats()
+
+
+def _finish_request(response: Response) -> Response:
+    stats = current_stats()
+    if stats is not None:
+        endpoint = request.endpoint or "none"
+        metrics.DB_STATEMENTS_PER_REQUEST.labels(endpoint).observe(stats.statements)
+        metrics.DB_SECONDS_PER_REQUEST.labels(endpoint).observe(stats.seconds)
+        metrics.DB_ROWS_PER_REQUEST.labels(endpoint).observe(stats.rows)
+    return response
+
+
+def init_query_stats(app: Flask) -> None:
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    # Listens to every engine, including the read replicas'.
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
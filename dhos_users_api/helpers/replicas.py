@@ -0,0 +1,200 @@
+"""
+Sends read-only endpoints to read replicas, so that browsing the clinician directory
+doesn't compete with writes on the primary.
+
+A request is served by the primary instead if:
+- no replicas are configured (DATABASE_REPLICA_HOSTS)
+- every replica is unreachable or lagging by more than DATABASE_REPLICA_MAX_LAG_SECONDS
+- the requesting user committed a write to this process within the last
+  DATABASE_REPLICA_STICKY_SECONDS, so they see their own changes ("read your writes").
+  This is per process, so is best-effort when there are several workers or replicas.
+"""
+
+import contextlib
+import functools
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import sqlalchemy
+from flask import Flask, current_app, has_request_context
+from flask_batteries_included.helpers.security.jwt import current_jwt_user
+from flask_batteries_included.sqldb import db
+from she_logging import logger
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from dhos_users_api.helpers import database, metrics
+
+REPLICA_SESSION_KEY = "read_replica"
+
+# Seconds since the replica last replayed a transaction from the primary, or 0 if it
+# is up to date (or isn't a replica at all).
+_REPLICATION_LAG_SQL = sqlalchemy.text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class Replica:
+    def __init__(self, host: str, engine: Engine, lag_check_interval: float) -> None:
+        self.host = host
+        self.engine = engine
+        self.lag_check_interval = lag_check_interval
+        self._lag: float = 0
+        self._lag_checked_at: Optional[float] = None
+
+    def lag(self) -> float:
+        """
+        Replication lag in seconds, or infinity if the replica can't be reached. Only
+        checked every lag_check_interval seconds.
+        """
+        now = time.monotonic()
+        if (
+            self._lag_checked_at is None
+            or now - self._lag_checked_at >= self.lag_check_interval
+        ):
+            self._lag_checked_at = now
+            try:
+                with self.engine.connect() as connection:
+                    self._lag = float(connection.execute(_REPLICATION_LAG_SQL).scalar())
+            except sqlalchemy.exc.SQLAlchemyError:
+                logger.warning(
+                    "Read replica %s is unavailable", self.host, exc_info=True
+                )
+                self._lag = float("inf")
+        return self._lag
+
+
+class ReplicaRouter:
+    def __init__(
+        self, replicas: List[Replica], max_lag: float, sticky_seconds: float
+    ) -> None:
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self._next_index: Iterator[int] = itertools.cycle(range(len(replicas)))
+        self._lock = threading.Lock()
+        self._recent_writers: Dict[str, float] = {}  # user -> sticky until
+
+    def record_write(self, user: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers = {
+                u: until for u, until in self._recent_writers.items() if until > now
+            }
+            self._recent_writers[user] = now + self.sticky_seconds
+
+    def choose_engine(self, user: str) -> Optional[Engine]:
+        """
+        Returns the engine of a replica that's up to date enough to serve a read for
+        user, or None if it should be served by the primary.
+        """
+        with self._lock:
+            if self._recent_writers.get(user, 0) > time.monotonic():
+                return None
+            start = next(self._next_index)
+        # Start from a different replica each time to spread the load.
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.lag() <= self.max_lag:
+                return replica.engine
+        return None
+
+
+def _get_router(app: Flask) -> Optional[ReplicaRouter]:
+    """
+    The router is created the first time it's needed, so the replica engines pick up
+    any database config applied after the app was created.
+    """
+    if "replica_router" not in app.extensions:
+        replicas = [
+            Replica(
+                host=host,
+                engine=sqlalchemy.create_engine(
+                    sqlalchemy.engine.make_url(
+                        app.config["SQLALCHEMY_DATABASE_URI"]
+                    ).set(host=host),
+                    **database.engine_options(app.config, pool_name=host),
+                ),
+                lag_check_interval=app.config["DATABASE_REPLICA_LAG_CHECK_INTERVAL"],
+            )
+            for host in app.config["DATABASE_REPLICA_HOSTS"]
+        ]
+        app.extensions["replica_router"] = (
+            ReplicaRouter(
+                replicas=replicas,
+                max_lag=app.config["DATABASE_REPLICA_MAX_LAG_SECONDS"],
+                sticky_seconds=app.config["DATABASE_REPLICA_STICKY_SECONDS"],
+            )
+            if replicas
+            else None
+        )
+    return app.extensions["replica_router"]
+
+
+def _record_write(session: Session) -> None:
+    if session.info.get(REPLICA_SESSION_KEY) or not has_request_context():
+        return
+    router = _get_router(current_app)
+    if router is not None:
+        router.record_write(current_jwt_user())
+
+
+def init_replicas(app: Flask) -> None:
+    if not sqlalchemy.event.contains(db.session, "after_commit", _record_write):
+        sqlalchemy.event.listen(db.session, "after_commit", _record_write)
+
+
+def is_replica_session() -> bool:
+    return bool(db.session.info.get(REPLICA_SESSION_KEY))
+
+
+@contextlib.contextmanager
+def primary_session() -> Iterator[Session]:
+    """
+    The request's session if it uses the primary, otherwise a separate session on
+    the primary for as long as the context lasts. For reads whose results outlive the
+    request (e.g. are cached), so mustn't be out of date.
+    """
+    if not is_replica_session():
+        yield db.session
+        return
+    session: Session = db.session.session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def read_replica(f: Callable) -> Callable:
+    """
+    Decorator for read-only endpoints, which routes all of the endpoint's queries to
+    a read replica if there's a suitable one.
+    """
+
+    @functools.wraps(f)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        router = _get_router(current_app)
+        # If the request has already used the primary, keep using it.
+        if router is not None and not db.session.registry.has():
+            engine = router.choose_engine(current_jwt_user())
+            if engine is None:
+                metrics.DB_READS_ROUTED.labels("primary").inc()
+            else:
+                metrics.DB_READS_ROUTED.labels("replica").inc()
+                session = db.session.session_factory(
+                    bind=engine,
+                    binds={table: engine for table in db.get_tables_for_bind()},
+                )
+                session.info[REPLICA_SESSION_KEY] = True
+                db.session.registry.set(session)
+        return f(*args, **kwargs)
+
+    return wrapper
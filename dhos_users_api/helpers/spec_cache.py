@@ -0,0 +1,58 @@
+"""
+Caches the parsed OpenAPI specification as JSON, which is much quicker to load at
+startup than the YAML it is built from. Generate the cache as part of the build with:
+
+    python -m dhos_users_api.helpers.spec_cache
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Union
+
+import yaml
+from she_logging import logger
+
+OPENAPI_DIR: Path = Path(__file__).parent.parent / "openapi"
+SPEC_FILE: Path = OPENAPI_DIR / "openapi.yaml"
+SPEC_CACHE_FILE: Path = OPENAPI_DIR / "openapi.cache.json"
+
+
+def spec_hash(spec_path: Path) -> str:
+    return hashlib.sha256(spec_path.read_bytes()).hexdigest()
+
+
+def write_spec_cache(
+    spec_path: Path = SPEC_FILE, cache_path: Path = SPEC_CACHE_FILE
+) -> None:
+    """Parses the specification and writes it to the cache, keyed by its hash."""
+    spec: Dict = yaml.safe_load(spec_path.read_bytes())
+    cache_path.write_text(json.dumps({"sha256": spec_hash(spec_path), "spec": spec}))
+
+
+def load_spec(
+    spec_path: Path = SPEC_FILE, cache_path: Path = SPEC_CACHE_FILE
+) -> Union[Dict, str]:
+    """
+    Returns the parsed specification from the cache if the cache was built from the
+    current specification. Otherwise returns the name of the specification file, for
+    connexion to parse itself.
+    """
+    try:
+        cache: Dict = json.loads(cache_path.read_bytes())
+    except FileNotFoundError:
+        logger.debug("No OpenAPI spec cache at %s", cache_path)
+        return spec_path.name
+    except ValueError:
+        logger.warning("Ignoring invalid OpenAPI spec cache at %s", cache_path)
+        return spec_path.name
+
+    if cache.get("sha256") != spec_hash(spec_path):
+        logger.warning("Ignoring stale OpenAPI spec cache at %s", cache_path)
+        return spec_path.name
+
+    return cache["spec"]
+
+
+if __name__ == "__main__":
+    write_spec_cache()
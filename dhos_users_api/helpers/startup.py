@@ -0,0 +1,38 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from she_logging import logger
+
+
+class StartupProfiler:
+    """
+    Times each phase of app creation. If enabled, the timings are logged as a single
+    record by report().
+    """
+
+    def __init__(self, enabled: bool, started_at: float) -> None:
+        self.enabled = enabled
+        self.started_at = started_at
+        # Everything before the profiler is created counts as importing.
+        self.phases: Dict[str, float] = {"imports": time.perf_counter() - started_at}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def report(self) -> None:
+        if not self.enabled:
+            return
+        phases_ms = {name: round(t * 1000, 1) for name, t in self.phases.items()}
+        total_ms = round((time.perf_counter() - self.started_at) * 1000, 1)
+        logger.info(
+            "Startup took %sms: %s",
+            total_ms,
+            ", ".join(f"{name} {t}ms" for name, t in phases_ms.items()),
+            extra={"startup_phases_ms": phases_ms, "startup_total_ms": total_ms},
+        )
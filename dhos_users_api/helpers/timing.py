@@ -0,0 +1,102 @@
+"""
+Times the phases of handling each request (loading, validating, committing, calling
+Auth0, publishing etc), so slow requests can be diagnosed from the logs.
+
+Wrap a phase in `with timing.phase("name"):`. The time spent in each phase is added
+up over the request and logged in a single record when the request finishes: at
+INFO if the request took longer than REQUEST_TIMING_LOG_THRESHOLD_MS, otherwise at
+DEBUG, along with the number of SQL statements the request ran (see query_stats).
+Set SERVER_TIMING_HEADER to also return it in a Server-Timing header. Phases can be
+nested, so they may add up to more than the whole request.
+"""
+
+import contextlib
+import logging
+import time
+from typing import Dict, Iterator
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from flask_batteries_included.sqldb import db
+from she_logging import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from dhos_users_api.helpers import query_stats
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Adds time spent in a phase to the current request's timings, if there's a request.
+    """
+    if has_request_context() and "phase_timings" in g:
+        g.phase_timings[name] = g.phase_timings.get(name, 0) + seconds
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Times the enclosed block as part of phase name. Does nothing outside a request.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def _start_request() -> None:
+    g.request_started = time.perf_counter()
+    g.phase_timings = {}
+
+
+def _finish_request(response: Response) -> Response:
+    if "request_started" not in g:
+        return response
+    duration_ms = (time.perf_counter() - g.request_started) * 1000
+    phases_ms: Dict[str, float] = {
+        name: round(seconds * 1000, 2) for name, seconds in g.phase_timings.items()
+    }
+    sql = query_stats.current_stats()
+    slow = duration_ms > current_app.config["REQUEST_TIMING_LOG_THRESHOLD_MS"]
+    logger.log(
+        logging.INFO if slow else logging.DEBUG,
+        "%s %s took %.1f ms",
+        request.method,
+        request.endpoint or request.path,
+        duration_ms,
+        extra={
+            "requestTiming": {
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 2),
+                "phases_ms": phases_ms,
+                "sql": sql.to_dict() if sql else None,
+            }
+        },
+    )
+    if current_app.config["SERVER_TIMING_HEADER"]:
+        response.headers["Server-Timing"] = ", ".join(
+            [f"{name};dur={ms}" for name, ms in phases_ms.items()]
+            + ([f"sql;dur={sql.seconds * 1000:.2f}"] if sql else [])
+            + [f"total;dur={duration_ms:.2f}"]
+        )
+    return response
+
+
+def _start_commit(session: Session) -> None:
+    if has_request_context():
+        g.commit_started = time.perf_counter()
+
+
+def _finish_commit(session: Session) -> None:
+    if has_request_context() and "commit_started" in g:
+        record("commit", time.perf_counter() - g.pop("commit_started"))
+
+
+def init_request_timing(app: Flask) -> None:
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    # Every commit is timed, wherever it happens.
+    if not event.contains(db.session, "before_commit", _start_commit):
+        event.listen(db.session, "before_commit", _start_commit)
+        event.listen(db.session, "after_commit", _finish_commit)
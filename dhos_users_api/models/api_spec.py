@@ -455,6 +455,83 @@ class ClinicianUpdateRequest(ClinicianAllFieldsAsOptional):
         ordered = True
 
 
+@openapi_schema(dhos_users_api_spec)
+class ClinicianBulkUpdateItem(Schema):
+    class Meta:
+        description = "Clinician bulk update item"
+        unknown = EXCLUDE
+        ordered = True
+
+    clinician_id = fields.String(
+        required=True,
+        metadata={
+            "description": "UUID of the clinician to update",
+            "example": "bba65af9-88d3-459b-8c09-c359873828f7",
+        },
+    )
+    update = fields.Nested(
+        ClinicianUpdateRequest(),
+        required=True,
+        metadata={"description": "Fields to update on the clinician"},
+    )
+
+
+@openapi_schema(dhos_users_api_spec)
+class ClinicianBulkUpdateResult(Schema):
+    class Meta:
+        description = "Outcome of a single clinician update in a bulk update"
+        unknown = EXCLUDE
+        ordered = True
+
+    clinician_id = fields.String(
+        required=True,
+        metadata={
+            "description": "UUID of the clinician",
+            "example": "bba65af9-88d3-459b-8c09-c359873828f7",
+        },
+    )
+    result = fields.String(
+        required=True,
+        validate=validate.OneOf(
+            [
+                "updated",
+                "unchanged",
+                "not_found",
+                "forbidden",
+                "invalid",
+                "duplicate",
+            ]
+        ),
+        metadata={"description": "Outcome of the update", "example": "updated"},
+    )
+    error = fields.String(
+        required=False,
+        metadata={
+            "description": "Reason the update was not applied",
+            "example": "Insufficient privileges to edit permanent user",
+        },
+    )
+
+
+@openapi_schema(dhos_users_api_spec)
+class ClinicianBulkUpdateResponse(Schema):
+    class Meta:
+        description = "Clinician bulk update response"
+        unknown = EXCLUDE
+        ordered = True
+
+    updated = fields.Integer(
+        required=True,
+        metadata={"description": "Number of clinicians updated", "example": 2000},
+    )
+    results = fields.Nested(
+        ClinicianBulkUpdateResult(),
+        required=True,
+        many=True,
+        metadata={"description": "Outcome for each item, in request order"},
+    )
+
+
 @openapi_schema(dhos_users_api_spec)
 class ClinicianPasswordUpdateRequest(Schema):
     class Meta:
@@ -508,6 +585,91 @@ class CliniciansResponse(Schema):
     )
 
 
+class ClinicianChangeRemovals(Schema):
+    class Meta:
+        ordered = True
+
+    locations = fields.List(
+        fields.String(),
+        required=True,
+        metadata={
+            "description": "UUIDs of locations removed from the clinician",
+            "example": ["2c4f1d4e-3f1a-4b0e-9a9c-8c1d6a0b5e21"],
+        },
+    )
+    groups = fields.List(
+        fields.String(),
+        required=True,
+        metadata={
+            "description": "Groups removed from the clinician",
+            "example": ["SEND Clinician"],
+        },
+    )
+    products = fields.List(
+        fields.String(),
+        required=True,
+        metadata={
+            "description": "UUIDs of products removed from the clinician",
+            "example": [],
+        },
+    )
+
+
+class ClinicianChangeSchema(Schema):
+    class Meta:
+        ordered = True
+
+    sequence = fields.Integer(
+        required=True,
+        metadata={"description": "Sequence number of the change", "example": 1043},
+    )
+    clinician_id = fields.String(
+        required=True,
+        metadata={
+            "description": "UUID of the clinician",
+            "example": "bba65af9-88d3-459b-8c09-c359873828f7",
+        },
+    )
+    changed = fields.String(
+        required=True,
+        metadata={
+            "description": "When the change was made",
+            "example": "2020-01-01T00:00:00.000Z",
+        },
+    )
+    removed = fields.Nested(ClinicianChangeRemovals(), required=True)
+    clinician = fields.Nested(
+        ClinicianResponse(),
+        required=True,
+        allow_none=True,
+        metadata={"description": "Current details of the clinician"},
+    )
+
+
+@openapi_schema(dhos_users_api_spec)
+class ClinicianChangesResponse(Schema):
+    class Meta:
+        description = "Changes to clinicians"
+        unknown = EXCLUDE
+        ordered = True
+
+    changes = fields.List(fields.Nested(ClinicianChangeSchema()), required=True)
+    next_since = fields.Integer(
+        required=True,
+        metadata={
+            "description": "Sequence number to pass as since to get the next changes",
+            "example": 1142,
+        },
+    )
+    more = fields.Boolean(
+        required=True,
+        metadata={
+            "description": "Whether there are more changes available now",
+            "example": False,
+        },
+    )
+
+
 class ClinicianLocations(Schema):
     class Meta:
         ordered = True
@@ -0,0 +1,32 @@
+from typing import Any, Dict
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import BigInteger, Column, DateTime, String, func
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+class ClinicianChange(db.Model):
+    """
+    A committed change to a clinician (or their products or terms agreements), in
+    commit order. See dhos_users_api.helpers.change_feed.
+    """
+
+    sequence = Column(BigInteger, primary_key=True)
+    clinician_id = Column(String, nullable=False)
+    changed = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Tombstones: what was taken away from the clinician by this change.
+    removed_locations = Column(ARRAY(String), nullable=True)
+    removed_groups = Column(ARRAY(String), nullable=True)
+    removed_products = Column(ARRAY(String), nullable=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sequence": self.sequence,
+            "clinician_id": self.clinician_id,
+            "changed": self.changed,
+            "removed": {
+                "locations": self.removed_locations or [],
+                "groups": self.removed_groups or [],
+                "products": self.removed_products or [],
+            },
+        }
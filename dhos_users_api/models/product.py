@@ -1,3 +1,4 @@
+import functools
 from typing import Any, Dict, Optional
 
 from flask_batteries_included.helpers import generate_uuid
@@ -40,6 +41,7 @@ class Product(ModelIdentifier, db.Model):
         self.modified_by_ = value
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def schema(cls) -> Dict[str, Dict[str, type]]:
         return {
             "optional": {"closed_date": str},
@@ -45,20 +45,24 @@ class TermsAgreement(ModelIdentifier, db.Model):
         if not uuid:
             uuid = generate_uuid()
 
-        ta = TermsAgreement(uuid=uuid, **kw)
-
-        # Default timestamps if required.
-        time_now = datetime.now(tz=timezone.utc)
-        if ta.version and not ta.accepted_timestamp:
-            ta.accepted_timestamp = time_now
-        if ta.tou_version and not ta.tou_accepted_timestamp:
-            ta.tou_accepted_timestamp = time_now
-        if ta.patient_notice_version and not ta.patient_notice_accepted_timestamp:
-            ta.patient_notice_accepted_timestamp = time_now
-
+        ta = TermsAgreement(uuid=uuid, **cls.with_default_timestamps(kw))
         db.session.add(ta)
         return ta
 
+    @staticmethod
+    def with_default_timestamps(kw: Dict[str, Any]) -> Dict[str, Any]:
+        """Defaults the accepted timestamp for each version that has been agreed to."""
+        time_now = datetime.now(tz=timezone.utc)
+        kw = dict(kw)
+        for version_key, timestamp_key in (
+            ("version", "accepted_timestamp"),
+            ("tou_version", "tou_accepted_timestamp"),
+            ("patient_notice_version", "patient_notice_accepted_timestamp"),
+        ):
+            if kw.get(version_key) and not kw.get(timestamp_key):
+                kw[timestamp_key] = time_now
+        return kw
+
     def to_dict(self) -> Dict[str, Any]:
         result = {
             "product_name": self.product_name,
@@ -1,8 +1,10 @@
 import codecs
+import functools
 import itertools
 import string
 from typing import Any, Dict, List, Optional, Sequence
 
+import sqlalchemy
 from Cryptodome.Protocol.KDF import scrypt
 from Cryptodome.Random import random as crr
 from flask_batteries_included.helpers import generate_uuid
@@ -11,9 +13,18 @@ from she_logging import logger
 from sqlalchemy import Boolean, Column, Date, String
 from sqlalchemy.dialects.postgresql import ARRAY
 
+from dhos_users_api.helpers import metrics, timing
 from dhos_users_api.models.product import Product
 from dhos_users_api.models.terms_agreement import TermsAgreement
 
+# Source of generated badge numbers, see dhos_users_api.helpers.badges.
+send_entry_identifier_seq = sqlalchemy.Sequence(
+    "send_entry_identifier_seq",
+    minvalue=1,
+    maxvalue=999_999_999,
+    metadata=db.metadata,
+)
+
 
 class User(ModelIdentifier, db.Model):
     nhs_smartcard_number = Column(String, nullable=True, index=True)
@@ -29,7 +40,7 @@ class User(ModelIdentifier, db.Model):
     agency_name = Column(String, nullable=True)
     agency_staff_employee_number = Column(String, nullable=True)
     booking_reference = Column(String, nullable=True)
-    contract_expiry_eod_date = Column(Date, nullable=True)
+    contract_expiry_eod_date = Column(Date, nullable=True, index=True)
     password_hash = Column(String, nullable=True)
     password_salt = Column(String, nullable=True)
     login_active = Column(Boolean, nullable=False, default=True)
@@ -87,7 +98,8 @@ class User(ModelIdentifier, db.Model):
             raise RuntimeError("Password_salt does not exist")
         code_bytes = bytes(password, "utf8")
         salt_bytes = bytes(self.password_salt, "utf8")
-        _hash: bytes = scrypt(code_bytes, salt_bytes, 256, 16384, 8, 1)  # type: ignore
+        with timing.phase("password_hash"), metrics.PASSWORD_HASH_SECONDS.time():
+            _hash: bytes = scrypt(code_bytes, salt_bytes, 256, 16384, 8, 1)  # type: ignore
         return codecs.encode(_hash, "hex_codec").decode()
 
     def set_password(self, password: str) -> None:
@@ -237,6 +249,7 @@ class User(ModelIdentifier, db.Model):
             setattr(self, k, kw[k])
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def schema(cls) -> Dict:
         return {
             "optional": {
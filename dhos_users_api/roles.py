@@ -1,6 +1,14 @@
+import json
+import time
 from enum import Enum
 from functools import lru_cache
-from typing import FrozenSet
+from pathlib import Path
+from threading import Lock
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional
+
+from flask import Flask
+from she_logging import logger
 
 
 class UserRole(Enum):
@@ -477,18 +485,128 @@ ROLE_MAPPING: dict[str, list[str]] = {
 }
 
 
+class CompiledRoleMapping:
+    """
+    Immutable lookup of role name -> permissions, built from a raw mapping such as
+    `ROLE_MAPPING` or the contents of a role mapping file. Instances are swapped
+    atomically on reload and are used as part of the permission cache key, so a
+    cached result can never outlive the mapping it was computed from.
+    """
+
+    def __init__(self, mapping: Mapping[str, Iterable[str]], source: str) -> None:
+        self.source = source
+        self._permissions: Mapping[str, FrozenSet[str]] = MappingProxyType(
+            {role: frozenset(permissions) for role, permissions in mapping.items()}
+        )
+
+    @property
+    def roles(self) -> Iterable[str]:
+        return self._permissions.keys()
+
+    def permissions_for_role(self, role: str) -> FrozenSet[str]:
+        return self._permissions[role]
+
+
+class _RoleMappingState:
+    def __init__(self) -> None:
+        self.mapping: CompiledRoleMapping = CompiledRoleMapping(
+            ROLE_MAPPING, source="built-in"
+        )
+        self.path: Optional[Path] = None
+        self.mtime: Optional[float] = None
+        self.reload_interval: float = 5.0
+        self.next_check: float = 0.0
+        self.lock = Lock()
+
+
+_state = _RoleMappingState()
+
+
+def init_roles(app: Flask) -> None:
+    """
+    Configures where role mappings are loaded from. If `ROLE_MAPPING_FILE` is set the
+    file is loaded immediately (failing fast if it is invalid) and then re-checked for
+    changes at most once every `ROLE_MAPPING_RELOAD_INTERVAL` seconds.
+    """
+    path: Optional[str] = app.config.get("ROLE_MAPPING_FILE")
+    _state.reload_interval = float(app.config.get("ROLE_MAPPING_RELOAD_INTERVAL", 5))
+    if not path:
+        _state.path = None
+        set_role_mapping(ROLE_MAPPING, source="built-in")
+        return
+
+    _state.path = Path(path)
+    _state.mtime = _state.path.stat().st_mtime
+    set_role_mapping(load_role_mapping_file(_state.path), source=str(_state.path))
+    _state.next_check = time.monotonic() + _state.reload_interval
+
+
+def load_role_mapping_file(path: Path) -> Dict[str, List[str]]:
+    """Loads a JSON file mapping role names to lists of permissions."""
+    mapping = json.loads(path.read_text())
+    if not isinstance(mapping, dict) or not all(
+        isinstance(role, str)
+        and isinstance(permissions, list)
+        and all(isinstance(p, str) for p in permissions)
+        for role, permissions in mapping.items()
+    ):
+        raise ValueError(f"Invalid role mapping in {path}")
+    return mapping
+
+
+def set_role_mapping(mapping: Mapping[str, Iterable[str]], source: str) -> None:
+    """Compiles and swaps in a new role mapping, invalidating cached permissions."""
+    _state.mapping = CompiledRoleMapping(mapping, source=source)
+    _get_permissions_for_roles_with_lru_cache.cache_clear()
+    _get_role_map_with_lru_cache.cache_clear()
+    logger.info("Loaded role mapping from %s", source)
+
+
+def _reload_if_changed() -> None:
+    if _state.path is None or time.monotonic() < _state.next_check:
+        return
+    # Only one thread needs to check; everyone else carries on with the current mapping.
+    if not _state.lock.acquire(blocking=False):
+        return
+    try:
+        _state.next_check = time.monotonic() + _state.reload_interval
+        mtime = _state.path.stat().st_mtime
+        if mtime != _state.mtime:
+            set_role_mapping(
+                load_role_mapping_file(_state.path), source=str(_state.path)
+            )
+            _state.mtime = mtime
+    except (OSError, ValueError):
+        logger.exception("Failed to reload role mapping, keeping current mapping")
+    finally:
+        _state.lock.release()
+
+
 def get_permissions_for_roles(roles: list[str]) -> list[str]:
-    return _get_permissions_for_roles_with_lru_cache(frozenset(roles))
+    _reload_if_changed()
+    return _get_permissions_for_roles_with_lru_cache(frozenset(roles), _state.mapping)
 
 
 @lru_cache
-def _get_permissions_for_roles_with_lru_cache(roles: FrozenSet) -> list[str]:
+def _get_permissions_for_roles_with_lru_cache(
+    roles: FrozenSet, mapping: CompiledRoleMapping
+) -> list[str]:
     user_permissions: set[str] = set()
     for r in roles:
-        user_permissions |= set(ROLE_MAPPING[r])
+        user_permissions |= mapping.permissions_for_role(r)
     return list(user_permissions)
 
 
-@lru_cache
 def get_role_map() -> dict[str, list[str]]:
-    return {r.value: get_permissions_for_roles([r.value]) for r in UserRole}
+    _reload_if_changed()
+    return _get_role_map_with_lru_cache(_state.mapping)
+
+
+@lru_cache
+def _get_role_map_with_lru_cache(
+    mapping: CompiledRoleMapping,
+) -> dict[str, list[str]]:
+    return {
+        r: _get_permissions_for_roles_with_lru_cache(frozenset([r]), mapping)
+        for r in mapping.roles
+    }
@@ -0,0 +1,237 @@
+"""
+Production server. A master process opens the listening socket and forks
+SERVER_WORKERS worker processes, each of which creates the app and serves requests
+from the shared socket using waitress with SERVER_THREADS threads. Using several
+processes lets CPU-heavy requests (e.g. password hashing on login) use more than one
+core.
+
+The master restarts workers that exit unexpectedly. Signals:
+- SIGHUP: gracefully replaces all workers, e.g. to pick up a new ROLE_MAPPING_FILE
+  or database credentials. Code changes need a restart.
+- SIGTERM/SIGINT: gracefully shuts down all workers, then exits.
+
+Workers write their Prometheus metrics to files in PROMETHEUS_MULTIPROC_DIR (by
+default a temporary directory), so /metrics reports the total across workers
+whichever worker serves it.
+"""
+
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from types import FrameType
+from typing import Callable, Dict, List, Optional
+
+from environs import Env
+from flask import Flask
+from she_logging import logger
+from waitress import serve
+from waitress.task import ThreadedTaskDispatcher
+
+
+class ServerConfig:
+    def __init__(self) -> None:
+        env = Env()
+        self.host: str = env.str("SERVER_HOST", "0.0.0.0")  # NOSONAR
+        self.port: int = env.int("SERVER_PORT", 5000)
+        self.workers: int = env.int("SERVER_WORKERS", 1)
+        self.threads: int = env.int("SERVER_THREADS", 4)
+        self.backlog: int = env.int("SERVER_BACKLOG", 1024)
+        self.graceful_timeout: int = env.int("SERVER_GRACEFUL_TIMEOUT", 30)
+        # Each worker has its own connection pool. By default size it so every
+        # thread in the worker can hold a connection.
+        self.pool_size: int = env.int("SQLALCHEMY_POOL_SIZE", self.threads)
+        self.metrics_dir: Optional[str] = env.str("PROMETHEUS_MULTIPROC_DIR", None)
+
+
+class PreforkServer:
+    def __init__(self, config: ServerConfig, app_factory: Callable[[], Flask]) -> None:
+        self.config = config
+        self.app_factory = app_factory
+        self.workers: Dict[int, float] = {}  # pid -> time started
+        self.socket: Optional[socket.socket] = None
+        self._stopping = False
+        self._reload_requested = False
+
+    def run(self) -> None:
+        self.socket = socket.create_server(
+            (self.config.host, self.config.port), backlog=self.config.backlog
+        )
+        logger.info(
+            "Listening on %s:%d with %d worker(s) of %d thread(s)",
+            self.config.host,
+            self.config.port,
+            self.config.workers,
+            self.config.threads,
+        )
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        for _ in range(self.config.workers):
+            self._spawn_worker()
+
+        while not self._stopping:
+            if self._reload_requested:
+                self._reload_requested = False
+                self._reload()
+            self._reap_workers(respawn=True)
+            time.sleep(0.2)
+
+        self._stop_workers(list(self.workers))
+        self.socket.close()
+        logger.info("Server stopped")
+
+    def _handle_stop(self, signum: int, frame: Optional[FrameType]) -> None:
+        self._stopping = True
+
+    def _handle_reload(self, signum: int, frame: Optional[FrameType]) -> None:
+        self._reload_requested = True
+
+    def _spawn_worker(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+
+        # In the worker process.
+        exit_code = 0
+        try:
+            self._run_worker()
+        except Exception:
+            logger.exception("Worker %d failed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _run_worker(self) -> None:
+        for signum in (signal.SIGHUP, signal.SIGINT):
+            signal.signal(signum, signal.SIG_IGN)
+        # waitress finishes in-flight requests when its loop is interrupted.
+        signal.signal(signal.SIGTERM, _raise_system_exit)
+        app = self.app_factory()
+        dispatcher = _TaskDispatcher(shutdown_timeout=self.config.graceful_timeout)
+        dispatcher.set_thread_count(self.config.threads)
+        logger.info("Worker %d started", os.getpid())
+        serve(
+            app,
+            sockets=[self.socket],
+            threads=self.config.threads,
+            backlog=self.config.backlog,
+            _quiet=True,
+            _dispatcher=dispatcher,
+        )
+        logger.info("Worker %d stopped", os.getpid())
+
+    def _reap_workers(self, respawn: bool) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            _mark_metrics_dead(pid)
+            exit_code = os.waitstatus_to_exitcode(status)
+            logger.log(
+                logging.INFO if exit_code == 0 else logging.WARNING,
+                "Worker %d exited with status %d",
+                pid,
+                exit_code,
+            )
+            if respawn and not self._stopping:
+                # Don't spin if workers are failing on startup.
+                if time.monotonic() - started < 1:
+                    time.sleep(1)
+                self._spawn_worker()
+
+    def _reload(self) -> None:
+        logger.info("Reloading workers")
+        old_workers = list(self.workers)
+        for _ in range(self.config.workers):
+            self._spawn_worker()
+        self._stop_workers(old_workers)
+
+    def _stop_workers(self, pids: List[int]) -> None:
+        for pid in pids:
+            _signal_worker(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.config.graceful_timeout
+        while any(pid in self.workers for pid in pids):
+            if time.monotonic() > deadline:
+                logger.warning("Killing workers that didn't stop in time")
+                for pid in pids:
+                    if pid in self.workers:
+                        _signal_worker(pid, signal.SIGKILL)
+                deadline = float("inf")
+            self._reap_workers(respawn=False)
+            time.sleep(0.1)
+
+
+class _TaskDispatcher(ThreadedTaskDispatcher):
+    """
+    waitress waits at most 5 seconds for in-flight requests when it shuts down. This
+    waits SERVER_GRACEFUL_TIMEOUT instead.
+    """
+
+    def __init__(self, shutdown_timeout: int) -> None:
+        super().__init__()
+        self.shutdown_timeout = shutdown_timeout
+
+    def shutdown(self, cancel_pending: bool = True, timeout: int = 5) -> bool:
+        return super().shutdown(
+            cancel_pending=cancel_pending, timeout=self.shutdown_timeout
+        )
+
+
+def _raise_system_exit(signum: int, frame: Optional[FrameType]) -> None:
+    raise SystemExit(0)
+
+
+def _signal_worker(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def _mark_metrics_dead(pid: int) -> None:
+    """
+    Stops reporting the live gauges of a worker that has exited.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return
+    # Only imported here: prometheus_client picks single or multiprocess mode when
+    # it's first imported, which has to be after PROMETHEUS_MULTIPROC_DIR is set.
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(pid)
+
+
+def _init_metrics_dir(metrics_dir: str) -> None:
+    os.makedirs(metrics_dir, exist_ok=True)
+    # Files left by a previous run would be added to this one's metrics.
+    for name in os.listdir(metrics_dir):
+        if name.endswith(".db"):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def main() -> None:
+    config = ServerConfig()
+    # The app reads its config when it's imported.
+    os.environ["SQLALCHEMY_POOL_SIZE"] = str(config.pool_size)
+    metrics_dir = config.metrics_dir or tempfile.mkdtemp(prefix="dhos-users-metrics-")
+    _init_metrics_dir(metrics_dir)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    from dhos_users_api.app import create_app
+
+    try:
+        PreforkServer(config=config, app_factory=create_app).run()
+    finally:
+        if not config.metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
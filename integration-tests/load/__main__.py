@@ -0,0 +1,94 @@
+"""
+Drives a workload against a running dhos-users-api with a number of concurrent
+simulated users, then prints the throughput and latency percentiles of each
+endpoint. Exits with status 1 if more than --max-error-rate of requests failed.
+
+    python -m load --workload mixed --users 20 --duration 60
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+import traceback
+from typing import List
+
+from load.stats import Stats
+from load.workloads import WORKLOADS, Directory, seed
+
+
+def _simulated_user(
+    workload: str,
+    stats: Stats,
+    directory: Directory,
+    rng: random.Random,
+    deadline: float,
+) -> None:
+    scenarios = list(WORKLOADS[workload])
+    weights = list(WORKLOADS[workload].values())
+    while time.monotonic() < deadline:
+        (scenario,) = rng.choices(scenarios, weights=weights)
+        try:
+            scenario(stats, directory, rng)
+        except Exception:
+            # Already recorded as a failure; keep the load up.
+            traceback.print_exc()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m load", description=__doc__)
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--users", type=int, default=10, help="concurrent users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--clinicians", type=int, default=2000)
+    parser.add_argument("--locations", type=int, default=50)
+    parser.add_argument(
+        "--logins", type=int, default=50, help="clinicians given a password"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    print(
+        f"Seeding {args.clinicians} clinicians at {args.locations} locations",
+        flush=True,
+    )
+    directory = seed(args.clinicians, args.locations, args.logins)
+
+    print(
+        f"Running '{args.workload}' with {args.users} users for {args.duration}s",
+        flush=True,
+    )
+    stats = Stats()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(
+            target=_simulated_user,
+            args=(
+                args.workload,
+                stats,
+                directory,
+                random.Random(args.seed + i),
+                deadline,
+            ),
+        )
+        for i in range(args.users)
+    ]
+    stats.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.stop()
+
+    print(stats.report())
+    if stats.error_rate > args.max_error_rate:
+        print(f"Error rate {stats.error_rate:.2%} exceeds {args.max_error_rate:.2%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,102 @@
+"""
+A stand-in for the parts of Auth0 the service calls when it changes a clinician's
+groups: the token endpoint and the authorization extension's groups API. Each
+response is delayed by AUTH0_STUB_LATENCY_MS, so load tests see roughly the cost of
+calling the real thing without depending on it.
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+GROUP_NAMES = [
+    "DBM Clinician",
+    "DBM Superclinician",
+    "DEA Collector",
+    "EPR Service Adapter",
+    "GDM Administrator",
+    "GDM Clinician",
+    "GDM Patient",
+    "GDM Superclinician",
+    "SEND Administrator",
+    "SEND Clinician",
+    "SEND Entry Clinician",
+    "SEND Entry Device",
+    "SEND Superclinician",
+]
+
+GROUPS = [
+    {
+        "_id": str(uuid.uuid5(uuid.NAMESPACE_DNS, name)),
+        "name": name,
+        "description": name,
+        "mappings": [],
+        "members": [],
+        "roles": [],
+    }
+    for name in GROUP_NAMES
+]
+
+LATENCY = int(os.environ.get("AUTH0_STUB_LATENCY_MS", "100")) / 1000
+
+_USER_GROUPS = re.compile(r"^/authz/users/[^/]+/groups$")
+_GROUP_MEMBERS = re.compile(r"^/authz/groups/[^/]+/members$")
+
+
+class Auth0StubHandler(BaseHTTPRequestHandler):
+    def _respond(self, status: int, body: Optional[Dict] = None) -> None:
+        time.sleep(LATENCY)
+        self.send_response(status)
+        if body is None:
+            self.end_headers()
+            return
+        payload = json.dumps(body).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self) -> None:
+        if self.path == "/authz/groups":
+            self._respond(200, {"groups": GROUPS})
+        elif self.path == "/running":
+            self._respond(200, {})
+        else:
+            self._respond(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        self._read_body()
+        if self.path == "/oauth/token":
+            self._respond(200, {"access_token": "load-test", "expires_in": 86400})
+        else:
+            self._respond(404, {"error": "not found"})
+
+    def do_PATCH(self) -> None:
+        self._read_body()
+        self._respond(204 if _USER_GROUPS.match(self.path) else 404)
+
+    def do_DELETE(self) -> None:
+        self._read_body()
+        self._respond(204 if _GROUP_MEMBERS.match(self.path) else 404)
+
+    def log_message(self, format: str, *args: object) -> None:
+        # One line per request would swamp the output of a load test.
+        pass
+
+
+def main() -> None:
+    port = int(os.environ.get("AUTH0_STUB_PORT", "8080"))
+    server = ThreadingHTTPServer(("0.0.0.0", port), Auth0StubHandler)
+    print(f"Auth0 stub listening on port {port}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, DefaultDict, Dict, List
+
+from requests import Response
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Stats:
+    """
+    Latencies and failures of each operation, recorded from many threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: DefaultDict[str, List[float]] = defaultdict(list)
+        self.failures: DefaultDict[str, int] = defaultdict(int)
+        self.started = time.monotonic()
+        self.finished = self.started
+
+    def record(self, operation: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[operation].append(seconds)
+            if not ok:
+                self.failures[operation] += 1
+
+    def timed(
+        self, operation: str, request: Callable[..., Response], *args: object
+    ) -> Response:
+        """
+        Makes a request with one of the users_api_client functions, recording how long
+        it took and whether it succeeded.
+        """
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = request(*args)
+            ok = response.ok
+            return response
+        finally:
+            self.record(operation, time.perf_counter() - started, ok)
+
+    def start(self) -> None:
+        self.started = time.monotonic()
+
+    def stop(self) -> None:
+        self.finished = time.monotonic()
+
+    @property
+    def requests(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.failures.values()) / self.requests if self.requests else 0.0
+
+    def report(self) -> str:
+        elapsed = max(self.finished - self.started, 1e-9)
+        lines = [
+            f"{'operation':<32} {'requests':>9} {'errors':>7} {'req/s':>8}"
+            f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        ]
+        rows: Dict[str, List[float]] = dict(sorted(self.latencies.items()))
+        rows["TOTAL"] = [s for v in self.latencies.values() for s in v]
+        for operation, latencies in rows.items():
+            ms = sorted(s * 1000 for s in latencies)
+            errors = (
+                sum(self.failures.values())
+                if operation == "TOTAL"
+                else self.failures[operation]
+            )
+            lines.append(
+                f"{operation:<32} {len(ms):>9} {errors:>7} {len(ms) / elapsed:>8.1f}"
+                f" {percentile(ms, 50):>8.1f} {percentile(ms, 95):>8.1f}"
+                f" {percentile(ms, 99):>8.1f} {(ms[-1] if ms else 0):>8.1f}"
+            )
+        return "\n".join(lines)
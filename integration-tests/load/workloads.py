@@ -0,0 +1,207 @@
+import random
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from clients import users_api_client
+from faker import Faker
+from helpers.jwt import get_system_token
+from load.stats import Stats
+
+fake = Faker()
+
+PASSWORD = "Load-test-password-1"
+
+
+class Directory:
+    """
+    The clinicians seeded for a load test, shared by every simulated user.
+    """
+
+    def __init__(self, clinicians: List[Dict], login_emails: List[str]) -> None:
+        self.clinicians = clinicians
+        self.uuids = [c["uuid"] for c in clinicians]
+        self.login_emails = login_emails
+        self.locations = sorted({loc for c in clinicians for loc in c["locations"]})
+
+
+def _clinician(i: int, locations: List[str]) -> Dict:
+    time_now = datetime.now(tz=timezone.utc).isoformat(timespec="milliseconds")
+    return {
+        "uuid": str(uuid.uuid4()),
+        "created_by": "load-test",
+        "created": time_now,
+        "modified_by": "load-test",
+        "modified": time_now,
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "job_title": random.choice(["doctor", "nurse", "midwife"]),
+        "phone_number": "",
+        "groups": ["SEND Clinician"],
+        "products": [{"product_name": "SEND", "opened_date": "2021-7-19"}],
+        "locations": random.sample(locations, k=random.randint(1, 3)),
+        "nhs_smartcard_number": str(random.randint(100000, 999999)),
+        "send_entry_identifier": str(random.randint(100000, 999999)),
+        "email_address": f"load-test-{i}@example.com",
+        "can_edit_ews": False,
+        "contract_expiry_eod_date": None,
+        "login_active": True,
+        "terms_agreements": [],
+    }
+
+
+def seed(clinicians: int, locations: int, logins: int) -> Directory:
+    """
+    Replaces all data with clinicians created in bulk, and sets the password of
+    logins of them so they can log in.
+    """
+    jwt = get_system_token()
+    users_api_client.drop_all_data(jwt)
+    location_ids = [str(uuid.uuid4()) for _ in range(locations)]
+    details = [_clinician(i, location_ids) for i in range(clinicians)]
+    for start in range(0, len(details), 500):
+        response = users_api_client.post_clinicians_bulk(
+            details[start : start + 500], jwt
+        )
+        assert response.status_code == 200, response.text
+    login_emails = [c["email_address"] for c in details[:logins]]
+    for email in login_emails:
+        response = users_api_client.update_clinician_password_by_email(
+            email, PASSWORD, jwt
+        )
+        assert response.status_code == 200, response.text
+    return Directory(details, login_emails)
+
+
+# Each scenario makes one request, or a few related ones, as a single simulated user.
+Scenario = Callable[[Stats, Directory, random.Random], None]
+
+
+def login(stats: Stats, directory: Directory, rng: random.Random) -> None:
+    stats.timed(
+        "GET /clinician/login",
+        users_api_client.clinician_login,
+        rng.choice(directory.login_emails),
+        PASSWORD,
+        get_system_token(),
+    )
+
+
+def list_clinicians(stats: Stats, directory: Directory, rng: random.Random) -> None:
+    stats.timed(
+        "GET /v2/clinicians",
+        users_api_client.get_clinicians_v2,
+        get_system_token(),
+    )
+
+
+def search_clinicians(stats: Stats, directory: Directory, rng: random.Random) -> None:
+    clinician = rng.choice(directory.clinicians)
+    stats.timed(
+        "GET /v2/clinicians?q=",
+        users_api_client.get_clinicians_v2,
+        get_system_token(),
+        clinician["last_name"][:3],
+    )
+
+
+def clinicians_at_location(
+    stats: Stats, directory: Directory, rng: random.Random
+) -> None:
+    stats.timed(
+        "GET /location/<id>/clinician",
+        users_api_client.get_clinicians_by_location,
+        rng.choice(directory.locations),
+        get_system_token(),
+    )
+
+
+def get_clinician(stats: Stats, directory: Directory, rng: random.Random) -> None:
+    stats.timed(
+        "GET /clinician/<id>",
+        users_api_client.get_clinician_by_id,
+        rng.choice(directory.uuids),
+        get_system_token(),
+    )
+
+
+def bulk_retrieve(stats: Stats, directory: Directory, rng: random.Random) -> None:
+    stats.timed(
+        "POST /clinician_list",
+        users_api_client.retrieve_clinicians_by_uuids,
+        rng.sample(directory.uuids, k=min(50, len(directory.uuids))),
+        get_system_token(),
+    )
+
+
+def bookmark_churn(stats: Stats, directory: Directory, rng: random.Random) -> None:
+    clinician_uuid = rng.choice(directory.uuids)
+    location = rng.choice(directory.locations)
+    stats.timed(
+        "POST /location/<id>/bookmark",
+        users_api_client.post_clinician_location_bookmark,
+        clinician_uuid,
+        location,
+        get_system_token(),
+    )
+    stats.timed(
+        "DELETE /location/<id>/bookmark",
+        users_api_client.delete_clinician_location_bookmark,
+        clinician_uuid,
+        location,
+        get_system_token(),
+    )
+
+
+def create_clinician(stats: Stats, directory: Directory, rng: random.Random) -> None:
+    # Adds the clinician to their groups in Auth0 and publishes to RabbitMQ.
+    clinician = _clinician(rng.randint(0, 10**9), directory.locations)
+    for key in ("uuid", "created", "created_by", "modified", "modified_by"):
+        del clinician[key]
+    clinician["email_address"] = f"load-test-{uuid.uuid4()}@example.com"
+    del clinician["terms_agreements"]
+    stats.timed(
+        "POST /clinician",
+        users_api_client.post_clinician,
+        clinician,
+        get_system_token(),
+    )
+
+
+def patch_burst(stats: Stats, directory: Directory, rng: random.Random) -> None:
+    # Several quick edits to the same clinician, as when an admin edits a profile.
+    clinician_uuid = rng.choice(directory.uuids)
+    for _ in range(3):
+        stats.timed(
+            "PATCH /clinician/<id>",
+            users_api_client.patch_clinician,
+            clinician_uuid,
+            {"job_title": rng.choice(["doctor", "nurse", "midwife"])},
+            get_system_token(),
+        )
+
+
+# Relative weights of the scenarios in each workload.
+WORKLOADS: Dict[str, Dict[Scenario, int]] = {
+    # Roughly the mix seen in production: mostly reads, with logins at shift changes.
+    "mixed": {
+        login: 15,
+        list_clinicians: 5,
+        search_clinicians: 10,
+        clinicians_at_location: 15,
+        get_clinician: 25,
+        bulk_retrieve: 15,
+        bookmark_churn: 10,
+        patch_burst: 5,
+        create_clinician: 2,
+    },
+    "login_storm": {login: 1},
+    "read": {
+        list_clinicians: 1,
+        search_clinicians: 2,
+        clinicians_at_location: 2,
+        get_clinician: 4,
+        bulk_retrieve: 2,
+    },
+    "write": {bookmark_churn: 2, patch_burst: 2, create_clinician: 1},
+}
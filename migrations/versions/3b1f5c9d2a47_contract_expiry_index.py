@@ -0,0 +1,29 @@
+"""contract expiry index
+
+Revision ID: 3b1f5c9d2a47
+Revises: e66d175c24d5
+Create Date: 2026-10-19 09:12:31.418206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3b1f5c9d2a47"
+down_revision = "e66d175c24d5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        op.f("ix_user_contract_expiry_eod_date"),
+        "user",
+        ["contract_expiry_eod_date"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_user_contract_expiry_eod_date"), table_name="user")
@@ -0,0 +1,43 @@
+"""clinician change feed
+
+Revision ID: 5c7e9b2d4f18
+Revises: 8d2e4a6c1f03
+Create Date: 2026-10-19 14:05:31.418226
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "5c7e9b2d4f18"
+down_revision = "8d2e4a6c1f03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "clinician_change",
+        sa.Column("sequence", sa.BigInteger(), nullable=False),
+        sa.Column("clinician_id", sa.String(), nullable=False),
+        sa.Column(
+            "changed",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("removed_locations", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("removed_groups", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("removed_products", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.PrimaryKeyConstraint("sequence"),
+    )
+    # Start the feed with every existing clinician, so it can be synced from scratch.
+    op.execute(
+        'INSERT INTO clinician_change (clinician_id) SELECT uuid FROM "user" ORDER BY created'
+    )
+
+
+def downgrade():
+    op.drop_table("clinician_change")
@@ -0,0 +1,29 @@
+"""badge number sequence
+
+Revision ID: 8d2e4a6c1f03
+Revises: 3b1f5c9d2a47
+Create Date: 2026-10-19 11:40:07.262913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateSequence, DropSequence
+
+
+# revision identifiers, used by Alembic.
+revision = "8d2e4a6c1f03"
+down_revision = "3b1f5c9d2a47"
+branch_labels = None
+depends_on = None
+
+send_entry_identifier_seq = sa.Sequence(
+    "send_entry_identifier_seq", minvalue=1, maxvalue=999_999_999
+)
+
+
+def upgrade():
+    op.execute(CreateSequence(send_entry_identifier_seq))
+
+
+def downgrade():
+    op.execute(DropSequence(send_entry_identifier_seq))
@@ -1,3 +1,4 @@
+import contextlib
 import os
 import signal
 import socket
@@ -5,7 +6,7 @@ import sys
 import time
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Generator, List, NoReturn, Tuple
+from typing import Any, Callable, ContextManager, Generator, List, NoReturn, Tuple
 from unittest.mock import Mock
 from urllib.parse import urlparse
 
@@ -88,11 +89,13 @@ def _wait_for_it(service: str, timeout: int = 30) -> None:
 @pytest.fixture(scope="session")
 def session_app() -> Flask:
     import dhos_users_api.app
+    import dhos_users_api.helpers.database
 
     app = dhos_users_api.app.create_app(testing=True)
     if os.environ.get("DATABASE_PORT"):
         # Override fbi use of sqlite to run tests with Postgres
         app.config.from_object(RealSqlDbConfig())
+        dhos_users_api.helpers.database.init_database_config(app)
     return app
 
 
@@ -108,6 +111,8 @@ def app(mocker: MockFixture, session_app: Flask) -> Flask:
     session_app.config["DISABLE_CREATE_USER_IN_AUTH0"] = True
     session_app.config["UNITTESTING"] = True
     session_app.config["ENVIRONMENT"] = "DEVELOPMENT"
+    # The database is emptied for each test.
+    session_app.extensions["clinician_cache"].clear()
     return session_app
 
 
@@ -122,6 +127,37 @@ def mock_publish(mocker: MockFixture) -> Mock:
     return mocker.patch.object(kombu_batteries_included, "publish_message")
 
 
+@pytest.fixture
+def query_budget() -> Callable[[int], ContextManager[List[str]]]:
+    """
+    Fails the test if the block runs more than max_statements SQL statements:
+
+        with query_budget(3):
+            client.get(...)
+    """
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @contextlib.contextmanager
+    def budget(max_statements: int) -> Generator[List[str], None, None]:
+        statements: List[str] = []
+
+        def count(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+            statements.append(statement)
+
+        event.listen(Engine, "after_cursor_execute", count)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "after_cursor_execute", count)
+        assert len(statements) <= max_statements, (
+            f"Ran {len(statements)} SQL statements, budget is {max_statements}:\n"
+            + "\n".join(statements)
+        )
+
+    return budget
+
+
 @pytest.fixture(autouse=True)
 def uses_sql_database() -> None:
     from flask_batteries_included.sqldb import db
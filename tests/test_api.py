@@ -1,4 +1,5 @@
 import base64
+import json
 import uuid
 from typing import Dict
 
@@ -244,6 +245,11 @@ class TestUsersApi:
 
         clinician_uuid: str = str(uuid.uuid4())
 
+        mocker.patch.object(
+            controller,
+            "get_clinician_version",
+            return_value="abc123",
+        )
         mock_method = mocker.patch.object(
             controller, "get_clinician_by_id", return_value=gdm_clinician_details
         )
@@ -256,6 +262,70 @@ class TestUsersApi:
         assert response.status_code == 200
         assert mock_method.call_count == 1
         assert response.headers["Content-Type"] == "application/json"
+        assert response.headers["ETag"] == '"abc123"'
+        assert "Last-Modified" not in response.headers
+
+    def test_get_clinician_by_uuid_conditional(
+        self,
+        client: FlaskClient,
+        mocker: MockerFixture,
+        send_clinician_uuid: str,
+    ) -> None:
+        get_clinician_by_id = mocker.spy(controller, "get_clinician_by_id")
+        url = f"/dhos/v1/clinician/{send_clinician_uuid}"
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = client.get(
+            url, headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert get_clinician_by_id.call_count == 1
+
+        controller.create_clinician_tos(
+            send_clinician_uuid, {"product_name": "SEND", "version": 2}
+        )
+        response = client.get(
+            url, headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json is not None
+        assert response.json["terms_agreement"]["SEND"]["version"] == 2
+
+    def test_get_clinician_by_uuid_product_removed(
+        self, client: FlaskClient, send_clinician_uuid: str
+    ) -> None:
+        url = f"/dhos/v1/clinician/{send_clinician_uuid}"
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.status_code == 200
+        assert response.json is not None
+        product_uuid = response.json["products"][0]["uuid"]
+        controller.remove_from_clinician(
+            send_clinician_uuid, {"products": [{"uuid": product_uuid}]}
+        )
+
+        response = client.get(
+            url,
+            headers={
+                "Authorization": "Bearer TOKEN",
+                "If-Modified-Since": response.headers["Date"],
+            },
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["products"] == []
+
+    def test_get_clinician_by_uuid_conditional_not_found(
+        self, client: FlaskClient
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/clinician/made_up",
+            headers={"Authorization": "Bearer TOKEN", "If-None-Match": '"abc123"'},
+        )
+        assert response.status_code == 404
 
     def test_get_clinician_by_email(
         self,
@@ -624,6 +694,70 @@ class TestUsersApi:
         assert mock_post.call_count == 1
         assert response.status_code == 200
 
+    def test_update_clinicians_bulk(
+        self, client: FlaskClient, mocker: MockerFixture
+    ) -> None:
+        mock_update: Mock = mocker.patch.object(
+            controller,
+            "update_clinicians_bulk",
+            return_value={
+                "updated": 1,
+                "results": [{"clinician_id": "UUID_1", "result": "updated"}],
+            },
+        )
+        updates = [{"clinician_id": "UUID_1", "update": {"login_active": False}}]
+
+        response = client.patch(
+            "/dhos/v1/clinician/bulk?temp_only=true",
+            headers={"Authorization": "Bearer TOKEN"},
+            json=updates,
+        )
+
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["updated"] == 1
+        mock_update.assert_called_once_with(updates=updates, edit_temp_only=True)
+
+    def test_update_clinicians_bulk_invalid(self, client: FlaskClient) -> None:
+        response = client.patch(
+            "/dhos/v1/clinician/bulk",
+            headers={"Authorization": "Bearer TOKEN"},
+            json=[{"update": {"login_active": False}}],
+        )
+        assert response.status_code == 400
+
+    def test_import_clinicians(
+        self,
+        client: FlaskClient,
+        mocker: MockerFixture,
+        bulk_create_clinician_request: list[dict],
+        jwt_clinician_migration: None,
+    ) -> None:
+        mock_import: Mock = mocker.patch.object(
+            controller,
+            "import_clinicians",
+            side_effect=lambda lines: (
+                {"line": n, "uuid": json.loads(line)["uuid"], "result": "created"}
+                for n, line in enumerate(lines, start=1)
+            ),
+        )
+        body = "\n".join(json.dumps(c) for c in bulk_create_clinician_request[:2])
+
+        response = client.post(
+            "/dhos/v1/clinician/import",
+            headers={"Authorization": "Bearer TOKEN"},
+            data=body,
+            content_type="application/x-ndjson",
+        )
+
+        assert mock_import.call_count == 1
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        results = [json.loads(line) for line in response.data.splitlines()]
+        assert [r["uuid"] for r in results] == [
+            c["uuid"] for c in bulk_create_clinician_request[:2]
+        ]
+
     def test_get_roles(self, client: FlaskClient, mocker: MockerFixture) -> None:
         mock_get: Mock = mocker.patch.object(
             controller,
@@ -0,0 +1,249 @@
+import asyncio
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+import pytest
+from flask import Flask, Response, g
+from flask.testing import FlaskClient
+from helper import create_clinician
+from pytest_mock import MockerFixture
+
+from dhos_users_api.asgi import AsyncReadApp, create_asgi_app
+from dhos_users_api.models.user import User
+
+AUTH = {"Authorization": "Bearer TOKEN"}
+
+
+@pytest.fixture
+def asgi_app(app: Flask) -> AsyncReadApp:
+    return create_asgi_app(app)
+
+
+def _request(
+    asgi_app: AsyncReadApp,
+    method: str,
+    path: str,
+    query_string: str = "",
+    headers: Optional[Dict[str, str]] = None,
+    json_body: Any = None,
+) -> Response:
+    headers = {**AUTH, **(headers or {})}
+    body = b""
+    if json_body is not None:
+        body = json.dumps(json_body).encode()
+        headers["Content-Type"] = "application/json"
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query_string.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "server": ("localhost", 5000),
+        "client": ("127.0.0.1", 12345),
+    }
+    sent: List[Dict] = []
+
+    async def receive() -> Dict:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: Dict) -> None:
+        sent.append(message)
+
+    async def run() -> None:
+        try:
+            await asgi_app(scope, receive, send)
+        finally:
+            # asyncpg connections belong to the event loop they were opened in.
+            await asgi_app.engine.dispose()
+
+    asyncio.run(run())
+    start, body_message = sent
+    return Response(
+        body_message["body"],
+        status=start["status"],
+        headers=[(k.decode(), v.decode()) for k, v in start["headers"]],
+    )
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestAsgiApp:
+    def test_get_clinician_by_uuid(
+        self, asgi_app: AsyncReadApp, client: FlaskClient
+    ) -> None:
+        clinician = create_clinician("Jane", "Deer", "SEND", "123", "123")
+        path = f"/dhos/v1/clinician/{clinician['uuid']}"
+        response = _request(asgi_app, "GET", path)
+        assert response.status_code == 200
+        assert response.json == client.get(path, headers=AUTH).json
+        assert (
+            response.headers["ETag"] == client.get(path, headers=AUTH).headers["ETag"]
+        )
+
+        response = _request(
+            asgi_app, "GET", path, headers={"If-None-Match": response.headers["ETag"]}
+        )
+        assert response.status_code == 304
+        assert response.get_data() == b""
+
+    def test_get_clinician_by_uuid_not_found(self, asgi_app: AsyncReadApp) -> None:
+        response = _request(asgi_app, "GET", "/dhos/v1/clinician/unknown")
+        assert response.status_code == 404
+        assert response.json is not None
+        assert "message" in response.json
+
+    def test_get_clinician_by_uuid_temp_only(self, asgi_app: AsyncReadApp) -> None:
+        clinician = create_clinician("Jane", "Deer", "SEND", "123", "123")
+        response = _request(
+            asgi_app,
+            "GET",
+            f"/dhos/v1/clinician/{clinician['uuid']}",
+            query_string="temp_only=true",
+        )
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_retrieve_clinicians_by_uuids(
+        self, asgi_app: AsyncReadApp, client: FlaskClient, compact: bool
+    ) -> None:
+        uuids = [
+            create_clinician("Jane", "Deer", "SEND", "123", "123")["uuid"],
+            create_clinician("John", "Deer", "SEND", "456", "456")["uuid"],
+            "unknown",
+        ]
+        query_string = f"compact={str(compact).lower()}"
+        response = _request(
+            asgi_app,
+            "POST",
+            "/dhos/v1/clinician_list",
+            query_string=query_string,
+            json_body=uuids,
+        )
+        assert response.status_code == 200
+        assert response.json == (
+            client.post(
+                f"/dhos/v1/clinician_list?{query_string}", json=uuids, headers=AUTH
+            ).json
+        )
+        assert response.json is not None
+        assert response.json["unknown"] is None
+
+    def test_retrieve_clinicians_by_uuids_invalid(self, asgi_app: AsyncReadApp) -> None:
+        response = _request(
+            asgi_app, "POST", "/dhos/v1/clinician_list", json_body={"uuid": "1"}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            "",
+            "product_name=SEND&login_active=true",
+            "compact=true&sort=first_name,last_name&order=desc",
+            "expanded=true&q=deer&offset=1&limit=1",
+        ],
+    )
+    def test_get_clinicians(
+        self, asgi_app: AsyncReadApp, client: FlaskClient, query_string: str
+    ) -> None:
+        create_clinician("Jane", "Deer", "SEND", "123", "123")
+        create_clinician("John", "Deer", "GDM", "456", "456", login_active=False)
+        create_clinician("Amy", "Smith", "SEND", "789", "789")
+        response = _request(
+            asgi_app, "GET", "/dhos/v2/clinicians", query_string=query_string
+        )
+        assert response.status_code == 200
+        assert (
+            response.json
+            == client.get(f"/dhos/v2/clinicians?{query_string}", headers=AUTH).json
+        )
+
+    @pytest.mark.parametrize(
+        "query_string", ["unknown=1", "compact=yes", "limit=ten", "sort=password_hash"]
+    )
+    def test_get_clinicians_invalid(
+        self, asgi_app: AsyncReadApp, query_string: str
+    ) -> None:
+        response = _request(
+            asgi_app, "GET", "/dhos/v2/clinicians", query_string=query_string
+        )
+        assert response.status_code == 400
+
+    def test_clinician_login(
+        self, asgi_app: AsyncReadApp, mocker: MockerFixture
+    ) -> None:
+        clinician = create_clinician(
+            "Jane", "Deer", "SEND", "123", "123", email_address="jane.deer@test.com"
+        )
+        mocker.patch.object(User, "validate_password", return_value=True)
+        auth = base64.b64encode(b"jane.deer@test.com:password").decode()
+        response = _request(
+            asgi_app,
+            "GET",
+            "/dhos/v1/clinician/login",
+            headers={"UserAuthorization": f"Bearer {auth}"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["user_id"] == clinician["uuid"]
+        assert "permissions" in response.json
+
+    def test_clinician_login_failed(
+        self, asgi_app: AsyncReadApp, mocker: MockerFixture
+    ) -> None:
+        create_clinician(
+            "Jane", "Deer", "SEND", "123", "123", email_address="jane.deer@test.com"
+        )
+        mocker.patch.object(User, "validate_password", return_value=False)
+        auth = base64.b64encode(b"jane.deer@test.com:password").decode()
+        response = _request(
+            asgi_app,
+            "GET",
+            "/dhos/v1/clinician/login",
+            headers={"UserAuthorization": f"Bearer {auth}"},
+        )
+        assert response.status_code == 403
+
+    def test_clinician_login_missing_user_auth(self, asgi_app: AsyncReadApp) -> None:
+        response = _request(asgi_app, "GET", "/dhos/v1/clinician/login")
+        assert response.status_code == 400
+
+    def test_insufficient_scopes(self, asgi_app: AsyncReadApp) -> None:
+        g.jwt_scopes = ["read:send_location"]
+        response = _request(asgi_app, "GET", "/dhos/v2/clinicians")
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize(
+        ["method", "path", "status"],
+        [
+            ("GET", "/dhos/v1/clinician", 404),
+            ("GET", "/dhos/v1/clinician_changes", 404),
+            ("POST", "/dhos/v1/clinician/login", 405),
+        ],
+    )
+    def test_other_requests(
+        self, asgi_app: AsyncReadApp, method: str, path: str, status: int
+    ) -> None:
+        response = _request(asgi_app, method, path)
+        assert response.status_code == status
+
+    def test_lifespan(self, asgi_app: AsyncReadApp) -> None:
+        received = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent: List[Dict] = []
+
+        async def receive() -> Dict:
+            return received.pop(0)
+
+        async def send(message: Dict) -> None:
+            sent.append(message)
+
+        asyncio.run(asgi_app({"type": "lifespan"}, receive, send))
+        assert sent == [
+            {"type": "lifespan.startup.complete"},
+            {"type": "lifespan.shutdown.complete"},
+        ]
@@ -1,5 +1,9 @@
 import pytest
 from auth0_api_client import authz as auth0_authz
+from auth0_api_client.errors import Auth0ConnectionError
+from flask import Flask
+from flask_batteries_included.helpers.error_handler import ServiceUnavailableException
+from prometheus_client import REGISTRY
 from pytest_mock import MockerFixture
 
 from dhos_users_api.helpers.auth0_authz import (
@@ -27,3 +31,29 @@ class TestAuth0Authz:
             auth0_authz, "add_user_to_authz_groups", return_value=None
         )
         assert mock_method.call_count == 0
+
+    def test_metrics(self, app: Flask, mocker: MockerFixture) -> None:
+        app.config["DISABLE_CREATE_USER_IN_AUTH0"] = False
+        labels = {"operation": "add_user_to_authz_groups"}
+        calls_before = (
+            REGISTRY.get_sample_value("auth0_request_seconds_count", labels) or 0
+        )
+        failures_before = (
+            REGISTRY.get_sample_value("auth0_request_failures_total", labels) or 0
+        )
+        mocker.patch.object(
+            auth0_authz,
+            "add_user_to_authz_groups",
+            side_effect=[None, Auth0ConnectionError("Timed out")],
+        )
+        add_user_to_authz_groups(user_id="UUID_1", groups_to_add_to=["GROUP_1"])
+        with pytest.raises(ServiceUnavailableException):
+            add_user_to_authz_groups(user_id="UUID_1", groups_to_add_to=["GROUP_1"])
+        assert (
+            REGISTRY.get_sample_value("auth0_request_seconds_count", labels)
+            == calls_before + 2
+        )
+        assert (
+            REGISTRY.get_sample_value("auth0_request_failures_total", labels)
+            == failures_before + 1
+        )
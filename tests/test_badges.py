@@ -0,0 +1,88 @@
+import re
+from datetime import date, timedelta
+
+import pytest
+from helper import create_clinician
+from pytest_mock import MockerFixture
+
+from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers import badges
+from dhos_users_api.models.user import User
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestBadges:
+    def test_reserve_send_entry_identifier(self) -> None:
+        identifier = badges.reserve_send_entry_identifier()
+        assert re.fullmatch(r"@\d{9}", identifier)
+
+    def test_reserve_send_entry_identifiers_unique(self) -> None:
+        identifiers = badges.reserve_send_entry_identifiers(500)
+        identifiers += badges.reserve_send_entry_identifiers(500)
+        assert len(set(identifiers)) == 1000
+        assert badges.reserve_send_entry_identifiers(0) == []
+
+    def test_reserve_send_entry_identifiers_skips_taken(
+        self, mocker: MockerFixture
+    ) -> None:
+        create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            send_entry_identifier="@000000002",
+        )
+        mock_next = mocker.patch.object(
+            badges,
+            "_next_identifiers",
+            side_effect=[["@000000001", "@000000002"], ["@000000003"]],
+        )
+        assert badges.reserve_send_entry_identifiers(2) == ["@000000001", "@000000003"]
+        assert mock_next.call_count == 2
+
+    def test_temp_clinician_reuses_generated_badge(self) -> None:
+        # Temporary SEND clinicians may be given the badge number of an earlier one.
+        existing = create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            send_entry_identifier=badges.reserve_send_entry_identifier(),
+        )
+        clinician = controller.create_clinician(
+            clinician_details={
+                "first_name": "B",
+                "last_name": "B",
+                "phone_number": "",
+                "job_title": "nurse",
+                "nhs_smartcard_number": "654321",
+                "email_address": "b@test.com",
+                "groups": ["SEND Clinician"],
+                "locations": [],
+                "products": [{"product_name": "SEND", "opened_date": "2021-7-19"}],
+                "send_entry_identifier": existing["send_entry_identifier"],
+                "contract_expiry_eod_date": str(date.today() + timedelta(days=1)),
+                "login_active": True,
+            },
+            send_welcome_email=False,
+        )
+        assert clinician["send_entry_identifier"] == existing["send_entry_identifier"]
+
+    def test_bulk_create_reserves_badges(
+        self, bulk_create_clinician_request: list[dict]
+    ) -> None:
+        for details in bulk_create_clinician_request[:3]:
+            details["contract_expiry_eod_date"] = date.today() + timedelta(days=1)
+            details["send_entry_identifier"] = None
+        controller.create_clinicians_bulk(
+            clinician_details=bulk_create_clinician_request
+        )
+        identifiers = [
+            u.send_entry_identifier
+            for u in User.query.filter(User.contract_expiry_eod_date.isnot(None))
+        ]
+        assert len(identifiers) == 3
+        assert all(re.fullmatch(r"@\d{9}", i) for i in identifiers)
+        assert len(set(identifiers)) == 3
@@ -0,0 +1,33 @@
+from typing import Dict
+
+import pytest
+
+from benchmarks import cases  # noqa: F401 Registers the benchmarks.
+from benchmarks import harness
+
+
+@pytest.mark.usefixtures("app")
+class TestBenchmarks:
+    @pytest.mark.parametrize("name", list(harness.BENCHMARKS))
+    def test_benchmark_runs(self, name: str) -> None:
+        # Keeps the benchmarks working as the code they time changes.
+        harness.BENCHMARKS[name]()()
+
+    def test_compare(self) -> None:
+        baseline: Dict[str, harness.Result] = {
+            "fast": {"median_us": 12, "min_us": 10, "max_us": 20},
+            "slow": {"median_us": 12, "min_us": 10, "max_us": 20},
+        }
+        results: Dict[str, harness.Result] = {
+            "fast": {"median_us": 12, "min_us": 11, "max_us": 20},
+            "slow": {"median_us": 20, "min_us": 15, "max_us": 30},
+            "new": {"median_us": 1, "min_us": 1, "max_us": 1},
+        }
+        report, regressions = harness.compare(results, baseline, tolerance=0.25)
+        assert regressions == ["slow"]
+        assert "+50.0%  REGRESSION" in report
+        assert "new" in report.splitlines()[-1]
+
+    def test_measure(self) -> None:
+        result = harness.measure(lambda: None, min_time=0.001, repeat=3)
+        assert 0 < result["min_us"] <= result["median_us"] <= result["max_us"]
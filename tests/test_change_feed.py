@@ -0,0 +1,209 @@
+from datetime import date, timedelta
+from typing import Dict, List
+
+import pytest
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from helper import create_clinician
+from pytest_mock import MockerFixture
+from sqlalchemy import func, select, text
+
+from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers import auth0_authz, change_feed, publish
+from dhos_users_api.models.user import User
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestChangeFeed:
+    @pytest.fixture
+    def clinician_uuid(self) -> str:
+        return create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            login_active=True,
+            send_entry_identifier="321",
+            groups=["SEND Clinician", "SEND Superclinician"],
+            locations=["L1", "L2"],
+        )["uuid"]
+
+    def _changes_after(self, since: int) -> List[Dict]:
+        return controller.get_clinician_changes(since=since, limit=1000)["changes"]
+
+    def test_create(self, clinician_uuid: str) -> None:
+        changes = self._changes_after(0)
+        assert [c["clinician_id"] for c in changes] == [clinician_uuid]
+        assert changes[0]["removed"] == {"locations": [], "groups": [], "products": []}
+        assert changes[0]["clinician"]["uuid"] == clinician_uuid
+
+    def test_remove_locations_and_groups(
+        self, clinician_uuid: str, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(auth0_authz, "remove_user_from_authz_groups")
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        controller.remove_from_clinician(
+            clinician_uuid, {"locations": ["L1"], "groups": ["SEND Superclinician"]}
+        )
+        (change,) = self._changes_after(since)
+        assert change["removed"] == {
+            "locations": ["L1"],
+            "groups": ["SEND Superclinician"],
+            "products": [],
+        }
+        assert change["clinician"]["locations"] == ["L2"]
+
+    def test_remove_product(self, clinician_uuid: str, mocker: MockerFixture) -> None:
+        mocker.patch.object(auth0_authz, "remove_user_from_authz_groups")
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        product = controller.get_clinician_by_id(clinician_uuid, False)["products"][0]
+        controller.remove_from_clinician(
+            clinician_uuid, {"products": [{"uuid": product["uuid"]}]}
+        )
+        (change,) = self._changes_after(since)
+        assert change["removed"]["products"] == [product["uuid"]]
+        assert change["clinician"]["products"] == []
+
+    def test_terms_agreement(self, clinician_uuid: str) -> None:
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        controller.create_clinician_tos(
+            clinician_uuid, {"product_name": "SEND", "version": 2}
+        )
+        assert [c["clinician_id"] for c in self._changes_after(since)] == [
+            clinician_uuid
+        ]
+
+    def test_update_clinicians_bulk(
+        self, clinician_uuid: str, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(publish, "clinician_update_events")
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        controller.update_clinicians_bulk(
+            [{"clinician_id": clinician_uuid, "update": {"login_active": False}}],
+            edit_temp_only=False,
+        )
+        (change,) = self._changes_after(since)
+        assert change["clinician"]["login_active"] is False
+
+    def test_expire_temporary_clinicians(
+        self, clinician_uuid: str, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(publish, "clinician_update_events")
+        controller.update_clinician(
+            clinician_id=clinician_uuid,
+            update_fields={
+                "contract_expiry_eod_date": date.today() - timedelta(days=1)
+            },
+            edit_temp_only=False,
+        )
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        assert controller.expire_temporary_clinicians() == 1
+        (change,) = self._changes_after(since)
+        assert change["clinician"]["login_active"] is False
+
+    def test_create_clinicians_bulk(
+        self, bulk_create_clinician_request: List[Dict]
+    ) -> None:
+        controller.create_clinicians_bulk(bulk_create_clinician_request)
+        assert {c["clinician_id"] for c in self._changes_after(0)} == {
+            c["uuid"] for c in bulk_create_clinician_request
+        }
+
+    def test_rolled_back_changes_not_recorded(self, clinician_uuid: str) -> None:
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        clinician = controller.User.query.get(clinician_uuid)
+        clinician.last_name = "B"
+        db.session.flush()
+        db.session.rollback()
+        assert self._changes_after(since) == []
+
+    def test_clinician_not_read_from_cache(self, clinician_uuid: str) -> None:
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        controller.get_clinicians_by_uuids([clinician_uuid], compact=False)
+        # Changed by another worker, so not invalidated in this worker's cache.
+        with db.engine.begin() as connection:
+            connection.execute(
+                text('UPDATE "user" SET first_name = :name WHERE uuid = :uuid'),
+                name="B",
+                uuid=clinician_uuid,
+            )
+            connection.execute(
+                text("INSERT INTO clinician_change (clinician_id) VALUES (:uuid)"),
+                uuid=clinician_uuid,
+            )
+        (change,) = self._changes_after(since)
+        assert change["clinician"]["first_name"] == "B"
+
+    def test_lock_taken_on_commit(self, clinician_uuid: str) -> None:
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        User.query.get(clinician_uuid).first_name = "B"
+        db.session.flush()
+        with db.engine.begin() as connection:
+            assert connection.execute(
+                select(
+                    func.pg_try_advisory_xact_lock(change_feed._CHANGE_FEED_LOCK_KEY)
+                )
+            ).scalar()
+        db.session.commit()
+        (change,) = self._changes_after(since)
+        assert change["clinician"]["first_name"] == "B"
+
+    def test_savepoint_rolled_back(self, clinician_uuid: str) -> None:
+        other_uuid = create_clinician(
+            first_name="B",
+            last_name="B",
+            nhs_smartcard_number="654321",
+            product_name="GDM",
+        )["uuid"]
+        since = controller.get_clinician_changes(since=0, limit=1000)["next_since"]
+        with db.session.begin_nested():
+            User.query.get(clinician_uuid).first_name = "C"
+        with pytest.raises(ValueError):
+            with db.session.begin_nested():
+                User.query.get(other_uuid).first_name = "C"
+                db.session.flush()
+                raise ValueError()
+        db.session.commit()
+        assert [c["clinician_id"] for c in self._changes_after(since)] == [
+            clinician_uuid
+        ]
+
+    def test_paging(self) -> None:
+        uuids = [
+            create_clinician(
+                first_name="A",
+                last_name=str(i),
+                nhs_smartcard_number="123456",
+                product_name="GDM",
+            )["uuid"]
+            for i in range(5)
+        ]
+        seen: List[str] = []
+        since = 0
+        while True:
+            page = controller.get_clinician_changes(since=since, limit=2)
+            seen.extend(c["clinician_id"] for c in page["changes"])
+            since = page["next_since"]
+            if not page["more"]:
+                break
+        assert seen == uuids
+        assert controller.get_clinician_changes(since=since, limit=2) == {
+            "changes": [],
+            "next_since": since,
+            "more": False,
+        }
+
+    def test_get_clinician_changes_api(
+        self, client: FlaskClient, clinician_uuid: str
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/clinician_changes?since=0&limit=10",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["more"] is False
+        assert [c["clinician_id"] for c in response.json["changes"]] == [clinician_uuid]
+        assert response.json["next_since"] == response.json["changes"][0]["sequence"]
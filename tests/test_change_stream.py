@@ -0,0 +1,187 @@
+import time
+from typing import Dict, Generator, Iterator, List, Optional
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.helpers.error_handler import ServiceUnavailableException
+from helper import create_clinician
+
+from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers import change_stream
+
+
+@pytest.mark.usefixtures("app")
+class TestSubscription:
+    def test_changes(self) -> None:
+        subscription = change_stream.Subscription(buffer_size=10)
+        for change in [(1, "A"), (2, "B"), (1, "A"), (3, "C")]:
+            subscription.put(change)
+        changes = subscription.changes(
+            after=1, deadline=time.monotonic() + 10, heartbeat=0.01
+        )
+        # Changes already seen are skipped.
+        assert [next(changes), next(changes), next(changes)] == [
+            (2, "B"),
+            (3, "C"),
+            None,
+        ]
+
+    def test_ends_at_deadline(self) -> None:
+        subscription = change_stream.Subscription(buffer_size=10)
+        assert list(subscription.changes(after=0, deadline=0, heartbeat=10)) == []
+
+    def test_overflow(self) -> None:
+        subscription = change_stream.Subscription(buffer_size=2)
+        for change in [(1, "A"), (2, "B"), (3, "C"), (4, "D")]:
+            subscription.put(change)
+        # The buffered changes are delivered, then the subscription ends.
+        assert list(
+            subscription.changes(after=0, deadline=time.monotonic() + 10, heartbeat=10)
+        ) == [(1, "A"), (2, "B")]
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestChangeStream:
+    @pytest.fixture(autouse=True)
+    def notifier(
+        self, app: Flask
+    ) -> Generator[change_stream.ChangeNotifier, None, None]:
+        app.config["CLINICIAN_CHANGE_STREAM_HEARTBEAT_SECONDS"] = 0.05
+        app.config["CLINICIAN_CHANGE_STREAM_MAX_SECONDS"] = 10
+        with app.app_context():
+            notifier = change_stream.get_notifier()
+        notifier.poll_interval = 0.1
+        yield notifier
+        app.extensions.pop("clinician_change_notifier")
+
+    def _create_clinician(self, last_name: str) -> str:
+        return create_clinician(
+            first_name="A",
+            last_name=last_name,
+            nhs_smartcard_number="123456",
+            product_name="GDM",
+        )["uuid"]
+
+    def _next_change(self, changes: Iterator[Optional[Dict]]) -> Dict:
+        for change in changes:
+            if change is not None:
+                return change
+        raise AssertionError("Stream ended")
+
+    def test_too_many_subscribers(self, notifier: change_stream.ChangeNotifier) -> None:
+        subscriptions = [notifier.subscribe() for _ in range(notifier.max_subscribers)]
+        with pytest.raises(ServiceUnavailableException):
+            notifier.subscribe()
+        for subscription in subscriptions:
+            notifier.unsubscribe(subscription)
+
+    def test_listener_not_started(self) -> None:
+        notifier = change_stream.ChangeNotifier(
+            database_uri="postgresql://localhost:1/unreachable",
+            max_subscribers=1,
+            buffer_size=10,
+            poll_interval=0.01,
+            start_timeout=0.1,
+        )
+        with pytest.raises(ServiceUnavailableException):
+            notifier.subscribe()
+        # The subscriber's place is freed.
+        assert not notifier._has_subscribers()
+
+    def test_new_changes(self) -> None:
+        existing_uuid = self._create_clinician("A")
+        since, subscription = controller.subscribe_to_clinician_changes(since=None)
+        changes = controller.stream_clinician_changes(
+            since=since, subscription=subscription
+        )
+        # Only changes made after subscribing are streamed.
+        assert next(changes) is None
+        new_uuid = self._create_clinician("B")
+        change = self._next_change(changes)
+        assert change["clinician_id"] == new_uuid != existing_uuid
+        changes.close()
+
+    def test_catches_up(self) -> None:
+        uuids: List[str] = [self._create_clinician(name) for name in ("A", "B", "C")]
+        first = controller.get_clinician_changes(since=0, limit=1)["next_since"]
+        since, subscription = controller.subscribe_to_clinician_changes(since=first)
+        assert since == first
+        changes = controller.stream_clinician_changes(
+            since=since, subscription=subscription
+        )
+        assert [self._next_change(changes)["clinician_id"] for _ in range(2)] == uuids[
+            1:
+        ]
+        uuids.append(self._create_clinician("D"))
+        assert self._next_change(changes)["clinician_id"] == uuids[3]
+        changes.close()
+
+    def test_catches_up_on_backlog_larger_than_buffer(
+        self, notifier: change_stream.ChangeNotifier
+    ) -> None:
+        notifier.buffer_size = 2
+        uuids: List[str] = [self._create_clinician(name) for name in "ABCDE"]
+        since, subscription = controller.subscribe_to_clinician_changes(since=0)
+        changes = controller.stream_clinician_changes(
+            since=since, subscription=subscription
+        )
+        # The listener doesn't pass the backlog on too, overflowing the subscription.
+        assert [self._next_change(changes)["clinician_id"] for _ in range(5)] == uuids
+        assert not subscription.overflowed
+        uuids.append(self._create_clinician("F"))
+        assert self._next_change(changes)["clinician_id"] == uuids[5]
+        changes.close()
+
+    def test_stream_api(self, app: Flask, client: FlaskClient) -> None:
+        app.config["CLINICIAN_CHANGE_STREAM_MAX_SECONDS"] = 0
+        clinician_uuid = self._create_clinician("A")
+        sequence = controller.get_clinician_changes(since=0, limit=1)["next_since"]
+        response = client.get(
+            "/dhos/v1/clinician_changes/stream?since=0",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        assert response.get_data(as_text=True) == (
+            f"id: {sequence}\n"
+            "event: clinician_change\n"
+            f'data: {{"sequence": {sequence}, "clinician_id": "{clinician_uuid}"}}\n\n'
+        )
+
+        response = client.get(
+            "/dhos/v1/clinician_changes/stream?since=0",
+            headers={"Authorization": "Bearer TOKEN", "Last-Event-ID": str(sequence)},
+        )
+        assert response.status_code == 200
+        assert response.get_data(as_text=True) == ""
+
+    def test_stream_api_too_many_subscribers(
+        self, app: Flask, client: FlaskClient
+    ) -> None:
+        max_subscribers = app.config["CLINICIAN_CHANGE_STREAM_MAX_SUBSCRIBERS"]
+        app.config["CLINICIAN_CHANGE_STREAM_MAX_SUBSCRIBERS"] = 0
+        app.extensions.pop("clinician_change_notifier")
+        try:
+            response = client.get(
+                "/dhos/v1/clinician_changes/stream",
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+        finally:
+            app.config["CLINICIAN_CHANGE_STREAM_MAX_SUBSCRIBERS"] = max_subscribers
+        assert response.status_code == 503
+        assert response.mimetype == "application/json"
+
+    def test_stream_api_unsubscribes(
+        self, client: FlaskClient, notifier: change_stream.ChangeNotifier
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/clinician_changes/stream",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert len(notifier._subscriptions) == 1
+        response.close()
+        assert not notifier._subscriptions
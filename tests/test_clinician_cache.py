@@ -0,0 +1,233 @@
+from datetime import date, timedelta
+from typing import Dict
+
+import pytest
+from helper import create_clinician
+from mock import Mock
+from pytest_mock import MockerFixture
+
+from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers import clinician_cache, publish
+
+
+@pytest.mark.usefixtures("app")
+class TestClinicianCache:
+    def test_read_through(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60)
+        load = Mock(return_value={"uuid": "1", "created": "2021-01-01T00:00:00"})
+        assert cache.get("1", load) == load.return_value
+        assert cache.get("1", load) == load.return_value
+        assert load.call_count == 1
+
+    def test_returns_copies(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60)
+        cache.get("1", lambda: {"locations": []})["locations"].append("L1")
+        assert cache.get("1", Mock()) == {"locations": []}
+
+    def test_expires(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=0)
+        load = Mock(return_value={"uuid": "1"})
+        cache.get("1", load)
+        cache.get("1", load)
+        assert load.call_count == 2
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=2, ttl=60)
+        load = Mock(return_value={})
+        for clinician_id in ("1", "2", "1", "3", "1", "2"):
+            cache.get(clinician_id, load)
+        # 2 was evicted when 3 was added.
+        assert load.call_count == 4
+
+    def test_invalidate(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60)
+        load = Mock(return_value={})
+        cache.get("1", load)
+        cache.invalidate(["1"])
+        cache.get("1", load)
+        assert load.call_count == 2
+
+    def test_not_cached_if_invalidated_while_loading(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60)
+
+        def load() -> Dict:
+            cache.invalidate(["1"])
+            return {"version": 1}
+
+        cache.get("1", load)
+        assert cache.get("1", lambda: {"version": 2}) == {"version": 2}
+
+    def test_load_failure_not_cached(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60)
+        with pytest.raises(KeyError):
+            cache.get("1", Mock(side_effect=KeyError("1")))
+        assert cache.get("1", lambda: {}) == {}
+
+    def test_shared_tier(self) -> None:
+        shared = Mock(spec=clinician_cache.SharedTier)
+        shared.get.return_value = ('{"uuid": "1"}', "0")
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60, shared=shared)
+        load = Mock()
+        assert cache.get("1", load) == {"uuid": "1"}
+        assert cache.get("1", load) == {"uuid": "1"}
+        load.assert_not_called()
+        shared.get.assert_called_once_with("1")
+
+        cache.invalidate(["1"])
+        shared.delete.assert_called_once_with({"1"})
+
+    def test_shared_tier_miss(self) -> None:
+        shared = Mock(spec=clinician_cache.SharedTier)
+        shared.get.return_value = (None, "3")
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60, shared=shared)
+        assert cache.get("1", lambda: {"uuid": "1"}) == {"uuid": "1"}
+        # Only written if the generation read before loading is unchanged.
+        shared.set.assert_called_once_with("1", '{"uuid": "1"}', "3")
+
+    def test_get_many(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60)
+        cache.get("1", lambda: {"uuid": "1"})
+        load_many = Mock(return_value={"2": {"uuid": "2"}})
+        assert cache.get_many(["1", "2", "3"], load_many) == {
+            "1": {"uuid": "1"},
+            "2": {"uuid": "2"},
+        }
+        load_many.assert_called_once_with({"2", "3"})
+        assert cache.get_many(["2"], Mock()) == {"2": {"uuid": "2"}}
+
+    def test_get_many_without_backfill(self) -> None:
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60)
+        load_many = Mock(return_value={"1": {"uuid": "1"}})
+        cache.get_many(["1"], load_many, backfill=False)
+        cache.get_many(["1"], load_many, backfill=False)
+        assert load_many.call_count == 2
+
+    def test_get_many_shared_tier(self) -> None:
+        shared = Mock(spec=clinician_cache.SharedTier)
+        shared.get_many.return_value = [('{"uuid": "1"}', "0")]
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60, shared=shared)
+        load_many = Mock(return_value={})
+        assert cache.get_many(["1"], load_many) == {"1": {"uuid": "1"}}
+        load_many.assert_not_called()
+        assert cache.get_many(["1"], load_many) == {"1": {"uuid": "1"}}
+        shared.get_many.assert_called_once_with(["1"])
+
+    def test_get_many_shared_tier_miss(self) -> None:
+        shared = Mock(spec=clinician_cache.SharedTier)
+        shared.get_many.return_value = [(None, "2")]
+        cache = clinician_cache.ClinicianCache(max_size=10, ttl=60, shared=shared)
+        load_many = Mock(return_value={"1": {"uuid": "1"}})
+        assert cache.get_many(["1"], load_many) == {"1": {"uuid": "1"}}
+        shared.set_many.assert_called_once_with({"1": ('{"uuid": "1"}', "2")})
+
+
+@pytest.mark.usefixtures("app")
+class TestSharedTier:
+    @pytest.fixture
+    def redis_client(self, mocker: MockerFixture) -> Mock:
+        client = Mock()
+        mocker.patch("redis.Redis.from_url", return_value=client)
+        return client
+
+    def test_get_many(self, redis_client: Mock) -> None:
+        redis_client.mget.return_value = [b'{"uuid": "1"}', None, b"4", None]
+        shared = clinician_cache.SharedTier(url="redis://localhost", ttl=300)
+        assert shared.get_many(["1", "2"]) == [('{"uuid": "1"}', "4"), (None, "0")]
+        redis_client.mget.assert_called_once_with(
+            [
+                "dhos-users:clinician:v2:1",
+                "dhos-users:clinician:v2:2",
+                "dhos-users:clinician-generation:1",
+                "dhos-users:clinician-generation:2",
+            ]
+        )
+
+    def test_get_many_error(self, redis_client: Mock) -> None:
+        import redis
+
+        redis_client.mget.side_effect = redis.exceptions.ConnectionError()
+        shared = clinician_cache.SharedTier(url="redis://localhost", ttl=300)
+        # Without a generation, nothing can be written back.
+        assert shared.get_many(["1"]) == [(None, None)]
+
+    def test_set_many_checks_generation(self, redis_client: Mock) -> None:
+        shared = clinician_cache.SharedTier(url="redis://localhost", ttl=300)
+        shared.set_many({"1": ("value", "4"), "2": ("value", None)})
+        script = redis_client.register_script.return_value
+        script.assert_called_once_with(
+            keys=["dhos-users:clinician:v2:1", "dhos-users:clinician-generation:1"],
+            args=["value", "4", 300],
+            client=redis_client.pipeline.return_value,
+        )
+
+    def test_delete_increments_generation(self, redis_client: Mock) -> None:
+        shared = clinician_cache.SharedTier(url="redis://localhost", ttl=300)
+        shared.delete(["1"])
+        pipeline = redis_client.pipeline.return_value
+        pipeline.incr.assert_called_once_with("dhos-users:clinician-generation:1")
+        pipeline.expire.assert_called_once_with(
+            "dhos-users:clinician-generation:1", 300
+        )
+        pipeline.delete.assert_called_once_with("dhos-users:clinician:v2:1")
+        pipeline.execute.assert_called_once()
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestClinicianCacheInvalidation:
+    @pytest.fixture
+    def clinician_uuid(self) -> str:
+        return create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            expiry=None,
+            login_active=True,
+            send_entry_identifier="321",
+        )["uuid"]
+
+    def test_update_clinician(self, clinician_uuid: str) -> None:
+        assert controller.get_clinician_by_id(clinician_uuid, False)["last_name"] == "A"
+        controller.update_clinician(
+            clinician_id=clinician_uuid,
+            update_fields={"last_name": "B"},
+            edit_temp_only=False,
+        )
+        assert controller.get_clinician_by_id(clinician_uuid, False)["last_name"] == "B"
+
+    def test_update_clinicians_bulk(
+        self, clinician_uuid: str, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(publish, "clinician_update_events")
+        assert controller.get_clinician_by_id(clinician_uuid, False)["login_active"]
+        controller.update_clinicians_bulk(
+            [{"clinician_id": clinician_uuid, "update": {"login_active": False}}],
+            edit_temp_only=False,
+        )
+        assert not controller.get_clinician_by_id(clinician_uuid, False)["login_active"]
+
+    def test_expire_temporary_clinicians(
+        self, clinician_uuid: str, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(publish, "clinician_update_events")
+        controller.update_clinician(
+            clinician_id=clinician_uuid,
+            update_fields={
+                "contract_expiry_eod_date": date.today() - timedelta(days=1)
+            },
+            edit_temp_only=False,
+        )
+        assert controller.get_clinician_by_id(clinician_uuid, False)["login_active"]
+        assert controller.expire_temporary_clinicians() == 1
+        assert not controller.get_clinician_by_id(clinician_uuid, False)["login_active"]
+
+    def test_terms_agreement(self, clinician_uuid: str) -> None:
+        clinician = controller.get_clinician_by_id(clinician_uuid, False)
+        assert clinician["terms_agreement"] == {}
+        controller.create_clinician_tos(
+            clinician_uuid, {"product_name": "SEND", "version": 2}
+        )
+        clinician = controller.get_clinician_by_id(clinician_uuid, False)
+        assert clinician["terms_agreement"]["SEND"]["version"] == 2
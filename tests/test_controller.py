@@ -1,14 +1,17 @@
 import base64
+import json
 from datetime import date, timedelta
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import flask
 import pytest
+import sqlalchemy
 from _pytest.logging import LogCaptureFixture
 from flask_batteries_included.helpers.error_handler import (
     DuplicateResourceException,
     EntityNotFoundException,
 )
+from flask_batteries_included.sqldb import db
 from helper import create_clinician
 from marshmallow.exceptions import ValidationError
 from mock import Mock
@@ -118,6 +121,38 @@ class TestClinicianController:
         results = controller.get_clinician_by_id(clinician_uuid_1, get_temp_only=False)
         assert results["first_name"] == "Adam"
 
+    def test_get_clinician_version(self) -> None:
+        clinician_uuid = create_clinician(
+            first_name="Adam",
+            last_name="Ant",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            expiry=None,
+            login_active=True,
+            send_entry_identifier="987",
+        )["uuid"]
+        controller.create_clinician_tos(
+            clinician_uuid, {"product_name": "SEND", "version": 1}
+        )
+        version = controller.get_clinician_version(clinician_uuid, get_temp_only=False)
+        # Matches the version of the clinician when loaded.
+        assert (
+            controller._versioned(User.query.get(clinician_uuid))["version"] == version
+        )
+        clinician = controller.get_clinician_by_id(
+            clinician_uuid, get_temp_only=False, version=version
+        )
+        assert clinician["terms_agreement"]["SEND"]["version"] == 1
+
+        product_uuid = clinician["products"][0]["uuid"]
+        controller.remove_from_clinician(
+            clinician_uuid, {"products": [{"uuid": product_uuid}]}
+        )
+        assert (
+            controller.get_clinician_version(clinician_uuid, get_temp_only=False)
+            != version
+        )
+
     def test_get_clinicians_by_uuid_fail(self) -> None:
         with pytest.raises(EntityNotFoundException):
             controller.get_clinician_by_id("1111", get_temp_only=False)
@@ -407,6 +442,32 @@ class TestClinicianController:
         with pytest.raises(ValidationError):
             controller.create_clinician(data.json, send_welcome_email=False)
 
+    def test_validate_clinician_create_normalises(self) -> None:
+        details = {
+            "first_name": "hilary",
+            "last_name": "jones",
+            "nhs_smartcard_number": "123",
+            "products": [{"product_name": "GDM", "opened_date": "2021-7-19"}],
+            "phone_number": "12321312323",
+            "job_title": "Doctor",
+            "locations": ["L1"],
+            "groups": [],
+            "bookmarks": None,
+            "uuid": "some-uuid",
+        }
+        controller._validate_clinician_create(details)
+        assert details["bookmarks"] == []
+        assert details["bookmarked_patients"] == []
+        assert details["email_address"] is None
+        assert details["can_edit_encounter"] is None
+
+        with pytest.raises(KeyError):
+            controller._validate_clinician_create({**details, "unexpected": 1})
+        with pytest.raises(TypeError):
+            controller._validate_clinician_create(
+                {**details, "can_edit_encounter": "yes"}
+            )
+
     def test_clinician_login_before_last_day(self, mocker: MockerFixture) -> None:
         mocker.patch.object(controller, "g", Mock(jwt_claims={"clinician_id": "123"}))
         clinician = User()
@@ -430,7 +491,6 @@ class TestClinicianController:
     def test_clinician_login_after_last_day(self, mocker: MockerFixture) -> None:
         mocker.patch.object(controller, "g", Mock(jwt_claims={"clinician_id": "123"}))
         mocker.patch.object(audit, "record_authentication_failure", Mock())
-        mocker.patch.object(controller, "deactivate_clinician", Mock())
         clinician = User()
         clinician.uuid = "some-uuid"
         clinician.login_active = True
@@ -438,6 +498,8 @@ class TestClinicianController:
         mocker.patch.object(User, "validate_password", return_value=True)
         result = controller.validate_clinician_login(clinician, "username", "password")
         assert result is False
+        # Deactivation is left to the expire-temporary-clinicians job.
+        assert clinician.login_active is True
 
     @pytest.mark.parametrize(
         "password", ["Pass@word123", "nonascii£££", "this one has spaces", "ééé", "👌"]
@@ -893,10 +955,6 @@ class TestClinicianController:
         assert clinician_data["products"][0]["product_name"] == "DBM"
         assert mock_update.call_count == 2
 
-    def test_generate_send_entry_identifier(self) -> None:
-        clinician_data = controller._generate_send_entry_identifier()
-        assert len(clinician_data) == 10
-
     def test_clinician_can_not_set_sp02_scale_when_not_send_clinician(
         self, mocker: MockerFixture
     ) -> None:
@@ -931,24 +989,45 @@ class TestClinicianController:
         result = controller.get_clinicians_at_location("LOCATION_UUID")
         assert len(result) == 1
 
-    def test_deactivate_clinician(self, mocker: MockFixture) -> None:
-        clinician = create_clinician(
-            first_name="A",
-            last_name="AA",
-            nhs_smartcard_number="123456",
-            send_entry_identifier="@123456789",
-            product_name="GDM",
-            expiry=None,
-            login_active=True,
-            groups=["GDM Clinician"],
-            locations=["LOCATION_UUID"],
-        )
-        mock_method = mocker.patch.object(
-            publish, "clinician_update_event", return_value=None
+    def test_expire_temporary_clinicians(self, mocker: MockerFixture) -> None:
+        mock_update_events = mocker.patch.object(publish, "clinician_update_events")
+        clinician_uuids: Dict[Optional[int], str] = {}
+        for days, badge in [(-1, "1"), (0, "2"), (None, "3"), (-10, "4")]:
+            clinician_uuid = create_clinician(
+                first_name="A",
+                last_name=badge,
+                nhs_smartcard_number="123456",
+                product_name="SEND",
+                send_entry_identifier=badge,
+            )["uuid"]
+            if days is not None:
+                controller.update_clinician(
+                    clinician_id=clinician_uuid,
+                    update_fields={
+                        "contract_expiry_eod_date": date.today() + timedelta(days=days)
+                    },
+                    edit_temp_only=False,
+                )
+            clinician_uuids[days] = clinician_uuid
+        controller.update_clinician(
+            clinician_id=clinician_uuids[-10],
+            update_fields={"login_active": False},
+            edit_temp_only=False,
         )
-        controller.deactivate_clinician(clinician["uuid"])
 
-        assert mock_method.call_count == 1
+        assert controller.expire_temporary_clinicians() == 1
+
+        login_active = {u.uuid: u.login_active for u in User.query.all()}
+        assert login_active == {
+            clinician_uuids[-1]: False,
+            clinician_uuids[0]: True,
+            clinician_uuids[None]: True,
+            clinician_uuids[-10]: False,
+        }
+        message_bodies = mock_update_events.call_args[0][0]
+        assert [m["uuid"] for m in message_bodies] == [clinician_uuids[-1]]
+        assert message_bodies[0]["login_active"] is False
+        assert controller.expire_temporary_clinicians() == 0
 
     def test_ensure_current_user_can_allow_ews_change_permissions_fails_with_no_admin(
         self,
@@ -1038,6 +1117,88 @@ class TestClinicianController:
         )
         assert "phone_number" in clinician_data[0]
 
+    def test_get_clinicians_expanded_paginated(self) -> None:
+        for name in "ABC":
+            create_clinician(
+                first_name=name,
+                last_name=name,
+                nhs_smartcard_number="123456",
+                product_name="SEND",
+                expiry=None,
+                login_active=True,
+                send_entry_identifier=f"{name}987654",
+            )
+
+        clinician_data, total = controller.get_clinicians(
+            expanded=True, offset=1, limit=2, sort=["last_name"]
+        )
+        assert total == 3
+        assert [c["last_name"] for c in clinician_data] == ["B", "C"]
+        assert all(len(c["products"]) == 1 for c in clinician_data)
+
+    def test_get_clinicians_by_uuids_cached(self) -> None:
+        clinician_uuid_1, clinician_uuid_2 = [
+            create_clinician(
+                first_name="A",
+                last_name=name,
+                nhs_smartcard_number="123456",
+                product_name="SEND",
+                expiry=None,
+                login_active=True,
+                send_entry_identifier=name,
+            )["uuid"]
+            for name in ("1", "2")
+        ]
+        controller.get_clinicians_by_uuids([clinician_uuid_1], compact=False)
+        statements: List[Tuple[str, Any]] = []
+
+        def _record(*args: Any) -> None:
+            statements.append((args[2], args[3]))
+
+        sqlalchemy.event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            results = controller.get_clinicians_by_uuids(
+                [clinician_uuid_1, clinician_uuid_2, "made_up"], compact=True
+            )
+        finally:
+            sqlalchemy.event.remove(db.engine, "before_cursor_execute", _record)
+
+        # Only the clinicians that weren't cached were queried.
+        assert set(statements[0][1].values()) == {clinician_uuid_2, "made_up"}
+        assert results["made_up"] is None
+        result = results[clinician_uuid_1]
+        assert result is not None
+        assert (
+            result.keys() == User.query.get(clinician_uuid_1).to_compact_dict().keys()
+        )
+
+    def test_get_clinicians_compact_skips_relationships(self) -> None:
+        clinician_uuid = create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            expiry=None,
+            login_active=True,
+            send_entry_identifier="987654",
+        )["uuid"]
+        db.session.expunge_all()
+        statements: List[str] = []
+
+        def _record(*args: Any) -> None:
+            statements.append(args[2])
+
+        sqlalchemy.event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            results = controller.get_clinicians_by_uuids([clinician_uuid], compact=True)
+        finally:
+            sqlalchemy.event.remove(db.engine, "before_cursor_execute", _record)
+
+        result = results[clinician_uuid]
+        assert result is not None and result["first_name"] == "A"
+        assert len(statements) == 1
+        assert "product" not in statements[0]
+
     @pytest.mark.parametrize(
         "q",
         (
@@ -1275,16 +1436,257 @@ class TestClinicianController:
 
         # Assert
         assert result["created"] == 5
+        assert result["batches"] == [{"batch": 0, "created": 5}]
         db_users: List[User] = User.query.all()
         assert len(db_users) == 5
         assert {u.uuid for u in db_users} == {
             c["uuid"] for c in bulk_create_clinician_request
         }
+        for db_user in db_users:
+            assert db_user.products[0].product_name == "SEND"
+            assert db_user.terms_agreement[0].version == 1
+            assert db_user.to_dict()["terms_agreement"]["SEND"]["version"] == 1
         # Creating clinicians in bulk shouldn't trigger all the usual stuff we do when a clinician is created.
         assert mock_add_auth0.call_count == 0
         assert mock_publish.call_count == 0
         assert mock_email.call_count == 0
 
+    def test_create_clinician_bulk_batches(
+        self, app: flask.Flask, bulk_create_clinician_request: list[dict]
+    ) -> None:
+        app.config["BULK_CREATE_BATCH_SIZE"] = 2
+        try:
+            # Give the last clinician a duplicate UUID so the final batch fails.
+            bulk_create_clinician_request[4]["uuid"] = bulk_create_clinician_request[0][
+                "uuid"
+            ]
+            result: Dict = controller.create_clinicians_bulk(
+                clinician_details=bulk_create_clinician_request
+            )
+        finally:
+            app.config["BULK_CREATE_BATCH_SIZE"] = 1000
+
+        assert result["created"] == 4
+        assert [b["created"] for b in result["batches"]] == [2, 2, 0]
+        assert result["batches"][2]["error"] == "Failed to add clinician batch 2"
+        assert User.query.count() == 4
+
+    def test_create_clinician_bulk_reports_data_errors(
+        self, app: flask.Flask, bulk_create_clinician_request: list[dict]
+    ) -> None:
+        app.config["BULK_CREATE_BATCH_SIZE"] = 2
+        try:
+            # Not a date, so the second batch fails with a DataError.
+            bulk_create_clinician_request[2]["contract_expiry_eod_date"] = "not a date"
+            result: Dict = controller.create_clinicians_bulk(
+                clinician_details=bulk_create_clinician_request
+            )
+        finally:
+            app.config["BULK_CREATE_BATCH_SIZE"] = 1000
+
+        assert result["created"] == 3
+        assert [b["created"] for b in result["batches"]] == [2, 0, 1]
+        assert result["batches"][1]["error"] == "Failed to add clinician batch 1"
+        assert User.query.count() == 3
+
+    def test_update_clinicians_bulk(self, mocker: MockerFixture) -> None:
+        # Arrange
+        mock_update_events = mocker.patch.object(publish, "clinician_update_events")
+        mock_audit = mocker.patch.object(publish, "audit_message")
+        clinician_uuids: List[str] = [
+            create_clinician(
+                first_name="A",
+                last_name=last_name,
+                nhs_smartcard_number="123456",
+                product_name="SEND",
+                send_entry_identifier="321",
+            )["uuid"]
+            for last_name in "ABCD"
+        ]
+        create_clinician(
+            first_name="B",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            send_entry_identifier="322",
+            email_address="taken@test.com",
+        )
+        updates = [
+            {"clinician_id": clinician_uuids[0], "update": {"login_active": False}},
+            {"clinician_id": clinician_uuids[1], "update": {"login_active": False}},
+            {"clinician_id": clinician_uuids[2], "update": {"locations": ["L1"]}},
+            {
+                "clinician_id": clinician_uuids[3],
+                "update": {"email_address": "TAKEN@test.com"},
+            },
+            {"clinician_id": "unknown", "update": {"login_active": False}},
+            {"clinician_id": clinician_uuids[0], "update": {"login_active": True}},
+        ]
+
+        # Act
+        result: Dict = controller.update_clinicians_bulk(
+            updates=updates, edit_temp_only=False
+        )
+
+        # Assert
+        assert result["updated"] == 3
+        assert [r["result"] for r in result["results"]] == [
+            "updated",
+            "updated",
+            "updated",
+            "duplicate",
+            "not_found",
+            "invalid",
+        ]
+        assert result["results"][3]["error"] == "Email address already in use"
+        clinicians = {u.uuid: u for u in User.query.all()}
+        assert clinicians[clinician_uuids[0]].login_active is False
+        assert clinicians[clinician_uuids[0]].modified_by_ == "JWT_USER_ID"
+        assert clinicians[clinician_uuids[1]].login_active is False
+        assert clinicians[clinician_uuids[2]].locations == ["L1"]
+        assert clinicians[clinician_uuids[3]].email_address == "a.d@test.com"
+        assert mock_audit.call_count == 2
+        message_bodies = mock_update_events.call_args[0][0]
+        assert [m["uuid"] for m in message_bodies] == clinician_uuids[:3]
+        assert message_bodies[0]["login_active"] is False
+        assert message_bodies[2]["locations"] == ["L1"]
+
+    def test_update_clinicians_bulk_login_active_unchanged(
+        self, mocker: MockerFixture
+    ) -> None:
+        mock_update_events = mocker.patch.object(publish, "clinician_update_events")
+        mock_audit = mocker.patch.object(publish, "audit_message")
+        clinician_uuid: str = create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            send_entry_identifier="321",
+        )["uuid"]
+        modified = User.query.get(clinician_uuid).modified
+
+        result: Dict = controller.update_clinicians_bulk(
+            updates=[
+                {"clinician_id": clinician_uuid, "update": {"login_active": True}}
+            ],
+            edit_temp_only=False,
+        )
+
+        assert result == {
+            "updated": 0,
+            "results": [{"clinician_id": clinician_uuid, "result": "unchanged"}],
+        }
+        assert User.query.get(clinician_uuid).modified == modified
+        assert mock_update_events.call_args[0][0] == []
+        assert mock_audit.call_count == 0
+
+    def test_update_clinicians_bulk_temp_only(self) -> None:
+        permanent_uuid: str = create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            send_entry_identifier="321",
+        )["uuid"]
+        temporary_uuid: str = create_clinician(
+            first_name="A",
+            last_name="B",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            send_entry_identifier="322",
+        )["uuid"]
+        controller.update_clinician(
+            clinician_id=temporary_uuid,
+            update_fields={
+                "contract_expiry_eod_date": date.today() + timedelta(days=7)
+            },
+            edit_temp_only=False,
+        )
+
+        result: Dict = controller.update_clinicians_bulk(
+            updates=[
+                {"clinician_id": permanent_uuid, "update": {"login_active": False}},
+                {"clinician_id": temporary_uuid, "update": {"login_active": False}},
+            ],
+            edit_temp_only=True,
+        )
+
+        assert [r["result"] for r in result["results"]] == ["forbidden", "updated"]
+        assert User.query.get(permanent_uuid).login_active is True
+        assert User.query.get(temporary_uuid).login_active is False
+
+    def test_import_clinicians(
+        self, app: flask.Flask, bulk_create_clinician_request: list[dict]
+    ) -> None:
+        # Arrange
+        controller.create_clinicians_bulk(
+            clinician_details=[bulk_create_clinician_request[0].copy()]
+        )
+        invalid = {**bulk_create_clinician_request[2]}
+        del invalid["first_name"]
+        same_email = {
+            **bulk_create_clinician_request[4],
+            "uuid": "some-other-uuid",
+            "email_address": bulk_create_clinician_request[3]["email_address"].upper(),
+        }
+        lines = [
+            json.dumps(bulk_create_clinician_request[0]).encode(),  # already exists
+            json.dumps(bulk_create_clinician_request[1]).encode(),
+            b"",
+            json.dumps(invalid).encode(),
+            b"{not json",
+            json.dumps(bulk_create_clinician_request[3]).encode(),
+            json.dumps(same_email).encode(),  # duplicate within the import
+        ]
+        app.config["BULK_CREATE_BATCH_SIZE"] = 2
+
+        # Act
+        try:
+            results = list(controller.import_clinicians(lines=lines))
+        finally:
+            app.config["BULK_CREATE_BATCH_SIZE"] = 1000
+
+        # Assert
+        by_line = {r["line"]: r for r in results if "line" in r}
+        assert by_line[1]["result"] == "duplicate"
+        assert by_line[2]["result"] == "created"
+        assert by_line[4]["result"] == "invalid"
+        assert "first_name" in by_line[4]["error"]
+        assert by_line[5]["result"] == "invalid"
+        assert by_line[6]["result"] == "created"
+        assert by_line[7]["result"] == "duplicate"
+        assert 3 not in by_line
+        assert results[-1] == {"summary": {"created": 2, "duplicate": 2, "invalid": 2}}
+        assert {u.uuid for u in User.query.all()} == {
+            c["uuid"] for c in bulk_create_clinician_request[:2]
+        } | {bulk_create_clinician_request[3]["uuid"]}
+
+    def test_import_clinicians_falls_back_to_single_records(
+        self,
+        mocker: MockerFixture,
+        bulk_create_clinician_request: list[dict],
+    ) -> None:
+        # Simulate a clinician being created after the duplicate check has run.
+        mocker.patch.object(
+            controller.db.session,
+            "query",
+            return_value=mocker.Mock(filter=mocker.Mock(return_value=[])),
+        )
+        controller.create_clinicians_bulk(
+            clinician_details=[bulk_create_clinician_request[1].copy()]
+        )
+        lines = [json.dumps(c).encode() for c in bulk_create_clinician_request[:3]]
+
+        results = list(controller.import_clinicians(lines=lines))
+
+        assert [r.get("result") for r in results[:-1]] == [
+            "created",
+            "duplicate",
+            "created",
+        ]
+        assert results[1]["error"] == "Clinician UUID or email address already in use"
+        assert User.query.count() == 3
+
     def test_get_roles(self, mocker: MockerFixture) -> None:
         mocker.patch.object(
             roles,
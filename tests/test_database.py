@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import sqlalchemy.exc
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from prometheus_client import REGISTRY
+from pytest_mock import MockerFixture
+
+from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers import database
+
+
+@pytest.fixture
+def database_config() -> Dict:
+    return {
+        "SQLALCHEMY_POOL_SIZE": 4,
+        "SQLALCHEMY_MAX_OVERFLOW": 1,
+        "SQLALCHEMY_POOL_TIMEOUT": 5,
+        "SQLALCHEMY_POOL_RECYCLE": 600,
+        "SQLALCHEMY_POOL_PRE_PING": True,
+        "DATABASE_STATEMENT_TIMEOUT_MS": 30000,
+    }
+
+
+@pytest.mark.usefixtures("app")
+class TestEngineOptions:
+    def test_engine_options(self, database_config: Dict) -> None:
+        options = database.engine_options(database_config)
+        assert options["poolclass"] is database.InstrumentedQueuePool
+        assert options["pool_size"] == 4
+        assert options["max_overflow"] == 1
+        assert options["connect_args"] == {"options": "-c statement_timeout=30000"}
+
+    def test_engine_options_no_statement_timeout(self, database_config: Dict) -> None:
+        database_config["DATABASE_STATEMENT_TIMEOUT_MS"] = 0
+        assert "connect_args" not in database.engine_options(database_config)
+
+
+@pytest.mark.usefixtures("app")
+class TestDatabase:
+    def test_default_statement_timeout(self) -> None:
+        assert db.session.execute("SHOW statement_timeout").scalar() == "30s"
+
+    def test_set_statement_timeout(self) -> None:
+        database.set_statement_timeout(10)
+        assert db.session.execute("SHOW statement_timeout").scalar() == "10ms"
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            db.session.execute("SELECT pg_sleep(1)")
+        db.session.rollback()
+        # Only lasts for the transaction.
+        assert db.session.execute("SHOW statement_timeout").scalar() == "30s"
+
+    def test_pool_checkout_metrics(self) -> None:
+        db.session.remove()
+        labels = {"pool": "primary"}
+        before = (
+            REGISTRY.get_sample_value("db_pool_checkout_seconds_count", labels) or 0
+        )
+        db.session.execute("SELECT 1")
+        assert (
+            REGISTRY.get_sample_value("db_pool_checkout_seconds_count", labels)
+            == before + 1
+        )
+        assert REGISTRY.get_sample_value("db_pool_connections_in_use", labels) == 1
+        db.session.remove()
+        assert REGISTRY.get_sample_value("db_pool_connections_in_use", labels) == 0
+
+    def test_pool_size_metrics(self, app: Flask) -> None:
+        db.session.remove()
+        labels = {"pool": "primary"}
+        assert (
+            REGISTRY.get_sample_value("db_pool_size", labels)
+            == app.config["SQLALCHEMY_POOL_SIZE"]
+        )
+        db.session.execute("SELECT 1")
+        open_connections = REGISTRY.get_sample_value("db_pool_connections_open", labels)
+        idle = REGISTRY.get_sample_value("db_pool_connections_idle", labels)
+        assert open_connections is not None and open_connections >= 1
+        assert idle is not None
+        db.session.remove()
+        assert REGISTRY.get_sample_value("db_pool_connections_idle", labels) == idle + 1
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestDatabaseApi:
+    def test_pool_timeout_is_service_unavailable(
+        self, client: FlaskClient, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(
+            controller,
+            "get_clinicians",
+            side_effect=sqlalchemy.exc.TimeoutError("QueuePool limit reached"),
+        )
+        response = client.get(
+            "/dhos/v2/clinicians", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 503
+
+    def test_search_statement_timeout(
+        self, app: Flask, client: FlaskClient, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.dict(app.config, {"CLINICIAN_SEARCH_STATEMENT_TIMEOUT_MS": 1234})
+        timeouts: List[str] = []
+
+        def _get_clinicians(**kwargs: Any) -> Tuple[List, int]:
+            timeouts.append(db.session.execute("SHOW statement_timeout").scalar())
+            return [], 0
+
+        mocker.patch.object(controller, "get_clinicians", side_effect=_get_clinicians)
+        response = client.get(
+            "/dhos/v2/clinicians", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 200
+        assert timeouts == ["1234ms"]
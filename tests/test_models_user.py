@@ -1,5 +1,6 @@
 import pytest
 from helper import create_clinician
+from prometheus_client import REGISTRY
 
 from dhos_users_api.models.user import User
 
@@ -85,6 +86,13 @@ class TestModelsUser:
         with pytest.raises(RuntimeError):
             clinician.generate_password_hash("1234")
 
+    def test_password_hash_metrics(self) -> None:
+        before = REGISTRY.get_sample_value("password_hash_seconds_count") or 0
+        clinician: User = self.make_user()
+        clinician.set_password("inconceivable")
+        assert clinician.validate_password("inconceivable")
+        assert REGISTRY.get_sample_value("password_hash_seconds_count") == before + 2
+
     def test_validate_password_fail(self) -> None:
         clinician: User = self.make_user()
         clinician.set_password("inconceivable")
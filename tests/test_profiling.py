@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+from _pytest.logging import LogCaptureFixture
+from _pytest.monkeypatch import MonkeyPatch
+from flask import Flask, g
+from flask.testing import FlaskClient
+
+from dhos_users_api.helpers import profiling
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(100))
+
+
+@pytest.mark.usefixtures("app")
+class TestSampler:
+    def test_samples_thread(self) -> None:
+        stop = threading.Event()
+        thread = threading.Thread(target=_busy_loop, args=(stop,))
+        thread.start()
+        assert thread.ident is not None
+        sampler = profiling.Sampler(thread_id=thread.ident, interval=0.001)
+        sampler.start()
+        time.sleep(0.05)
+        stacks = sampler.stop()
+        stop.set()
+        thread.join()
+        assert stacks
+        assert all(":_busy_loop" in stack for stack in stacks)
+        line = profiling.collapsed_stacks(stacks).splitlines()[0]
+        assert line.split(" ")[1].isdigit()
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestRequestProfiling:
+    def _get_clinicians(self, client: FlaskClient, profile_header: str = "") -> str:
+        response = client.get(
+            "/dhos/v1/clinicians?product_name=GDM",
+            headers={
+                "Authorization": "Bearer TOKEN",
+                profiling.PROFILE_REQUEST_HEADER: profile_header,
+            },
+        )
+        assert response.status_code == 200
+        return response.headers.get(profiling.PROFILE_ID_HEADER, "")
+
+    def test_not_profiled_without_header(self, client: FlaskClient) -> None:
+        assert self._get_clinicians(client) == ""
+
+    def test_profile_request(self, client: FlaskClient) -> None:
+        # Fetching profiles requires a system JWT.
+        g.jwt_claims["system_id"] = "dhos-robot"
+        profile_id = self._get_clinicians(client, "1")
+        assert profile_id
+        response = client.get(
+            f"/profiles/{profile_id}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        response = client.get(
+            "/profiles/unknown", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 404
+
+    def test_production_requires_signature(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        monkeypatch: MonkeyPatch,
+        caplog: LogCaptureFixture,
+    ) -> None:
+        monkeypatch.setenv("ENVIRONMENT", "PRODUCTION")
+        monkeypatch.setitem(app.config, "PROFILE_SIGNING_KEY", "secret")
+        path = "/dhos/v1/clinicians"
+        expires = int(time.time()) + 60
+        assert self._get_clinicians(client, "1") == ""
+        assert (
+            self._get_clinicians(
+                client, profiling.sign_profile_request("wrong", path, expires)
+            )
+            == ""
+        )
+        assert (
+            self._get_clinicians(
+                client, profiling.sign_profile_request("secret", path, expires - 120)
+            )
+            == ""
+        )
+        profile_id = self._get_clinicians(
+            client, profiling.sign_profile_request("secret", path, expires)
+        )
+        assert profile_id
+        (record,) = [r for r in caplog.records if hasattr(r, "requestProfile")]
+        assert record.requestProfile["profile_id"] == profile_id  # type: ignore
@@ -0,0 +1,31 @@
+import pytest
+from mock import Mock
+from prometheus_client import REGISTRY
+
+from dhos_users_api.helpers import publish
+
+
+@pytest.mark.usefixtures("app")
+class TestPublish:
+    def test_metrics(self, mock_publish: Mock) -> None:
+        labels = {"routing_key": "dhos.34837004"}
+        published_before = (
+            REGISTRY.get_sample_value("rabbitmq_publish_seconds_count", labels) or 0
+        )
+        failures_before = (
+            REGISTRY.get_sample_value("rabbitmq_publish_failures_total", labels) or 0
+        )
+        publish.audit_message("login", {})
+        mock_publish.side_effect = ConnectionError("RabbitMQ unavailable")
+        with pytest.raises(ConnectionError):
+            publish.audit_message("login", {})
+        assert mock_publish.call_count == 2
+        assert (
+            REGISTRY.get_sample_value("rabbitmq_publish_seconds_count", labels)
+            == published_before + 2
+        )
+        assert (
+            REGISTRY.get_sample_value("rabbitmq_publish_failures_total", labels)
+            == failures_before + 1
+        )
+        assert REGISTRY.get_sample_value("rabbitmq_publishes_in_progress") == 0
@@ -0,0 +1,111 @@
+import logging
+from typing import Callable, ContextManager, Dict, List, Optional
+
+import pytest
+from _pytest.logging import LogCaptureFixture
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from helper import create_clinician
+from mock import Mock
+from prometheus_client import REGISTRY
+from sqlalchemy import func, literal, select
+
+from dhos_users_api.helpers import query_stats
+
+QueryBudget = Callable[[int], ContextManager[List[str]]]
+
+
+@pytest.mark.usefixtures("app")
+class TestParameterShape:
+    def test_parameter_shape(self) -> None:
+        assert query_stats.parameter_shape({"uuid_1": "abc", "limit": 10}) == {
+            "uuid_1": "str",
+            "limit": "int",
+        }
+        assert query_stats.parameter_shape(("abc", None)) == ["str", "NoneType"]
+        assert query_stats.parameter_shape([{"a": 1}, {"a": 2}]) == "2 x {'a': 'int'}"
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestQueryStats:
+    @pytest.fixture
+    def clinician_uuids(self) -> List[str]:
+        return [
+            create_clinician(
+                first_name="A",
+                last_name=str(i),
+                nhs_smartcard_number="123456",
+                product_name="GDM",
+                locations=["L1"],
+            )["uuid"]
+            for i in range(5)
+        ]
+
+    def test_slow_query_log(
+        self, app: Flask, app_context: None, caplog: LogCaptureFixture
+    ) -> None:
+        app.config["SQL_SLOW_QUERY_THRESHOLD_MS"] = 0.001
+        before = REGISTRY.get_sample_value("db_slow_queries_total") or 0
+        db.session.execute(select(func.pg_sleep(0.01), literal("patient data")))
+        (record,) = [r for r in caplog.records if hasattr(r, "slowQuery")]
+        slow_query = record.slowQuery  # type: ignore
+        assert slow_query["statement"].startswith("SELECT pg_sleep")
+        assert sorted(slow_query["parameters"].values()) == ["float", "str"]
+        assert "patient data" not in caplog.text
+        assert REGISTRY.get_sample_value("db_slow_queries_total") == before + 1
+
+    def test_request_stats(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        clinician_uuids: List[str],
+        caplog: LogCaptureFixture,
+    ) -> None:
+        app.config["REQUEST_TIMING_LOG_THRESHOLD_MS"] = 0
+        with caplog.at_level(logging.INFO):
+            response = client.get(
+                "/dhos/v1/clinicians?product_name=GDM",
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+        assert response.status_code == 200
+        (record,) = [r for r in caplog.records if hasattr(r, "requestTiming")]
+        timings = record.requestTiming  # type: ignore
+        assert timings["sql"]["statements"] > 0
+        assert timings["sql"]["rows"] >= len(clinician_uuids)
+        labels = {"endpoint": timings["endpoint"]}
+        assert REGISTRY.get_sample_value("db_statements_per_request_count", labels)
+
+    @pytest.mark.parametrize(
+        "method,url,body,budget",
+        [
+            ("get", "/dhos/v1/clinician/{uuid}", None, 2),
+            ("patch", "/dhos/v1/clinician/{uuid}", {"first_name": "B"}, 6),
+            ("post", "/dhos/v1/clinician_list", "uuids", 3),
+            ("get", "/dhos/v1/clinicians?product_name=GDM", None, 3),
+            ("get", "/dhos/v1/clinicians?product_name=GDM&compact=true", None, 3),
+            ("get", "/dhos/v1/location/L1/clinician", None, 4),
+            ("get", "/dhos/v1/clinician_changes?since=0", None, 4),
+        ],
+    )
+    def test_query_budgets(
+        self,
+        client: FlaskClient,
+        clinician_uuids: List[str],
+        mock_publish: Mock,
+        query_budget: QueryBudget,
+        method: str,
+        url: str,
+        body: Optional[Dict],
+        budget: int,
+    ) -> None:
+        # The number of statements mustn't grow with the number of clinicians.
+        with query_budget(budget):
+            response = getattr(client, method)(
+                url.format(uuid=clinician_uuids[0]),
+                json=clinician_uuids if body == "uuids" else body,
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+        assert response.status_code == 200
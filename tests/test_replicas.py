@@ -0,0 +1,177 @@
+from typing import Any, Generator, List, Optional, Tuple
+
+import pytest
+import sqlalchemy
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from helper import create_clinician
+from mock import Mock
+from pytest_mock import MockerFixture
+
+from dhos_users_api.blueprint_api import controller
+from dhos_users_api.helpers import clinician_cache, replicas
+
+
+def _replica(lag: float) -> Mock:
+    replica = Mock(spec=replicas.Replica, engine=Mock())
+    replica.lag.return_value = lag
+    return replica
+
+
+@pytest.mark.usefixtures("app")
+class TestReplicaRouter:
+    def test_routes_to_replicas_in_turn(self) -> None:
+        replica_1, replica_2 = _replica(lag=0), _replica(lag=1)
+        router = replicas.ReplicaRouter(
+            replicas=[replica_1, replica_2], max_lag=5, sticky_seconds=10
+        )
+        assert router.choose_engine("user") is replica_1.engine
+        assert router.choose_engine("user") is replica_2.engine
+        assert router.choose_engine("user") is replica_1.engine
+
+    def test_skips_lagging_replicas(self) -> None:
+        replica_1, replica_2 = _replica(lag=6), _replica(lag=0)
+        router = replicas.ReplicaRouter(
+            replicas=[replica_1, replica_2], max_lag=5, sticky_seconds=10
+        )
+        assert router.choose_engine("user") is replica_2.engine
+        assert router.choose_engine("user") is replica_2.engine
+
+    def test_falls_back_to_primary(self) -> None:
+        router = replicas.ReplicaRouter(
+            replicas=[_replica(lag=float("inf"))], max_lag=5, sticky_seconds=10
+        )
+        assert router.choose_engine("user") is None
+
+    def test_read_your_writes(self) -> None:
+        replica = _replica(lag=0)
+        router = replicas.ReplicaRouter(
+            replicas=[replica], max_lag=5, sticky_seconds=10
+        )
+        router.record_write("writer")
+        assert router.choose_engine("writer") is None
+        assert router.choose_engine("reader") is replica.engine
+
+    def test_read_your_writes_expires(self) -> None:
+        replica = _replica(lag=0)
+        router = replicas.ReplicaRouter(replicas=[replica], max_lag=5, sticky_seconds=0)
+        router.record_write("writer")
+        assert router.choose_engine("writer") is replica.engine
+
+
+@pytest.mark.usefixtures("app")
+class TestReplica:
+    def test_lag_of_primary_is_zero(self) -> None:
+        replica = replicas.Replica(
+            host="localhost", engine=db.engine, lag_check_interval=5
+        )
+        assert replica.lag() == 0
+
+    def test_lag_of_unreachable_replica(self) -> None:
+        engine = Mock()
+        engine.connect.side_effect = replicas.sqlalchemy.exc.OperationalError(
+            "", {}, Exception("connection refused")
+        )
+        replica = replicas.Replica(host="replica", engine=engine, lag_check_interval=5)
+        assert replica.lag() == float("inf")
+        # Not checked again until the interval has passed.
+        assert replica.lag() == float("inf")
+        assert engine.connect.call_count == 1
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestReadReplicaApi:
+    @pytest.fixture
+    def replica_app(self, app: Flask) -> Generator[Flask, None, None]:
+        # Use the primary as a stand-in for a replica.
+        app.config["DATABASE_REPLICA_HOSTS"] = [db.engine.url.host]
+        app.extensions.pop("replica_router", None)
+        db.session.remove()
+        yield app
+        db.session.remove()
+        router = app.extensions.pop("replica_router")
+        for replica in router.replicas:
+            replica.engine.dispose()
+        app.config["DATABASE_REPLICA_HOSTS"] = []
+
+    @pytest.fixture
+    def routed_to(self, mocker: MockerFixture) -> List[Optional[bool]]:
+        routed_to: List[Optional[bool]] = []
+
+        def _get_clinicians(**kwargs: Any) -> Tuple[List, int]:
+            routed_to.append(db.session.info.get(replicas.REPLICA_SESSION_KEY))
+            controller.User.query.all()
+            return [], 0
+
+        mocker.patch.object(controller, "get_clinicians", side_effect=_get_clinicians)
+        return routed_to
+
+    def test_read_from_replica(
+        self, replica_app: Flask, client: FlaskClient, routed_to: List[Optional[bool]]
+    ) -> None:
+        response = client.get(
+            "/dhos/v2/clinicians", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 200
+        assert routed_to == [True]
+
+    def test_read_your_writes(
+        self, replica_app: Flask, client: FlaskClient, routed_to: List[Optional[bool]]
+    ) -> None:
+        create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            expiry=None,
+            login_active=True,
+            send_entry_identifier="321",
+        )
+        db.session.remove()
+
+        response = client.get(
+            "/dhos/v2/clinicians", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 200
+        assert routed_to == [None]
+
+    def test_clinicians_cached_from_primary(
+        self, replica_app: Flask, client: FlaskClient
+    ) -> None:
+        clinician_uuid = create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="SEND",
+            expiry=None,
+            login_active=True,
+            send_entry_identifier="321",
+        )["uuid"]
+        db.session.remove()
+        router = replicas._get_router(replica_app)
+        assert router is not None
+        router._recent_writers.clear()
+        primary_statements: List[str] = []
+
+        def _record(*args: Any) -> None:
+            primary_statements.append(args[2])
+
+        sqlalchemy.event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            response = client.post(
+                "/dhos/v1/clinician_list",
+                json=[clinician_uuid],
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+        finally:
+            sqlalchemy.event.remove(db.engine, "before_cursor_execute", _record)
+
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json[clinician_uuid]["first_name"] == "A"
+        assert any('FROM "user"' in s for s in primary_statements)
+        cached = clinician_cache.get_cache().get_many([clinician_uuid], Mock())
+        assert cached[clinician_uuid]["clinician"]["first_name"] == "A"
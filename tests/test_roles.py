@@ -1,6 +1,10 @@
-from typing import List, Set
+import json
+from pathlib import Path
+from typing import Generator, List, Set
 
 import pytest
+from flask import Flask
+from pytest_mock import MockerFixture
 
 from dhos_users_api import roles
 from dhos_users_api.roles import UserPermission, UserRole
@@ -254,3 +258,73 @@ class TestRoles:
             "write:send_pdf",
             "write:ward_report",
         }
+
+
+@pytest.fixture
+def role_mapping_file(tmp_path: Path) -> Path:
+    path = tmp_path / "roles.json"
+    path.write_text(json.dumps({"Role A": ["read:a"], "Role B": ["read:b", "write:b"]}))
+    return path
+
+
+@pytest.fixture
+def file_role_mapping(
+    app: Flask, role_mapping_file: Path
+) -> Generator[Path, None, None]:
+    app.config["ROLE_MAPPING_FILE"] = str(role_mapping_file)
+    app.config["ROLE_MAPPING_RELOAD_INTERVAL"] = 0
+    roles.init_roles(app)
+    yield role_mapping_file
+    app.config["ROLE_MAPPING_FILE"] = None
+    roles.init_roles(app)
+
+
+class TestRoleMappingFile:
+    def test_loads_role_mapping_file(self, file_role_mapping: Path) -> None:
+        assert set(roles.get_permissions_for_roles(["Role A", "Role B"])) == {
+            "read:a",
+            "read:b",
+            "write:b",
+        }
+        assert set(roles.get_role_map()) == {"Role A", "Role B"}
+
+    def test_reloads_changed_file(
+        self, file_role_mapping: Path, mocker: MockerFixture
+    ) -> None:
+        assert roles.get_permissions_for_roles(["Role A"]) == ["read:a"]
+        file_role_mapping.write_text(json.dumps({"Role A": ["read:a2"]}))
+        mocker.patch.object(
+            Path, "stat", return_value=mocker.Mock(st_mtime=9_999_999_999.0)
+        )
+        assert roles.get_permissions_for_roles(["Role A"]) == ["read:a2"]
+        assert roles.get_role_map() == {"Role A": ["read:a2"]}
+
+    def test_invalid_reload_keeps_current_mapping(
+        self, file_role_mapping: Path, mocker: MockerFixture
+    ) -> None:
+        file_role_mapping.write_text(json.dumps({"Role A": "read:a"}))
+        mocker.patch.object(
+            Path, "stat", return_value=mocker.Mock(st_mtime=9_999_999_999.0)
+        )
+        assert roles.get_permissions_for_roles(["Role A"]) == ["read:a"]
+
+    def test_invalid_file_at_startup_fails(
+        self, app: Flask, role_mapping_file: Path
+    ) -> None:
+        role_mapping_file.write_text(json.dumps(["Role A"]))
+        app.config["ROLE_MAPPING_FILE"] = str(role_mapping_file)
+        try:
+            with pytest.raises(ValueError):
+                roles.init_roles(app)
+        finally:
+            app.config["ROLE_MAPPING_FILE"] = None
+            roles.init_roles(app)
+
+    def test_set_role_mapping_invalidates_caches(self, app: Flask) -> None:
+        assert "read:hl7_message" in roles.get_role_map()["EPR Service Adapter"]
+        try:
+            roles.set_role_mapping({"EPR Service Adapter": []}, source="test")
+            assert roles.get_role_map() == {"EPR Service Adapter": []}
+            assert roles.get_permissions_for_roles(["EPR Service Adapter"]) == []
+        finally:
+            roles.init_roles(app)
@@ -0,0 +1,159 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Set
+
+import pytest
+import requests
+from prometheus_client.parser import text_string_to_metric_families
+from pytest_mock import MockerFixture
+from waitress.task import ThreadedTaskDispatcher
+
+from dhos_users_api.server import ServerConfig, _TaskDispatcher
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_running(port: int) -> None:
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/running", timeout=5)
+            return
+        except requests.RequestException:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def _not_found_count(port: int) -> float:
+    response = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=5)
+    return sum(
+        sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+        if sample.name == "flask_request_count_total"
+        and sample.labels["http_status"] == "404"
+    )
+
+
+def _children(pid: int) -> Set[int]:
+    children = subprocess.run(
+        ["pgrep", "-P", str(pid)], capture_output=True, text=True
+    ).stdout.split()
+    return {int(c) for c in children}
+
+
+@pytest.mark.usefixtures("app")
+class TestServer:
+    def test_config_defaults(self, mocker: MockerFixture) -> None:
+        mocker.patch.dict(os.environ, clear=True)
+        config = ServerConfig()
+        assert config.workers == 1
+        assert config.threads == 4
+        assert config.backlog == 1024
+        # One database connection per thread in each worker.
+        assert config.pool_size == 4
+
+    def test_config_from_env(self, mocker: MockerFixture) -> None:
+        mocker.patch.dict(
+            os.environ,
+            {
+                "SERVER_WORKERS": "3",
+                "SERVER_THREADS": "8",
+                "SERVER_BACKLOG": "64",
+                "SQLALCHEMY_POOL_SIZE": "5",
+            },
+        )
+        config = ServerConfig()
+        assert config.workers == 3
+        assert config.threads == 8
+        assert config.backlog == 64
+        assert config.pool_size == 5
+
+    def test_waitress_waits_for_graceful_timeout(self, mocker: MockerFixture) -> None:
+        shutdown = mocker.patch.object(ThreadedTaskDispatcher, "shutdown")
+        _TaskDispatcher(shutdown_timeout=30).shutdown()
+        shutdown.assert_called_once_with(cancel_pending=True, timeout=30)
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_prefork_server(self) -> None:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "dhos_users_api"],
+            env={
+                **os.environ,
+                "SERVER_HOST": "127.0.0.1",
+                "SERVER_PORT": str(port),
+                "SERVER_WORKERS": "2",
+                "SERVER_GRACEFUL_TIMEOUT": "5",
+                "LOG_LEVEL": "ERROR",
+            },
+        )
+        try:
+            _wait_until_running(port)
+            workers = _children(server.pid)
+            assert len(workers) == 2
+
+            # Reloading replaces every worker.
+            server.send_signal(signal.SIGHUP)
+            deadline = time.monotonic() + 30
+            while _children(server.pid) & workers or len(_children(server.pid)) < 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.2)
+            _wait_until_running(port)
+
+            server.send_signal(signal.SIGTERM)
+            assert server.wait(timeout=30) == 0
+        finally:
+            server.kill()
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_prefork_server_metrics(self, tmp_path: Path) -> None:
+        # Left by a previous run.
+        (tmp_path / "counter_1.db").write_bytes(b"stale")
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "dhos_users_api"],
+            env={
+                **os.environ,
+                "SERVER_HOST": "127.0.0.1",
+                "SERVER_PORT": str(port),
+                "SERVER_WORKERS": "2",
+                "SERVER_GRACEFUL_TIMEOUT": "5",
+                "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+                "LOG_LEVEL": "ERROR",
+            },
+        )
+        try:
+            _wait_until_running(port)
+            assert not (tmp_path / "counter_1.db").exists()
+            for _ in range(10):
+                requests.get(f"http://127.0.0.1:{port}/unknown", timeout=5)
+
+            # Whichever worker is scraped reports the requests both handled.
+            for _ in range(6):
+                assert _not_found_count(port) == 10
+
+            # Counts from replaced workers are kept.
+            workers = _children(server.pid)
+            server.send_signal(signal.SIGHUP)
+            deadline = time.monotonic() + 30
+            while _children(server.pid) & workers or len(_children(server.pid)) < 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.2)
+            _wait_until_running(port)
+            assert _not_found_count(port) == 10
+
+            server.send_signal(signal.SIGTERM)
+            assert server.wait(timeout=30) == 0
+        finally:
+            server.kill()
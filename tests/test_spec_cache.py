@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from dhos_users_api.helpers import spec_cache
+
+
+@pytest.mark.usefixtures("app")
+class TestSpecCache:
+    def test_load_spec_from_cache(self, tmp_path: Path) -> None:
+        cache_path = tmp_path / "openapi.cache.json"
+        spec_cache.write_spec_cache(cache_path=cache_path)
+        spec = spec_cache.load_spec(cache_path=cache_path)
+        assert spec == yaml.safe_load(spec_cache.SPEC_FILE.read_bytes())
+
+    def test_load_spec_no_cache(self, tmp_path: Path) -> None:
+        spec = spec_cache.load_spec(cache_path=tmp_path / "openapi.cache.json")
+        assert spec == "openapi.yaml"
+
+    def test_load_spec_stale_cache(self, tmp_path: Path) -> None:
+        spec_path = tmp_path / "openapi.yaml"
+        spec_path.write_text("openapi: 3.0.3\n")
+        cache_path = tmp_path / "openapi.cache.json"
+        spec_cache.write_spec_cache(spec_path=spec_path, cache_path=cache_path)
+        spec_path.write_text("openapi: 3.0.3\ninfo: {}\n")
+        assert spec_cache.load_spec(spec_path=spec_path, cache_path=cache_path) == (
+            "openapi.yaml"
+        )
+
+    def test_load_spec_invalid_cache(self, tmp_path: Path) -> None:
+        cache_path = tmp_path / "openapi.cache.json"
+        cache_path.write_text("{not json")
+        assert spec_cache.load_spec(cache_path=cache_path) == "openapi.yaml"
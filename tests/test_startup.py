@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from _pytest.logging import LogCaptureFixture
+
+from dhos_users_api.helpers.startup import StartupProfiler
+
+# Generous, so the test only fails on a real regression rather than a slow machine.
+COLD_START_BUDGET_SECONDS = 5.0
+
+
+@pytest.mark.usefixtures("app")
+class TestStartup:
+    def test_profiler_reports_phases(self, caplog: LogCaptureFixture) -> None:
+        profiler = StartupProfiler(enabled=True, started_at=time.perf_counter())
+        with profiler.phase("first"):
+            pass
+        with profiler.phase("second"):
+            pass
+        profiler.report()
+        assert list(profiler.phases) == ["imports", "first", "second"]
+        assert "Startup took" in caplog.text
+        assert "second" in caplog.text
+
+    def test_profiler_disabled(self, caplog: LogCaptureFixture) -> None:
+        profiler = StartupProfiler(enabled=False, started_at=time.perf_counter())
+        with profiler.phase("first"):
+            pass
+        profiler.report()
+        assert "Startup took" not in caplog.text
+
+    def test_cold_start_budget(self) -> None:
+        # Time importing and creating the app in a fresh interpreter.
+        code = (
+            "import time\n"
+            "start = time.perf_counter()\n"
+            "from dhos_users_api.app import create_app\n"
+            "create_app(testing=True)\n"
+            "print(time.perf_counter() - start)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "LOG_LEVEL": "ERROR"},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        cold_start = float(result.stdout.strip().splitlines()[-1])
+        assert cold_start < COLD_START_BUDGET_SECONDS
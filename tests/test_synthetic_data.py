@@ -0,0 +1,58 @@
+from collections import Counter
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from flask import Flask
+
+from dhos_users_api.blueprint_development import synthetic_data
+from dhos_users_api.models.terms_agreement import TermsAgreement
+from dhos_users_api.models.user import User
+
+
+@pytest.mark.usefixtures("app")
+class TestSyntheticData:
+    def test_generate_is_repeatable(self) -> None:
+        first = list(synthetic_data.SyntheticClinicians(10, seed=1).generate(20))
+        second = list(synthetic_data.SyntheticClinicians(10, seed=1).generate(20))
+        assert first == second
+
+    def test_locations_are_skewed(self) -> None:
+        generator = synthetic_data.SyntheticClinicians(50, seed=1)
+        counts = Counter(
+            location
+            for clinician in generator.generate(2000)
+            for location in clinician["locations"]
+        )
+        # A uniform spread would give each location about 2% of the clinicians.
+        assert counts[generator.locations[0]] > 10 * counts[generator.locations[-1]]
+
+    def test_cli_adds_clinicians(self, app: Flask) -> None:
+        result = app.test_cli_runner().invoke(
+            args=["generate-synthetic-clinicians", "300", "--locations", "20"]
+        )
+        assert result.exit_code == 0, result.output
+        assert "Added 300 of 300 clinicians" in result.output
+        assert User.query.count() == 300
+        assert TermsAgreement.query.count() >= 300
+        temporary = User.query.filter(User.contract_expiry_eod_date.is_not(None))
+        assert all(u.send_entry_identifier.startswith("@") for u in temporary)
+
+    def test_cli_fails_if_seed_reused(self, app: Flask) -> None:
+        args = ["generate-synthetic-clinicians", "20", "--locations", "5"]
+        assert app.test_cli_runner().invoke(args=args).exit_code == 0
+        result = app.test_cli_runner().invoke(args=args)
+        assert result.exit_code != 0
+        assert "Added 0 of 20 clinicians" in result.output
+        assert "Failed to add 1 batches of clinicians" in result.output
+        assert User.query.count() == 20
+
+    def test_cli_refuses_in_production(
+        self, app: Flask, monkeypatch: MonkeyPatch
+    ) -> None:
+        monkeypatch.setenv("ENVIRONMENT", "PRODUCTION")
+        result = app.test_cli_runner().invoke(
+            args=["generate-synthetic-clinicians", "10"]
+        )
+        assert result.exit_code != 0
+        assert "production" in result.output
+        assert User.query.count() == 0
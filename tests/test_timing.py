@@ -0,0 +1,90 @@
+import logging
+
+import pytest
+from _pytest.logging import LogCaptureFixture
+from flask import Flask
+from flask.testing import FlaskClient
+from helper import create_clinician
+from mock import Mock
+
+from dhos_users_api.helpers import timing
+
+
+@pytest.mark.usefixtures(
+    "app", "mock_retrieve_jwt_claims", "mock_bearer_validation", "jwt_clinician_login"
+)
+class TestRequestTiming:
+    @pytest.fixture
+    def clinician_uuid(self) -> str:
+        return create_clinician(
+            first_name="A",
+            last_name="A",
+            nhs_smartcard_number="123456",
+            product_name="GDM",
+        )["uuid"]
+
+    def _update_clinician(self, client: FlaskClient, clinician_uuid: str) -> str:
+        response = client.patch(
+            f"/dhos/v1/clinician/{clinician_uuid}",
+            json={"first_name": "B"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        return response.headers.get("Server-Timing", "")
+
+    def test_logs_phases(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        clinician_uuid: str,
+        mock_publish: Mock,
+        caplog: LogCaptureFixture,
+    ) -> None:
+        app.config["REQUEST_TIMING_LOG_THRESHOLD_MS"] = 0
+        with caplog.at_level(logging.INFO):
+            assert self._update_clinician(client, clinician_uuid) == ""
+        (record,) = [r for r in caplog.records if hasattr(r, "requestTiming")]
+        timings = record.requestTiming  # type: ignore
+        assert timings["endpoint"].endswith("update_clinician")
+        assert timings["status"] == 200
+        assert set(timings["phases_ms"]) == {
+            "load",
+            "validate",
+            "apply",
+            "commit",
+            "publish",
+            "serialise",
+        }
+        assert sum(timings["phases_ms"].values()) <= timings["duration_ms"]
+
+    def test_fast_requests_logged_at_debug(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        clinician_uuid: str,
+        mock_publish: Mock,
+        caplog: LogCaptureFixture,
+    ) -> None:
+        app.config["REQUEST_TIMING_LOG_THRESHOLD_MS"] = 60000
+        with caplog.at_level(logging.INFO):
+            self._update_clinician(client, clinician_uuid)
+        assert not [r for r in caplog.records if hasattr(r, "requestTiming")]
+
+    def test_server_timing_header(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        clinician_uuid: str,
+        mock_publish: Mock,
+    ) -> None:
+        app.config["SERVER_TIMING_HEADER"] = True
+        header = self._update_clinician(client, clinician_uuid)
+        names = [entry.split(";")[0] for entry in header.split(", ")]
+        assert names[0] == "load"
+        assert names[-1] == "total"
+        assert "commit" in names
+
+    def test_phase_outside_request(self) -> None:
+        with timing.phase("load"):
+            pass
+        timing.record("load", 1)